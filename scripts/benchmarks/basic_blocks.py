@@ -0,0 +1,102 @@
+"""
+Compare running a contract with the interpreter loop, which looks up and charges
+the gas of every opcode, with running it as basic blocks.
+
+The contract loops over ``n`` from its call data, multiplying and adding on the
+stack, and returns the result. Both engines must give the same output and leave
+the same gas before they are timed.
+
+    python scripts/benchmarks/basic_blocks.py --iterations 100 1000 10000
+"""
+import argparse
+import logging
+import time
+from typing import (
+    Type,
+)
+
+from eth_hash.auto import keccak
+
+from veda.abc import ComputationAPI, StateAPI
+from veda.db.atomic import AtomicDB
+from veda.rpc.chain import VedaAsyncChain
+from veda.vm.forks import VedaVM
+from veda.vm.message import Message
+
+# PUSH1 0 CALLDATALOAD PUSH1 0
+# loop: JUMPDEST PUSH1 31 MUL DUP2 ADD SWAP1 PUSH1 1 SWAP1 SUB SWAP1 DUP2 PUSH1 loop JUMPI
+# PUSH1 0 MSTORE PUSH1 32 PUSH1 0 RETURN
+LOOP_CODE = bytes.fromhex(
+    '6000356000'
+    '5b601f02810190600190039081600557'
+    '600052' '60206000f3'
+)
+CONTRACT = b'\xcc' * 20
+SENDER = b'\x11' * 20
+GAS = 100000000
+
+
+def run(
+    computation_class: Type[ComputationAPI],
+    state: StateAPI,
+    iterations: int,
+) -> ComputationAPI:
+    message = Message(
+        gas=GAS,
+        to=CONTRACT,
+        sender=SENDER,
+        data=iterations.to_bytes(32, 'big'),
+        code=LOOP_CODE,
+        code_hash=keccak(LOOP_CODE),
+    )
+    transaction_context = state.get_transaction_context_class()(origin=SENDER)
+    computation = computation_class.apply_computation(state, message, transaction_context)
+    computation.raise_if_error()
+    return computation
+
+
+def measure(
+    computation_class: Type[ComputationAPI],
+    state: StateAPI,
+    iterations: int,
+    runs: int,
+) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        run(computation_class, state, iterations)
+    return (time.perf_counter() - start) / runs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    chain_class = VedaAsyncChain.configure(vm_configuration=((0, VedaVM),), chain_id=1)
+    chain = chain_class.from_genesis(
+        AtomicDB(),
+        {'difficulty': 1, 'gas_limit': 10485760, 'timestamp': 1},
+    )
+    state = chain.get_vm().state
+    interpreter_class = state.computation_class.configure(use_basic_blocks=False)
+    basic_block_class = state.computation_class.configure(use_basic_blocks=True)
+
+    for iterations in args.iterations:
+        expected = run(interpreter_class, state, iterations)
+        result = run(basic_block_class, state, iterations)
+        assert result.output == expected.output, "Different output"
+        assert result.get_gas_remaining() == expected.get_gas_remaining(), "Different gas"
+
+        interpreter_time = measure(interpreter_class, state, iterations, args.runs)
+        basic_block_time = measure(basic_block_class, state, iterations, args.runs)
+        print(
+            f"{iterations:6d} iterations  interpreter {interpreter_time * 1000:8.2f}ms  "
+            f"basic blocks {basic_block_time * 1000:8.2f}ms  "
+            f"{interpreter_time / basic_block_time:4.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
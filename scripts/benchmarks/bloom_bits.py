@@ -0,0 +1,98 @@
+"""
+Measure how fast the bloom bits rule out blocks for a filter over a long synthetic
+chain, with and without NumPy.
+
+Every block gets a bloom of some random addresses and topics, and the bloom bits
+are written for all of them. The query looks for one address with one topic, which
+only few blocks have.
+
+    python scripts/benchmarks/bloom_bits.py --blocks 100000
+"""
+import argparse
+import random
+import time
+
+from eth_bloom import BloomFilter
+from eth_typing import (
+    Address,
+    BlockNumber,
+    Hash32,
+)
+
+from veda.db import bloom_bits
+from veda.db.atomic import AtomicDB
+from veda.db.bloom_bits import (
+    ROW_BYTES,
+    SECTION_SIZE,
+    find_bloom_candidates,
+)
+from veda.db.schema import SchemaV1
+
+
+def write_bloom_bits(db: AtomicDB, blocks: int, values_per_block: int) -> int:
+    rnd = random.Random(0)
+    match_count = 0
+    rows = {}
+    for block_number in range(blocks):
+        bloom = BloomFilter()
+        for _ in range(values_per_block):
+            bloom.add(rnd.randbytes(32))
+        # One block in a thousand has the log that is looked for
+        if rnd.random() < 0.001:
+            bloom.add(b'\x01' * 20)
+            bloom.add(b'\x02' * 32)
+            match_count += 1
+
+        section, offset = divmod(block_number, SECTION_SIZE)
+        for bit in bloom_bits._get_set_bits(int(bloom)):
+            key = SchemaV1.make_bloom_bits_key(bit, section)
+            if key not in rows:
+                rows[key] = bytearray(ROW_BYTES)
+            rows[key][offset // 8] |= 0x80 >> (offset % 8)
+
+        if offset == SECTION_SIZE - 1 or block_number == blocks - 1:
+            with db.atomic_batch() as write_batch:
+                for key, row in rows.items():
+                    write_batch[key] = bytes(row)
+            rows.clear()
+    return match_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--blocks', type=int, default=100000)
+    parser.add_argument('--values-per-block', type=int, default=20)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    db = AtomicDB()
+    match_count = write_bloom_bits(db, args.blocks, args.values_per_block)
+
+    implementations = [('python', None)]
+    if bloom_bits.numpy is not None:
+        implementations.append(('numpy', bloom_bits.numpy))
+
+    results = []
+    for name, numpy_module in implementations:
+        bloom_bits.numpy = numpy_module
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            candidates = find_bloom_candidates(
+                db,
+                BlockNumber(0),
+                BlockNumber(args.blocks - 1),
+                (Address(b'\x01' * 20),),
+                ((Hash32(b'\x02' * 32),),),
+            )
+        elapsed = (time.perf_counter() - start) / args.runs
+        results.append(candidates)
+        print(
+            f"{name:<7} {args.blocks} blocks  {len(candidates)} candidates "
+            f"for {match_count} matches  {elapsed * 1000:8.1f}ms"
+        )
+
+    assert all(candidates == results[0] for candidates in results), "Candidates differ"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare canonical block hash and header lookups by number through the memory mapped
+canonical index with the lookups over the database IPC socket.
+
+Persists a synthetic chain of headers, serves the database from a DBManager that
+keeps the canonical index up to date, then looks up random block numbers through a
+ChainDB on a DBClient, with and without the index configured in the process.
+
+    python scripts/benchmarks/canonical_index.py --blocks 10000
+"""
+import argparse
+import logging
+import pathlib
+import random
+import tempfile
+import time
+from typing import (
+    Callable,
+    Sequence,
+)
+
+from veda.db.backends.level import LevelDB
+from veda.db.canonical_index import CanonicalIndexWriter, configure_canonical_index
+from veda.db.chain import ChainDB
+from veda.db.manager import DBClient, DBManager
+from veda.rpc.chain import VedaAsyncChain
+from veda.vm.forks import VedaVM
+
+
+def import_headers(db: LevelDB, blocks: int) -> None:
+    chain_class = VedaAsyncChain.configure(vm_configuration=((0, VedaVM),), chain_id=1)
+    chain = chain_class.from_genesis(
+        db,
+        {'difficulty': 1, 'gas_limit': 10485760, 'timestamp': 1},
+    )
+    parent = chain.get_canonical_head()
+    headers = []
+    for index in range(1, blocks):
+        parent = parent.copy(
+            parent_hash=parent.hash,
+            block_number=parent.block_number + 1,
+            timestamp=parent.timestamp + 1,
+            veda_block_hash=index.to_bytes(32, 'big'),
+            veda_block_number=index,
+            veda_timestamp=index,
+        )
+        headers.append(parent)
+    for start in range(0, len(headers), 1000):
+        chain.chaindb.persist_header_chain(headers[start:start + 1000])
+
+
+def measure(lookup: Callable[[int], object], block_numbers: Sequence[int]) -> float:
+    start = time.perf_counter()
+    for block_number in block_numbers:
+        lookup(block_number)
+    return (time.perf_counter() - start) / len(block_numbers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--blocks', type=int, default=10000)
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory = pathlib.Path(tmp_dir)
+        db = LevelDB(directory / 'db')
+        start = time.perf_counter()
+        import_headers(db, args.blocks)
+        print(f"persisted {args.blocks} headers in {time.perf_counter() - start:.1f}s")
+
+        writer = CanonicalIndexWriter(directory / 'canonical', db)
+        start = time.perf_counter()
+        writer.catch_up()
+        print(f"built the canonical index in {time.perf_counter() - start:.1f}s")
+
+        manager = DBManager(db, writer)
+        with manager.run(directory / 'db.ipc'):
+            chaindb = ChainDB(DBClient.connect(directory / 'db.ipc'))
+            head = chaindb.get_canonical_head().block_number
+            rnd = random.Random(0)
+            block_numbers = tuple(
+                rnd.randint(head - args.blocks + 1, head) for _ in range(args.lookups)
+            )
+
+            for name in ('ipc', 'canonical index'):
+                if name == 'canonical index':
+                    configure_canonical_index(directory / 'canonical')
+                hash_time = measure(chaindb.get_canonical_block_hash, block_numbers)
+                header_time = measure(chaindb.get_canonical_block_header_by_number, block_numbers)
+                print(
+                    f"{name:<16} hash {hash_time * 1e6:7.1f}us  "
+                    f"header {header_time * 1e6:7.1f}us"
+                )
+            configure_canonical_index(None)
+        writer.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare a full database scan through the ITERATE operation with iterating LevelDB
+directly, and with reading the same keys one GET at a time.
+
+    python scripts/benchmarks/db_iterate.py --keys 200000 --batch-size 1024
+"""
+import argparse
+import os
+import pathlib
+import tempfile
+import time
+from typing import (
+    Callable,
+    Iterable,
+    Tuple,
+)
+
+from veda.db.backends.level import LevelDB
+from veda.db.manager import DBClient, DBManager
+
+
+def timed_scan(name: str, scan: Callable[[], Iterable[Tuple[bytes, bytes]]]) -> None:
+    start = time.perf_counter()
+    pair_count = 0
+    total_bytes = 0
+    for key, value in scan():
+        pair_count += 1
+        total_bytes += len(key) + len(value)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<10} {pair_count:>9} pairs  "
+        f"{pair_count / elapsed:12,.0f} pairs/s  "
+        f"{total_bytes / elapsed / 1e6:8.1f} MB/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--keys', type=int, default=200000)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=1024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = LevelDB(pathlib.Path(tmp_dir) / 'db')
+        keys = tuple(os.urandom(32) for _ in range(args.keys))
+        with db.atomic_batch() as batch:
+            for key in keys:
+                batch[key] = os.urandom(args.value_size)
+
+        ipc_path = pathlib.Path(tmp_dir) / 'db.ipc'
+        manager = DBManager(db)
+        with manager.run(ipc_path):
+            client = DBClient.connect(ipc_path)
+
+            timed_scan('LevelDB', db.iterate)
+            timed_scan('ITERATE', lambda: client.iterate(batch_size=args.batch_size))
+            timed_scan('GET', lambda: ((key, client[key]) for key in keys))
+
+            client.close()
+
+
+if __name__ == '__main__':
+    main()
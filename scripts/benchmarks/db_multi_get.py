@@ -0,0 +1,114 @@
+"""
+Compare per-key GET against MULTI_GET over the DBManager IPC socket.
+
+Every simulated RPC call reads ``--keys-per-call`` keys, roughly the number of
+trie nodes touched by an ``eth_getStorageAt`` lookup. Then a single lookup of
+``--large-keys`` keys, like a whole trie level read by the state pruner, checks
+that the values of requests split into many MULTI_GETs come back complete.
+
+    python scripts/benchmarks/db_multi_get.py --calls 2000 --keys-per-call 16
+"""
+import argparse
+import os
+import pathlib
+import statistics
+import tempfile
+import time
+from typing import (
+    Any,
+    Callable,
+    List,
+    Sequence,
+)
+
+from veda.db.atomic import AtomicDB
+from veda.db.manager import DBClient, DBManager
+
+
+class RoundTripCounter:
+    def __init__(self, sendall: Callable[..., Any]) -> None:
+        self._sendall = sendall
+        self.count = 0
+
+    def __call__(self, data: bytes) -> None:
+        self.count += 1
+        self._sendall(data)
+
+
+def run_calls(client: DBClient,
+              calls: Sequence[Sequence[bytes]],
+              read_call: Callable[[DBClient, Sequence[bytes]], None]) -> List[float]:
+    latencies = []
+    for keys in calls:
+        start = time.perf_counter()
+        read_call(client, keys)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def read_one_by_one(client: DBClient, keys: Sequence[bytes]) -> None:
+    for key in keys:
+        client[key]
+
+
+def read_multi_get(client: DBClient, keys: Sequence[bytes]) -> None:
+    client.multi_get(keys)
+
+
+def report(name: str, latencies: List[float], round_trips: int) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[int(len(ordered) * 0.99) - 1]
+    print(
+        f"{name:<12} round trips/call: {round_trips / len(latencies):6.1f}  "
+        f"mean: {statistics.mean(latencies) * 1e6:8.1f}us  "
+        f"p99: {p99 * 1e6:8.1f}us"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--keys-per-call', type=int, default=16)
+    parser.add_argument('--value-size', type=int, default=532)
+    parser.add_argument('--large-keys', type=int, default=20000)
+    args = parser.parse_args()
+
+    db = AtomicDB()
+    calls = []
+    for _ in range(args.calls):
+        keys = tuple(os.urandom(32) for _ in range(args.keys_per_call))
+        for key in keys:
+            db[key] = os.urandom(args.value_size)
+        calls.append(keys)
+    large_keys = tuple(os.urandom(32) for _ in range(args.large_keys))
+    for key in large_keys:
+        db[key] = os.urandom(args.value_size)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ipc_path = pathlib.Path(tmp_dir) / 'db.ipc'
+        manager = DBManager(db)
+        with manager.run(ipc_path):
+            client = DBClient.connect(ipc_path)
+            counter = RoundTripCounter(client._socket.sendall)
+            client._socket.sendall = counter
+
+            for name, read_call in (('GET', read_one_by_one), ('MULTI_GET', read_multi_get)):
+                counter.count = 0
+                latencies = run_calls(client, calls, read_call)
+                report(name, latencies, counter.count)
+
+            counter.count = 0
+            start = time.perf_counter()
+            values = client.multi_get(large_keys)
+            duration = time.perf_counter() - start
+            assert values == tuple(db[key] for key in large_keys), "Wrong values"
+            print(
+                f"{'large':<12} {len(large_keys)} keys in {counter.count} requests: "
+                f"{duration * 1000:8.1f}ms"
+            )
+
+            client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Compare throughput and tail latency of the thread-per-connection DBManager with the
+selector based SelectorDBManager, for a growing number of concurrent clients.
+
+The server and the clients run in separate processes. Every client is a connection
+doing one GET at a time, and the clients are spread over ``--client-processes``
+asyncio event loops.
+
+    python scripts/benchmarks/db_server_modes.py --clients 8 64 256 --workers 8
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import pathlib
+import random
+import statistics
+import tempfile
+import time
+from typing import (
+    List,
+    Sequence,
+    Tuple,
+)
+
+from veda.db.backends.level import LevelDB
+from veda.db.manager import AsyncDBClient, DBManager, SelectorDBManager
+
+
+def populate(db_path: pathlib.Path, key_count: int, value_size: int) -> Tuple[bytes, ...]:
+    # The database is closed when it goes out of scope, so the server can open it
+    db = LevelDB(db_path)
+    keys = tuple(os.urandom(32) for _ in range(key_count))
+    with db.atomic_batch() as batch:
+        for key in keys:
+            batch[key] = os.urandom(value_size)
+    return keys
+
+
+def serve(db_path: pathlib.Path,
+          ipc_path: pathlib.Path,
+          workers: int,
+          started: multiprocessing.Event,
+          stop: multiprocessing.Event) -> None:
+    db = LevelDB(db_path)
+    if workers:
+        manager: DBManager = SelectorDBManager(db, workers)
+    else:
+        manager = DBManager(db)
+
+    with manager.run(ipc_path):
+        started.set()
+        stop.wait()
+
+
+async def run_client(ipc_path: pathlib.Path,
+                     keys: Sequence[bytes],
+                     requests: int,
+                     start_at: float) -> List[float]:
+    client = await AsyncDBClient.connect(ipc_path)
+    await asyncio.sleep(max(0, start_at - time.time()))
+
+    latencies = []
+    for _ in range(requests):
+        key = random.choice(keys)
+        start = time.perf_counter()
+        await client.coro_get(key)
+        latencies.append(time.perf_counter() - start)
+
+    await client.close()
+    return latencies
+
+
+def run_clients(ipc_path: pathlib.Path,
+                keys: Sequence[bytes],
+                client_count: int,
+                requests: int,
+                start_at: float,
+                results: 'multiprocessing.Queue[Tuple[float, List[float]]]') -> None:
+    async def main() -> Tuple[float, List[float]]:
+        all_latencies = await asyncio.gather(*(
+            run_client(ipc_path, keys, requests, start_at) for _ in range(client_count)
+        ))
+        return time.time(), [latency for latencies in all_latencies for latency in latencies]
+
+    results.put(asyncio.run(main()))
+
+
+def measure(ipc_path: pathlib.Path,
+            keys: Sequence[bytes],
+            clients: int,
+            requests: int,
+            client_processes: int) -> Tuple[float, List[float]]:
+    results: 'multiprocessing.Queue[Tuple[float, List[float]]]' = multiprocessing.Queue()
+    process_count = min(client_processes, clients)
+    # Give every process time to open its connections before the clock starts
+    start_at = time.time() + 1 + clients / 100
+
+    processes = []
+    for index in range(process_count):
+        client_count = clients // process_count + (index < clients % process_count)
+        process = multiprocessing.Process(
+            target=run_clients,
+            args=(ipc_path, keys, client_count, requests, start_at, results),
+        )
+        process.start()
+        processes.append(process)
+
+    finished_at = 0.0
+    latencies: List[float] = []
+    for _ in processes:
+        process_finished_at, process_latencies = results.get()
+        finished_at = max(finished_at, process_finished_at)
+        latencies.extend(process_latencies)
+
+    for process in processes:
+        process.join()
+
+    return len(latencies) / (finished_at - start_at), latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, nargs='+', default=[8, 64, 256])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=500, help="GETs per client")
+    parser.add_argument('--client-processes', type=int, default=4)
+    parser.add_argument('--keys', type=int, default=10000)
+    parser.add_argument('--value-size', type=int, default=532)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = pathlib.Path(tmp_dir) / 'db'
+        keys = populate(db_path, args.keys, args.value_size)
+
+        modes = (('threads', 0), (f'selector/{args.workers}', args.workers))
+        for mode_name, workers in modes:
+            ipc_path = pathlib.Path(tmp_dir) / f'db-{workers}.ipc'
+            started = multiprocessing.Event()
+            stop = multiprocessing.Event()
+            server = multiprocessing.Process(
+                target=serve,
+                args=(db_path, ipc_path, workers, started, stop),
+            )
+            server.start()
+            started.wait()
+
+            for clients in args.clients:
+                throughput, latencies = measure(
+                    ipc_path, keys, clients, args.requests, args.client_processes
+                )
+                ordered = sorted(latencies)
+                p99 = ordered[int(len(ordered) * 0.99) - 1]
+                print(
+                    f"{mode_name:<12} clients: {clients:>4}  "
+                    f"{throughput:10,.0f} req/s  "
+                    f"p50: {statistics.median(latencies) * 1e6:8.1f}us  "
+                    f"p99: {p99 * 1e6:8.1f}us"
+                )
+
+            stop.set()
+            server.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure the jump destination checks of a message call to a large contract, with the
+push data analysis of the code cached by the code hash of the account, and with an
+empty cache like on the first call.
+
+Every call creates a CodeStream, as a new computation does, and checks ``--jumps``
+JUMPDEST positions spread over the code.
+
+    python scripts/benchmarks/jumpdest_analysis.py --code-size 24576 --jumps 50
+"""
+import argparse
+import random
+import time
+from typing import (
+    Sequence,
+)
+
+from eth_hash.auto import keccak
+from eth_typing import Hash32
+
+from veda.vm import code_stream
+from veda.vm.code_stream import CodeStream
+from veda.vm.opcode_values import (
+    JUMPDEST,
+    PUSH1,
+    PUSH32,
+)
+
+
+def make_code(rnd: random.Random, size: int) -> bytes:
+    code = bytearray()
+    while len(code) < size:
+        if rnd.random() < 0.3:
+            push = rnd.randint(PUSH1, PUSH32)
+            code.append(push)
+            code.extend(rnd.getrandbits(8) for _ in range(push - PUSH1 + 1))
+        elif rnd.random() < 0.1:
+            code.append(JUMPDEST)
+        else:
+            code.append(rnd.randint(0x01, 0x5a))
+    return bytes(code[:size])
+
+
+def measure(
+    code: bytes,
+    code_hash: Hash32,
+    jump_destinations: Sequence[int],
+    calls: int,
+    cached: bool,
+) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        if not cached:
+            code_stream._push_data_cache.clear()
+        stream = CodeStream(code, code_hash)
+        for position in jump_destinations:
+            stream.is_valid_opcode(position)
+    return (time.perf_counter() - start) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--code-size', type=int, default=24576)
+    parser.add_argument('--jumps', type=int, default=50)
+    parser.add_argument('--calls', type=int, default=1000)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    code = make_code(rnd, args.code_size)
+    code_hash = keccak(code)
+    jumpdests = [position for position, opcode in enumerate(code) if opcode == JUMPDEST]
+    jump_destinations = [rnd.choice(jumpdests) for _ in range(args.jumps)]
+
+    uncached_time = measure(code, code_hash, jump_destinations, args.calls, cached=False)
+    cached_time = measure(code, code_hash, jump_destinations, args.calls, cached=True)
+    print(
+        f"{args.code_size} byte code, {args.jumps} jumps per call  "
+        f"analysed per call {uncached_time * 1e6:8.1f}us  "
+        f"cached {cached_time * 1e6:6.1f}us"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Compare eth_getLogs through the log index and through the bloom bits with the scan
+of every block in the range, which decodes all receipts of the range.
+
+Imports a synthetic chain in which every transaction calls one of some contracts
+that emit a LOG2 with a fixed first topic and the call data as second topic, then
+runs queries by address, by rare topic and by both over the whole chain.
+
+    python scripts/benchmarks/log_index.py --blocks 2000
+"""
+import argparse
+import asyncio
+import logging
+import pathlib
+import random
+import tempfile
+import time
+from typing import (
+    Any,
+    Dict,
+    List,
+    Tuple,
+)
+
+from eth_typing import Address
+
+from veda.db.backends.level import LevelDB
+from veda.db.bloom_bits import find_bloom_candidates
+from veda.rpc._utils.validation import validate_filter_params
+from veda.rpc.chain import VedaAsyncChain
+from veda.rpc.modules.eth import Eth, normalize_log_filter
+from veda.vm.forks import VedaVM
+from veda.vm.forks.veda.transactions import VedaTransaction
+
+from state_root_per_block import (
+    GAS,
+    deploy_code,
+    mine,
+)
+
+
+# LOG2 with topics 0xaa and the first word of the call data, and no data
+LOGGER_RUNTIME = bytes.fromhex('600035' '60aa' '6000' '6000' 'a2' '00')
+
+
+class NoEventBus:
+    def subscribe(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+
+def import_chain(db: LevelDB,
+                 blocks: int,
+                 transactions_per_block: int,
+                 contract_count: int,
+                 topic_count: int) -> Tuple[VedaAsyncChain, Tuple[Address, ...]]:
+    chain_class = VedaAsyncChain.configure(vm_configuration=((0, VedaVM),), chain_id=1)
+    chain_class.from_genesis(db, {'difficulty': 1, 'gas_limit': 10485760, 'timestamp': 1})
+    chain = chain_class(db)
+
+    deploys = tuple(
+        VedaTransaction(
+            nonce=0,
+            veda_sender=(index + 1).to_bytes(20, 'big'),
+            gas=GAS,
+            to=b'',
+            data=deploy_code(LOGGER_RUNTIME),
+            veda_txhash=(index + 1).to_bytes(32, 'big'),
+        )
+        for index in range(contract_count)
+    )
+    _, _, computations = chain.apply_transactions(deploys)
+    mine(chain, 1)
+    contracts = tuple(computation.msg.storage_address for computation in computations)
+
+    rnd = random.Random(0)
+    for block_number in range(2, blocks + 1):
+        chain.apply_transactions(tuple(
+            VedaTransaction(
+                nonce=0,
+                veda_sender=(block_number * 1000 + index).to_bytes(20, 'big'),
+                gas=GAS,
+                to=rnd.choice(contracts),
+                data=rnd.randint(1, topic_count).to_bytes(32, 'big'),
+                veda_txhash=(block_number * 1000 + index).to_bytes(32, 'big'),
+            )
+            for index in range(transactions_per_block)
+        ))
+        mine(chain, block_number)
+    return chain, contracts
+
+
+async def measure(eth: Eth,
+                  from_block: int,
+                  to_block: int,
+                  filter_params: Dict[str, Any]) -> Tuple[float, float, float, int]:
+    query = dict(filter_params, fromBlock=hex(from_block), toBlock=hex(to_block))
+    addresses, topics = normalize_log_filter(validate_filter_params(dict(query)))
+
+    start = time.perf_counter()
+    scanned: List[Dict[str, Any]] = await eth._scan_logs(
+        range(from_block, to_block + 1),
+        addresses,
+        topics,
+    )
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    candidates = find_bloom_candidates(
+        eth.chain.chaindb.db,
+        from_block,
+        to_block,
+        addresses,
+        topics,
+    )
+    bloom_filtered = await eth._scan_logs(candidates, addresses, topics)
+    bloom_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = await eth.getLogs(query)
+    index_time = time.perf_counter() - start
+
+    assert indexed == bloom_filtered == scanned, "Index and scan returned different logs"
+    return scan_time, bloom_time, index_time, len(indexed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--blocks', type=int, default=2000)
+    parser.add_argument('--transactions-per-block', type=int, default=5)
+    parser.add_argument('--contracts', type=int, default=50)
+    parser.add_argument('--topics', type=int, default=200)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = LevelDB(pathlib.Path(tmp_dir))
+        start = time.perf_counter()
+        chain, contracts = import_chain(
+            db,
+            args.blocks,
+            args.transactions_per_block,
+            args.contracts,
+            args.topics,
+        )
+        print(f"imported {args.blocks} blocks in {time.perf_counter() - start:.1f}s")
+
+        eth = Eth(chain, NoEventBus(), None)
+        head = chain.get_canonical_head().block_number
+        from_block = head - args.blocks + 1
+        rare_topic = '0x' + (7).to_bytes(32, 'big').hex()
+        queries = (
+            ('address', {'address': '0x' + contracts[0].hex()}),
+            ('topic', {'topics': [None, rare_topic]}),
+            ('address+topic', {'address': '0x' + contracts[0].hex(), 'topics': [None, rare_topic]}),
+        )
+        for name, filter_params in queries:
+            scan_time, bloom_time, index_time, count = asyncio.run(
+                measure(eth, from_block, head, filter_params)
+            )
+            print(
+                f"{name:<14} {count:6d} logs  scan {scan_time * 1000:9.1f}ms  "
+                f"bloom bits {bloom_time * 1000:8.1f}ms  index {index_time * 1000:8.1f}ms"
+            )
+
+
+if __name__ == '__main__':
+    main()
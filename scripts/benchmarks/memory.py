@@ -0,0 +1,160 @@
+"""
+Microbenchmarks of the memory of computations.
+
+Times the memory operations the opcodes use, on their own, then contracts that
+spend their time in memory: a hashing loop, the ABI encoding of an array computed
+word by word, the copy of large call data to memory and back out, and the
+forwarding of that call data to another contract and of its return data back.
+
+    python scripts/benchmarks/memory.py --words 100 1000 10000
+"""
+import argparse
+import logging
+import time
+from typing import (
+    Callable,
+    Type,
+)
+
+from eth_hash.auto import keccak
+
+from veda.abc import ComputationAPI, StateAPI
+from veda.db.atomic import AtomicDB
+from veda.rpc.chain import VedaAsyncChain
+from veda.vm.forks import VedaVM
+from veda.vm.memory import Memory
+from veda.vm.message import Message
+
+CONTRACT = b'\xcc' * 20
+ECHO = b'\xee' * 20
+SENDER = b'\x11' * 20
+GAS = 100000000
+
+# PUSH1 0 CALLDATALOAD
+# loop: JUMPDEST DUP1 PUSH1 0 MSTORE PUSH1 64 PUSH1 0 SHA3 PUSH1 32 MSTORE
+# PUSH1 1 SWAP1 SUB DUP1 PUSH1 loop JUMPI
+# PUSH1 32 PUSH1 32 RETURN
+HASH_LOOP_CODE = bytes.fromhex(
+    '600035'
+    '5b8060005260406000206020526001900380600357'
+    '60206020f3'
+)
+# PUSH1 32 PUSH1 0 MSTORE PUSH1 0 CALLDATALOAD DUP1 PUSH1 32 MSTORE PUSH1 0
+# loop: JUMPDEST DUP1 DUP1 MUL DUP2 PUSH1 5 SHL PUSH1 64 ADD MSTORE
+# PUSH1 1 ADD DUP2 DUP2 LT PUSH1 loop JUMPI
+# POP PUSH1 5 SHL PUSH1 64 ADD PUSH1 0 RETURN
+ABI_ENCODE_CODE = bytes.fromhex(
+    '6020600052600035806020526000'
+    '5b8080028160051b60400152600101818110600e57'
+    '5060051b6040016000f3'
+)
+# CALLDATASIZE PUSH1 0 PUSH1 0 CALLDATACOPY CALLDATASIZE PUSH1 0 RETURN
+ECHO_CODE = bytes.fromhex('366000600037' '366000f3')
+# CALLDATASIZE PUSH1 0 PUSH1 0 CALLDATACOPY
+# PUSH1 0 PUSH1 0 CALLDATASIZE PUSH1 0 PUSH20 echo GAS STATICCALL POP
+# RETURNDATASIZE PUSH1 0 PUSH1 0 RETURNDATACOPY RETURNDATASIZE PUSH1 0 RETURN
+FORWARD_CODE = (
+    bytes.fromhex('366000600037' '6000600036600073')
+    + ECHO
+    + bytes.fromhex('5afa50' '3d600060003e' '3d6000f3')
+)
+
+
+def run(
+    computation_class: Type[ComputationAPI],
+    state: StateAPI,
+    code: bytes,
+    data: bytes,
+) -> ComputationAPI:
+    message = Message(
+        gas=GAS,
+        to=CONTRACT,
+        sender=SENDER,
+        data=data,
+        code=code,
+        code_hash=keccak(code),
+    )
+    transaction_context = state.get_transaction_context_class()(origin=SENDER)
+    computation = computation_class.apply_message(state, message, transaction_context)
+    computation.raise_if_error()
+    return computation
+
+
+def measure(function: Callable[[], object], runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return (time.perf_counter() - start) / runs
+
+
+def grow_by_words(words: int) -> None:
+    memory = Memory()
+    word = b'\x01' * 32
+    for position in range(0, words * 32, 32):
+        memory.extend(position, 32)
+        memory.write(position, 32, word)
+
+
+def read_words(memory: Memory, words: int) -> None:
+    for position in range(0, words * 32, 32):
+        memory.read_bytes(position, 32)
+
+
+def write_block(memory: Memory, data: bytes) -> None:
+    memory.write(0, len(data), data)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    chain_class = VedaAsyncChain.configure(vm_configuration=((0, VedaVM),), chain_id=1)
+    chain = chain_class.from_genesis(
+        AtomicDB(),
+        {'difficulty': 1, 'gas_limit': 10485760, 'timestamp': 1},
+    )
+    state = chain.get_vm().state
+    state.set_code(ECHO, ECHO_CODE)
+    computation_class = state.computation_class
+
+    for words in args.words:
+        data = bytes(range(256)) * (words // 8) + bytes(words % 8 * 32)
+        count = words.to_bytes(32, 'big')
+        full_memory = Memory()
+        full_memory.extend(0, words * 32)
+
+        assert run(computation_class, state, ECHO_CODE, data).output == data
+        assert run(computation_class, state, FORWARD_CODE, data).output == data
+        encoded = run(computation_class, state, ABI_ENCODE_CODE, count).output
+        assert len(encoded) == 64 + words * 32, "Wrong encoding"
+
+        timings = (
+            ('grow by words', measure(lambda: grow_by_words(words), args.runs)),
+            ('read words', measure(lambda: read_words(full_memory, words), args.runs)),
+            ('write block', measure(lambda: write_block(full_memory, data), args.runs)),
+            ('hash loop', measure(
+                lambda: run(computation_class, state, HASH_LOOP_CODE, count),
+                args.runs,
+            )),
+            ('abi encode', measure(
+                lambda: run(computation_class, state, ABI_ENCODE_CODE, count),
+                args.runs,
+            )),
+            ('call data copy', measure(
+                lambda: run(computation_class, state, ECHO_CODE, data),
+                args.runs,
+            )),
+            ('forward call', measure(
+                lambda: run(computation_class, state, FORWARD_CODE, data),
+                args.runs,
+            )),
+        )
+        for name, timing in timings:
+            print(f"{words:6d} words  {name:<15} {timing * 1e6:10.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare building the trie of a block's transactions or receipts by setting the index
+keys one at a time in a HexaryTrie with the streaming ordered trie builder.
+
+Before timing, checks that both give the same root hash and nodes for every item
+count up to ``--check-up-to`` and for random items of random sizes, including items
+short enough to be inlined in their branch.
+
+    python scripts/benchmarks/ordered_trie.py --items 100 1000 10000
+"""
+import argparse
+import os
+import random
+import time
+from typing import (
+    Tuple,
+)
+
+from veda.db.trie import (
+    _make_ordered_trie_root_and_nodes,
+    _make_trie_root_and_nodes_per_key,
+)
+
+
+def make_items(rnd: random.Random, count: int, max_size: int) -> Tuple[bytes, ...]:
+    return tuple(os.urandom(rnd.randint(1, max_size)) for _ in range(count))
+
+
+def check_equivalence(rnd: random.Random, check_up_to: int) -> None:
+    for count in range(check_up_to + 1):
+        for max_size in (1, 40, 200):
+            items = make_items(rnd, count, max_size)
+            assert _make_ordered_trie_root_and_nodes(items) == (
+                _make_trie_root_and_nodes_per_key(items)
+            ), f"Different trie for {count} items of up to {max_size} bytes"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--item-size', type=int, default=150)
+    parser.add_argument('--check-up-to', type=int, default=150)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    start = time.perf_counter()
+    check_equivalence(rnd, args.check_up_to)
+    print(
+        f"same tries for 0 to {args.check_up_to} items "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+    for count in args.items:
+        items = tuple(os.urandom(args.item_size) for _ in range(count))
+
+        start = time.perf_counter()
+        expected = _make_trie_root_and_nodes_per_key(items)
+        per_key_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        streamed = _make_ordered_trie_root_and_nodes(items)
+        streaming_time = time.perf_counter() - start
+
+        assert streamed == expected, f"Different trie for {count} items"
+        print(
+            f"{count:6d} items  per key {per_key_time * 1000:9.1f}ms  "
+            f"streaming {streaming_time * 1000:8.1f}ms  {per_key_time / streaming_time:5.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
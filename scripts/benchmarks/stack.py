@@ -0,0 +1,146 @@
+"""
+Compare the validating Stack, which keeps the type of every item, with the IntStack
+of ints only.
+
+Times the stack operations the opcodes use, on their own, then a contract looping
+over ``n`` from its call data, run by the interpreter loop and as basic blocks,
+after checking that both stacks give the same output and gas.
+
+    python scripts/benchmarks/stack.py --iterations 10000
+"""
+import argparse
+import logging
+import time
+from typing import (
+    Callable,
+    Type,
+)
+
+from eth_hash.auto import keccak
+
+from veda.abc import ComputationAPI, StackAPI, StateAPI
+from veda.db.atomic import AtomicDB
+from veda.rpc.chain import VedaAsyncChain
+from veda.vm.forks import VedaVM
+from veda.vm.message import Message
+from veda.vm.stack import IntStack, Stack
+
+# PUSH1 0 CALLDATALOAD PUSH1 0
+# loop: JUMPDEST PUSH1 31 MUL DUP2 ADD SWAP1 PUSH1 1 SWAP1 SUB SWAP1 DUP2 PUSH1 loop JUMPI
+# PUSH1 0 MSTORE PUSH1 32 PUSH1 0 RETURN
+LOOP_CODE = bytes.fromhex(
+    '6000356000'
+    '5b601f02810190600190039081600557'
+    '600052' '60206000f3'
+)
+CONTRACT = b'\xcc' * 20
+SENDER = b'\x11' * 20
+GAS = 100000000
+WORD = b'\x01' * 32
+
+
+def run(
+    computation_class: Type[ComputationAPI],
+    state: StateAPI,
+    iterations: int,
+) -> ComputationAPI:
+    message = Message(
+        gas=GAS,
+        to=CONTRACT,
+        sender=SENDER,
+        data=iterations.to_bytes(32, 'big'),
+        code=LOOP_CODE,
+        code_hash=keccak(LOOP_CODE),
+    )
+    transaction_context = state.get_transaction_context_class()(origin=SENDER)
+    computation = computation_class.apply_computation(state, message, transaction_context)
+    computation.raise_if_error()
+    return computation
+
+
+def measure(function: Callable[[], object], runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return (time.perf_counter() - start) / runs
+
+
+def push_pop_ints(stack_class: Type[StackAPI], count: int) -> None:
+    stack = stack_class()
+    for value in range(count):
+        stack.push_int(value)
+        stack.push_int(value)
+        stack.pop_ints(2)
+
+
+def push_bytes_pop_ints(stack_class: Type[StackAPI], count: int) -> None:
+    stack = stack_class()
+    for _ in range(count):
+        stack.push_bytes(WORD)
+        stack.pop1_int()
+
+
+def dup_swap(stack_class: Type[StackAPI], count: int) -> None:
+    stack = stack_class()
+    stack.push_int(1)
+    stack.push_int(2)
+    for _ in range(count):
+        stack.dup(2)
+        stack.swap(1)
+        stack.pop1_any()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    chain_class = VedaAsyncChain.configure(vm_configuration=((0, VedaVM),), chain_id=1)
+    chain = chain_class.from_genesis(
+        AtomicDB(),
+        {'difficulty': 1, 'gas_limit': 10485760, 'timestamp': 1},
+    )
+    state = chain.get_vm().state
+    computation_class = state.computation_class
+
+    for name, operation in (
+        ('push and pop ints', push_pop_ints),
+        ('push bytes, pop int', push_bytes_pop_ints),
+        ('dup and swap', dup_swap),
+    ):
+        stack_time = measure(lambda: operation(Stack, args.iterations), args.runs)
+        int_stack_time = measure(lambda: operation(IntStack, args.iterations), args.runs)
+        print(
+            f"{name:<20} Stack {stack_time * 1000:8.2f}ms  "
+            f"IntStack {int_stack_time * 1000:8.2f}ms  {stack_time / int_stack_time:4.2f}x"
+        )
+
+    for name, use_basic_blocks in (('interpreter', False), ('basic blocks', True)):
+        stack_class = computation_class.configure(
+            use_basic_blocks=use_basic_blocks,
+            stack_class=Stack,
+        )
+        int_stack_class = computation_class.configure(
+            use_basic_blocks=use_basic_blocks,
+            stack_class=IntStack,
+        )
+        expected = run(stack_class, state, args.iterations)
+        result = run(int_stack_class, state, args.iterations)
+        assert result.output == expected.output, "Different output"
+        assert result.get_gas_remaining() == expected.get_gas_remaining(), "Different gas"
+
+        stack_time = measure(lambda: run(stack_class, state, args.iterations), args.runs)
+        int_stack_time = measure(
+            lambda: run(int_stack_class, state, args.iterations),
+            args.runs,
+        )
+        print(
+            f"{name:<20} Stack {stack_time * 1000:8.2f}ms  "
+            f"IntStack {int_stack_time * 1000:8.2f}ms  {stack_time / int_stack_time:4.2f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
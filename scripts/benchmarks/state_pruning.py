@@ -0,0 +1,133 @@
+"""
+Compare the database size and state read latency of an archive database, which keeps
+the state of every block, with one that only keeps the state of the last blocks.
+
+Both import the same synthetic chain straight through AccountDB: every block changes
+the balance of some accounts and a storage slot of some contracts. Read latency is
+measured for random account and storage reads through the tries at the head state,
+with the process caches disabled.
+
+    python scripts/benchmarks/state_pruning.py --blocks 2000 --keep 128
+"""
+import argparse
+import os
+import pathlib
+import random
+import statistics
+import tempfile
+import time
+from typing import (
+    List,
+    Optional,
+    Tuple,
+)
+
+from eth_hash.auto import keccak
+from eth_typing import Hash32
+import rlp
+from trie import HexaryTrie
+
+from veda._utils.padding import pad32
+from veda.constants import BLANK_ROOT_HASH
+from veda.db.account import AccountDB
+from veda.db.backends.level import LevelDB
+from veda.db.cache import configure_trie_node_cache
+from veda.db.pruning import StatePruner
+from veda.db.state_cache import configure_state_cache
+from veda.rlp.accounts import Account
+
+
+def import_chain(db: LevelDB,
+                 blocks: int,
+                 changes_per_block: int,
+                 accounts: int,
+                 keep: Optional[int]) -> Tuple[Hash32, float]:
+    pruner = None if keep is None else StatePruner(db, keep)
+    rnd = random.Random(0)
+    addresses = tuple(index.to_bytes(20, 'big') for index in range(1, accounts + 1))
+
+    state_root = BLANK_ROOT_HASH
+    start = time.perf_counter()
+    for block_number in range(1, blocks + 1):
+        account_db = AccountDB(db, state_root)
+        for _ in range(changes_per_block):
+            address = rnd.choice(addresses)
+            if rnd.random() < 0.5:
+                account_db.set_balance(address, rnd.randint(1, 10 ** 18))
+            else:
+                account_db.set_storage(address, rnd.randint(0, 63), rnd.randint(1, 10 ** 18))
+        account_db.persist()
+        state_root = account_db.state_root
+        if pruner is not None:
+            pruner.add_block(block_number, state_root)
+    elapsed = time.perf_counter() - start
+
+    db.db.compact_range()
+    return state_root, elapsed
+
+
+def measure_reads(db: LevelDB,
+                  state_root: Hash32,
+                  accounts: int,
+                  reads: int) -> List[float]:
+    rnd = random.Random(1)
+    account_trie = HexaryTrie(db, state_root)
+    latencies = []
+    for _ in range(reads):
+        address = rnd.randint(1, accounts).to_bytes(20, 'big')
+        slot = rnd.randint(0, 63)
+        start = time.perf_counter()
+        encoded = account_trie[keccak(address)]
+        if encoded:
+            storage_root = rlp.decode(encoded, sedes=Account).storage_root
+            HexaryTrie(db, storage_root)[keccak(pad32(slot.to_bytes(32, 'big')))]
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def directory_size(path: pathlib.Path) -> int:
+    return sum(entry.stat().st_size for entry in path.iterdir() if entry.is_file())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--blocks', type=int, default=2000)
+    parser.add_argument('--changes-per-block', type=int, default=200)
+    parser.add_argument('--accounts', type=int, default=5000)
+    parser.add_argument('--keep', type=int, default=128)
+    parser.add_argument('--reads', type=int, default=20000)
+    args = parser.parse_args()
+
+    # Measure the database, not the process caches
+    configure_trie_node_cache(0)
+    configure_state_cache(0)
+
+    head_roots = []
+    for name, keep in (('archive', None), (f'keep {args.keep}', args.keep)):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = pathlib.Path(tmp_dir) / 'db'
+            os.makedirs(db_path)
+            db = LevelDB(db_path)
+            state_root, elapsed = import_chain(
+                db,
+                args.blocks,
+                args.changes_per_block,
+                args.accounts,
+                keep,
+            )
+            head_roots.append(state_root)
+            size = directory_size(db_path)
+            latencies = sorted(measure_reads(db, state_root, args.accounts, args.reads))
+
+        print(
+            f"{name:<10} {args.blocks} blocks  import {elapsed:7.1f}s  "
+            f"size {size / 1024 / 1024:8.1f}MB  "
+            f"read mean {statistics.mean(latencies) * 1e6:6.1f}us  "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:6.1f}us"
+        )
+
+    assert len(set(head_roots)) == 1, "Head state roots differ"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Compare importing a block when the state root is computed after every transaction,
+with computing it once when the block is persisted.
+
+Every transaction calls a counter contract, which increments a storage slot keyed by
+the sender, so each transaction dirties a new account store.
+
+    python scripts/benchmarks/state_root_per_block.py --transactions 1000
+"""
+import argparse
+import time
+from typing import (
+    Tuple,
+    Type,
+)
+
+from eth_typing import Address
+
+from veda.abc import VirtualMachineAPI
+from veda.db.atomic import AtomicDB
+from veda.rpc.chain import VedaAsyncChain
+from veda.vm.forks import VedaVM
+from veda.vm.forks.veda.transactions import VedaTransaction
+
+
+# CALLER SLOAD PUSH1 1 ADD CALLER SSTORE STOP
+COUNTER_RUNTIME = bytes.fromhex('33546001013355' + '00')
+
+GAS = 1000000
+
+
+def deploy_code(runtime: bytes) -> bytes:
+    # CODECOPY the runtime that follows this 12 byte prefix, and RETURN it
+    return bytes((
+        0x60, len(runtime), 0x60, 0x0c, 0x60, 0x00, 0x39,
+        0x60, len(runtime), 0x60, 0x00, 0xf3,
+    )) + runtime
+
+
+def make_chain(vm_class: Type[VirtualMachineAPI]) -> Tuple[VedaAsyncChain, Address]:
+    chain_class = VedaAsyncChain.configure(vm_configuration=((0, vm_class),), chain_id=1)
+    base_db = AtomicDB()
+    chain_class.from_genesis(base_db, {'difficulty': 1, 'gas_limit': 10485760, 'timestamp': 1})
+    chain = chain_class(base_db)
+
+    deploy = VedaTransaction(
+        nonce=0,
+        veda_sender=b'\xff' * 20,
+        gas=GAS,
+        to=b'',
+        data=deploy_code(COUNTER_RUNTIME),
+        veda_txhash=b'\xff' * 32,
+    )
+    _, _, (computation,) = chain.apply_transactions((deploy,))
+    computation.raise_if_error()
+    mine(chain, 1)
+    return chain, computation.msg.storage_address
+
+
+def mine(chain: VedaAsyncChain, block_number: int) -> None:
+    chain.mine_block(
+        mix_hash=b'\x00' * 32,
+        timestamp=block_number + 1,
+        veda_block_hash=block_number.to_bytes(32, 'big'),
+        veda_block_number=block_number,
+        veda_timestamp=block_number,
+    )
+
+
+def measure(vm_class: Type[VirtualMachineAPI], transaction_count: int) -> Tuple[float, bytes]:
+    chain, counter = make_chain(vm_class)
+    transactions = tuple(
+        VedaTransaction(
+            nonce=0,
+            veda_sender=index.to_bytes(20, 'big'),
+            gas=GAS,
+            to=counter,
+            data=b'',
+            veda_txhash=index.to_bytes(32, 'big'),
+        )
+        for index in range(1, transaction_count + 1)
+    )
+
+    start = time.perf_counter()
+    block, receipts, _ = chain.apply_transactions(transactions)
+    elapsed = time.perf_counter() - start
+
+    assert len(receipts) == transaction_count
+    return elapsed, block.header.state_root
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--transactions', type=int, default=1000)
+    args = parser.parse_args()
+
+    results = []
+    for name, intermediate_state_roots in (('per tx', True), ('per block', False)):
+        vm_class = VedaVM.configure(intermediate_state_roots=intermediate_state_roots)
+        elapsed, state_root = measure(vm_class, args.transactions)
+        results.append(state_root)
+        print(
+            f"{name:<10} {args.transactions} txs  {elapsed * 1000:9.1f}ms  "
+            f"{args.transactions / elapsed:9,.0f} tx/s  state root: {state_root.hex()}"
+        )
+
+    assert len(set(results)) == 1, "State roots differ"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Compare running token transfers with the interpreter loop, as basic blocks, and as
+basic blocks with superinstructions.
+
+Deploys the ERC20 token of scripts/tests/internal_rpc_test/vbtc.py, prints the
+opcode pairs that its transfers, approvals and balance reads run most, then checks
+that every engine gives the same results before timing ``--calls`` calls.
+
+    python scripts/benchmarks/superinstructions.py --calls 300
+"""
+import argparse
+import logging
+import pathlib
+import re
+import time
+from typing import (
+    List,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from eth_abi import encode
+from eth_hash.auto import keccak
+from eth_typing import Address
+
+from veda.abc import ComputationAPI, StateAPI
+from veda.db.atomic import AtomicDB
+from veda.rpc.chain import VedaAsyncChain
+from veda.tools.opcode_profiler import OpcodePairProfiler
+from veda.vm.forks import VedaVM
+from veda.vm.forks.veda.transactions import VedaTransaction
+from veda.vm.message import Message
+
+TOKEN_SOURCE = pathlib.Path(__file__).parents[1] / 'tests' / 'internal_rpc_test' / 'vbtc.py'
+OWNER = b'\x11' * 20
+GAS = 1000000
+
+
+def selector(signature: str) -> bytes:
+    return keccak(signature.encode())[:4]
+
+
+def deploy_token(state_chain: VedaAsyncChain) -> Address:
+    bytecode = bytes.fromhex(re.search(r"bytecode = '([0-9a-f]+)'", TOKEN_SOURCE.read_text())[1])
+    arguments = encode(
+        ['string', 'string', 'uint256', 'address'],
+        ['Veda Token', 'VT', 10 ** 27, OWNER],
+    )
+    deploy = VedaTransaction(
+        nonce=0,
+        veda_sender=OWNER,
+        gas=10000000,
+        to=b'',
+        data=bytecode + arguments,
+        veda_txhash=b'\x11' * 32,
+    )
+    _, _, (computation,) = state_chain.apply_transactions((deploy,))
+    computation.raise_if_error()
+    return computation.msg.storage_address
+
+
+def make_calls(count: int) -> List[Tuple[Address, bytes]]:
+    calls = []
+    for index in range(count):
+        account = (index % 50 + 1).to_bytes(20, 'big')
+        kind = index % 4
+        if kind == 0:
+            data = selector('transfer(address,uint256)') + encode(
+                ['address', 'uint256'], [account, index + 1]
+            )
+            calls.append((OWNER, data))
+        elif kind == 1:
+            data = selector('approve(address,uint256)') + encode(
+                ['address', 'uint256'], [account, 10 ** 20]
+            )
+            calls.append((OWNER, data))
+        elif kind == 2:
+            data = selector('transferFrom(address,address,uint256)') + encode(
+                ['address', 'address', 'uint256'], [OWNER, account, 1]
+            )
+            calls.append((account, data))
+        else:
+            data = selector('balanceOf(address)') + encode(['address'], [account])
+            calls.append((account, data))
+    return calls
+
+
+def run_calls(
+    computation_class: Type[ComputationAPI],
+    state: StateAPI,
+    token: Address,
+    calls: Sequence[Tuple[Address, bytes]],
+) -> List[Tuple[bool, int, bytes]]:
+    code = state.get_code(token)
+    code_hash = state.get_code_hash(token)
+    snapshot = state.snapshot()
+    results = []
+    for sender, data in calls:
+        message = Message(
+            gas=GAS,
+            to=token,
+            sender=sender,
+            data=data,
+            code=code,
+            code_hash=code_hash,
+        )
+        transaction_context = state.get_transaction_context_class()(origin=sender)
+        computation = computation_class.apply_message(state, message, transaction_context)
+        results.append(
+            (computation.is_error, computation.get_gas_remaining(), computation.output)
+        )
+    state.revert(snapshot)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--pairs', type=int, default=15)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    chain_class = VedaAsyncChain.configure(vm_configuration=((0, VedaVM),), chain_id=1)
+    base_db = AtomicDB()
+    chain_class.from_genesis(base_db, {'difficulty': 1, 'gas_limit': 30000000, 'timestamp': 1})
+    chain = chain_class(base_db)
+    token = deploy_token(chain)
+    state = chain.get_vm().state
+    calls = make_calls(args.calls)
+
+    computation_class = state.computation_class
+    profiler = OpcodePairProfiler()
+    expected = run_calls(profiler.configure(computation_class), state, token, calls)
+    print("most run opcode pairs:")
+    for (first, second), count in profiler.most_common(args.pairs):
+        print(f"  {first:<8} {second:<8} {count:8d}")
+
+    engines = (
+        ('interpreter', computation_class.configure(use_basic_blocks=False)),
+        ('basic blocks', computation_class.configure(
+            use_basic_blocks=True,
+            superinstructions={},
+        )),
+        ('superinstructions', computation_class.configure(use_basic_blocks=True)),
+    )
+    for name, engine_class in engines:
+        assert run_calls(engine_class, state, token, calls) == expected, f"{name} differs"
+
+    times = []
+    for name, engine_class in engines:
+        start = time.perf_counter()
+        run_calls(engine_class, state, token, calls)
+        times.append((name, (time.perf_counter() - start) / args.calls))
+    for name, call_time in times:
+        print(
+            f"{name:<18} {call_time * 1e6:8.1f}us per call  "
+            f"{times[0][1] / call_time:4.2f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
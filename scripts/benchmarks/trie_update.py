@@ -0,0 +1,68 @@
+"""
+Compare applying a batch of changes to a trie one key at a time through HexaryTrie,
+like the state and storage tries did before, with the batched update_trie().
+
+Both start from the same trie of ``--trie-size`` random 32 byte keys, then set 1000,
+10000 and 100000 keys, a third of them existing, with a tenth of those deleted.
+
+    python scripts/benchmarks/trie_update.py --trie-size 100000 --updates 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import time
+from typing import (
+    Dict,
+    Sequence,
+)
+
+from trie import HexaryTrie
+
+from veda.constants import BLANK_ROOT_HASH
+from veda.db.trie import update_trie
+
+
+def make_changes(rnd: random.Random, keys: Sequence[bytes], count: int) -> Dict[bytes, bytes]:
+    changes = {}
+    for key in rnd.sample(keys, count // 3):
+        changes[key] = b"" if rnd.random() < 0.1 else os.urandom(40)
+    while len(changes) < count:
+        changes[os.urandom(32)] = os.urandom(40)
+    return changes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--trie-size', type=int, default=100000)
+    parser.add_argument('--updates', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    db: Dict[bytes, bytes] = {}
+    keys = [os.urandom(32) for _ in range(args.trie_size)]
+    root_hash = update_trie(db, BLANK_ROOT_HASH, {key: os.urandom(40) for key in keys})
+
+    for count in args.updates:
+        changes = make_changes(rnd, keys, count)
+
+        trie = HexaryTrie(dict(db), root_hash, prune=True)
+        start = time.perf_counter()
+        with trie.squash_changes() as memory_trie:
+            for key, value in changes.items():
+                memory_trie[key] = value
+        per_key_time = time.perf_counter() - start
+
+        batched_db = dict(db)
+        start = time.perf_counter()
+        batched_root_hash = update_trie(batched_db, root_hash, changes)
+        batched_time = time.perf_counter() - start
+
+        assert batched_root_hash == trie.root_hash, "Batched update gave a different root"
+        print(
+            f"{count:7d} updates  per key {per_key_time:7.2f}s  "
+            f"batched {batched_time:7.2f}s  {per_key_time / batched_time:5.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import asyncio
+import contextvars
 import functools
 from typing import (
     Any,
@@ -19,9 +20,12 @@ def async_method(method: Callable[..., TReturn],
         cls_method = getattr(cls_or_self, method.__name__)
         loop = asyncio.get_event_loop()
 
+        # Run in a copy of the caller's context, so context variables like the
+        # pinned database snapshot are seen by the executor thread too.
+        context = contextvars.copy_context()
         return await loop.run_in_executor(
             None,
-            functools.partial(cls_method, **kwargs),
+            functools.partial(context.run, cls_method, **kwargs),
             *args
         )
     return wrapper
@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 import contextlib
 import errno
 import logging
 import pathlib
+import queue
+import selectors
 import socket
 import threading
 from typing import Iterator
@@ -15,6 +18,7 @@ class BufferedSocket:
         self.sendall = sock.sendall
         self.close = sock.close
         self.shutdown = sock.shutdown
+        self.fileno = sock.fileno
         self.__enter__ = sock.__enter__
         self.__exit__ = sock.__exit__
 
@@ -31,6 +35,9 @@ class BufferedSocket:
         self._buffer = self._buffer[num_bytes:]
         return bytes(payload)
 
+    def has_buffered_data(self) -> bool:
+        return len(self._buffer) > 0
+
 
 class IPCSocketServer(ABC):
     """
@@ -87,7 +94,8 @@ class IPCSocketServer(ABC):
         except OSError as e:
             # on mac OS this can result in the following error:
             # OSError: [Errno 57] Socket is not connected
-            if e.errno != errno.ENOTCONN:
+            # and the server may already have closed the socket on its way out
+            if e.errno not in (errno.ENOTCONN, errno.EBADF):
                 raise
 
         sock.close()
@@ -103,9 +111,8 @@ class IPCSocketServer(ABC):
             if ipc_path.exists():
                 ipc_path.unlink()
 
-    def serve(self, ipc_path: pathlib.Path) -> None:
-        self.logger.info("Starting %s server over IPC socket: %s", self, ipc_path)
-
+    @contextlib.contextmanager
+    def _listen(self, ipc_path: pathlib.Path) -> Iterator[socket.socket]:
         with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
             # background task to close the socket.
             threading.Thread(
@@ -120,10 +127,18 @@ class IPCSocketServer(ABC):
             # https://stackoverflow.com/questions/6380057/python-binding-socket-address-already-in-use
             sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             sock.bind(str(ipc_path))
-            sock.listen(10)
+            # A full backlog makes non-blocking connects (like asyncio's) fail with
+            # EAGAIN, so leave room for many clients connecting at once.
+            sock.listen(socket.SOMAXCONN)
 
             self._started.set()
 
+            yield sock
+
+    def serve(self, ipc_path: pathlib.Path) -> None:
+        self.logger.info("Starting %s server over IPC socket: %s", self, ipc_path)
+
+        with self._listen(ipc_path) as sock:
             while self.is_running:
                 try:
                     conn, addr = sock.accept()
@@ -150,3 +165,136 @@ class IPCSocketServer(ABC):
             sock = BufferedSocket(raw_socket)
 
             self.serve_conn(sock)
+
+
+# Selectors which pick up sockets registered from another thread while they wait
+_THREADSAFE_SELECTORS = tuple(
+    getattr(selectors, name)
+    for name in ('EpollSelector', 'KqueueSelector')
+    if hasattr(selectors, name)
+)
+
+
+class SelectorIPCSocketServer(IPCSocketServer):
+    """
+    Serves all connections from a single selector thread instead of a thread per
+    connection. Whenever a connection has a request waiting, it is handed to one of
+    ``max_workers`` worker threads, which serves the request with
+    :meth:`serve_request` and then gives the connection back to the selector.
+    """
+    logger = logging.getLogger('veda._utils.socket.SelectorIPCSocketServer')
+
+    max_workers = 8
+
+    _selector: selectors.BaseSelector = None
+    _idle_conns: 'queue.SimpleQueue[BufferedSocket]' = None
+    _wakeup_writer: socket.socket = None
+
+    def serve(self, ipc_path: pathlib.Path) -> None:
+        self.logger.info(
+            "Starting %s server over IPC socket with %d workers: %s",
+            self,
+            self.max_workers,
+            ipc_path,
+        )
+
+        # Writing to the socket pair wakes up the selector, when stopping or when a
+        # worker hands back a connection that the selector can't pick up on its own.
+        self._idle_conns = queue.SimpleQueue()
+        wakeup_reader, self._wakeup_writer = socket.socketpair()
+
+        threading.Thread(
+            name="_wakeup_selector_on_stop",
+            target=self._wakeup_selector_on_stop,
+            daemon=True,
+        ).start()
+
+        with self._listen(ipc_path) as sock, \
+                selectors.DefaultSelector() as selector, \
+                ThreadPoolExecutor(self.max_workers, f"{self}:worker") as workers, \
+                wakeup_reader, self._wakeup_writer:
+
+            self._selector = selector
+            selector.register(sock, selectors.EVENT_READ)
+            selector.register(wakeup_reader, selectors.EVENT_READ)
+
+            try:
+                while self.is_running:
+                    for key, _ in selector.select():
+                        if key.fileobj is sock:
+                            try:
+                                conn, addr = sock.accept()
+                            except (ConnectionAbortedError, OSError) as err:
+                                self.logger.debug("Server stopping: %s", err)
+                                self._stopped.set()
+                                break
+                            self.logger.debug('Server accepted connection: %r', addr)
+                            conn_sock = BufferedSocket(conn)
+                            selector.register(conn_sock, selectors.EVENT_READ, conn_sock)
+                        elif key.fileobj is wakeup_reader:
+                            wakeup_reader.recv(4096)
+                            while not self._idle_conns.empty():
+                                conn_sock = self._idle_conns.get_nowait()
+                                selector.register(conn_sock, selectors.EVENT_READ, conn_sock)
+                        else:
+                            selector.unregister(key.fileobj)
+                            workers.submit(self._serve_ready_conn, key.data)
+            finally:
+                for key in tuple(selector.get_map().values()):
+                    if isinstance(key.data, BufferedSocket):
+                        self._close_conn(key.data)
+
+    def _wakeup_selector_on_stop(self) -> None:
+        self.wait_stopped()
+        try:
+            self._wakeup_writer.send(b'\x00')
+        except OSError:
+            # The server already shut down
+            pass
+
+    def _serve_ready_conn(self, sock: BufferedSocket) -> None:
+        try:
+            keep_open = self.serve_request(sock)
+            # Requests that were pipelined into our buffer won't wake up the selector
+            while keep_open and self.is_running and sock.has_buffered_data():
+                keep_open = self.serve_request(sock)
+        except Exception:
+            keep_open = False
+
+        if not keep_open or not self.is_running:
+            self._close_conn(sock)
+            return
+
+        try:
+            if isinstance(self._selector, _THREADSAFE_SELECTORS):
+                # The kernel starts watching the socket right away, even while the
+                # selector thread is blocked, which saves a wakeup per request.
+                self._selector.register(sock, selectors.EVENT_READ, sock)
+            else:
+                self._idle_conns.put(sock)
+                self._wakeup_writer.send(b'\x00')
+        except (OSError, ValueError):
+            # The server shut down while we were serving the request
+            self._close_conn(sock)
+
+    def _close_conn(self, sock: BufferedSocket) -> None:
+        self.logger.debug("%s: closing client connection %s", self, sock)
+        try:
+            self.close_conn(sock)
+        finally:
+            sock.close()
+
+    @abstractmethod
+    def serve_request(self, sock: BufferedSocket) -> bool:
+        """
+        Read and handle a single request from ``sock``. Return ``False`` if the
+        connection should be closed.
+        """
+        ...
+
+    @abstractmethod
+    def close_conn(self, sock: BufferedSocket) -> None:
+        """
+        Clean up after a connection, before it is closed.
+        """
+        ...
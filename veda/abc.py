@@ -852,6 +852,14 @@ class DatabaseAPI(MutableMapping[bytes, bytes], ABC):
         """
         ...
 
+    @abstractmethod
+    def multi_get(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        """
+        Return the values of all ``keys``, in order, with ``None`` for every
+        missing key.
+        """
+        ...
+
 
 class AtomicWriteBatchAPI(DatabaseAPI):
     """
@@ -1191,6 +1199,26 @@ class ChainDatabaseAPI(HeaderDatabaseAPI):
         """
         ...
 
+    @abstractmethod
+    def persist_block_data(self, root_hash: Hash32, encoded_items: Sequence[bytes]) -> None:
+        """
+        Store the encoded transactions or receipts of a block next to each other, under
+        the root hash of their trie, so that any of them can be read with a single
+        lookup.
+        """
+        ...
+
+    #
+    # Freezer API
+    #
+    @abstractmethod
+    def freeze_blocks(self, stop_block_number: BlockNumber) -> int:
+        """
+        Move the canonical blocks below ``stop_block_number`` to the freezer, and
+        return the number of blocks moved.
+        """
+        ...
+
 
 class GasMeterAPI(ABC):
     """
@@ -1232,6 +1260,7 @@ class MessageAPI(ABC):
     """
 
     code: bytes
+    code_hash: Hash32
     _code_address: Address
     create_address: Address
     data: BytesOrView
@@ -1246,6 +1275,7 @@ class MessageAPI(ABC):
 
     __slots__ = [
         "code",
+        "code_hash",
         "_code_address",
         "create_address",
         "data",
@@ -1392,9 +1422,9 @@ class MemoryAPI(ABC):
         ...
 
     @abstractmethod
-    def write(self, start_position: int, size: int, value: bytes) -> None:
+    def write(self, start_position: int, size: int, value: BytesOrView) -> None:
         """
-        Write `value` into memory.
+        Write `value`, bytes or a view of them, into memory.
         """
         ...
 
@@ -1846,10 +1876,10 @@ class ComputationAPI(
         ...
 
     @abstractmethod
-    def memory_write(self, start_position: int, size: int, value: bytes) -> None:
+    def memory_write(self, start_position: int, size: int, value: BytesOrView) -> None:
         """
-        Write ``value`` to memory at ``start_position``. Require that
-        ``len(value) == size``.
+        Write ``value``, bytes or a view of them, to memory at ``start_position``.
+        Require that ``len(value) == size``.
         """
         ...
 
@@ -1,7 +1,9 @@
+import contextlib
 import time
 from typing import (
     Any,
     Dict,
+    Iterator,
     Tuple,
     Type, Optional, Union, Sequence,
 )
@@ -22,6 +24,8 @@ from eth_utils import decode_hex
 
 from veda.abc import VirtualMachineAPI
 from veda.chains.base import Chain
+from veda.db.pruning import StatePruner
+from veda.db.session import WriteSessionDB
 from .constants import VEDA_CHAIN_ID
 from veda.rlp.headers import BlockHeader
 from veda.vm.forks import (
@@ -66,6 +70,11 @@ VEDA_GENESIS_HEADER = BlockHeader(
 class VedaChain(BaseVedaChain, Chain):
     header: BlockHeaderAPI = None
 
+    # Set to delete the state of old blocks as new blocks are persisted
+    state_pruner: StatePruner = None
+    # Set to move the blocks older than this many blocks to the freezer
+    freezer_depth: int = None
+
     def __init__(
         self, base_db: AtomicDatabaseAPI, header: BlockHeaderAPI = None
     ) -> None:
@@ -76,10 +85,36 @@ class VedaChain(BaseVedaChain, Chain):
         self, block: BlockAPI, perform_validation: bool = True
     ) -> BlockImportResult:
         result = super().import_block(block, perform_validation)
+        self._prune_state(result.imported_block.header)
+        self._freeze_blocks(result.imported_block.header)
 
         self.header = self.ensure_header()
         return result
 
+    @contextlib.contextmanager
+    def write_session(self) -> Iterator[None]:
+        """
+        Write everything persisted in this context, like the state, the transaction
+        and receipt tries, the block itself, the pruning of old state and the removal
+        of frozen blocks, in a single atomic batch.
+
+        Only batches if the chain was created over a
+        :class:`~veda.db.session.WriteSessionDB`, otherwise writes go out as usual.
+        """
+        db = self.chaindb.db
+        if not isinstance(db, WriteSessionDB):
+            yield
+            return
+
+        header = self.header
+        try:
+            with db.write_session():
+                yield
+        except Exception:
+            # None of the block was written, so build on top of the old header again
+            self.header = header
+            raise
+
     def apply_transactions(self, transactions: Tuple[SignedTransactionAPI, ...]) -> Tuple[BlockAPI, Tuple[ReceiptAPI, ...], Tuple[ComputationAPI, ...]]:
         vm = self.get_vm(self.header)
         base_block = vm.get_block()
@@ -151,9 +186,19 @@ class VedaChain(BaseVedaChain, Chain):
         self.validate_block(mined_block)
 
         self.chaindb.persist_block(mined_block)
+        self._prune_state(mined_block.header)
+        self._freeze_blocks(mined_block.header)
         self.header = self.create_header_from_parent(mined_block.header)
         return mine_result
 
+    def _prune_state(self, header: BlockHeaderAPI) -> None:
+        if self.state_pruner is not None:
+            self.state_pruner.add_block(header.block_number, header.state_root)
+
+    def _freeze_blocks(self, header: BlockHeaderAPI) -> None:
+        if self.freezer_depth is not None:
+            self.chaindb.freeze_blocks(BlockNumber(header.block_number + 1 - self.freezer_depth))
+
     def get_vm(self, at_header: BlockHeaderAPI = None) -> VirtualMachineAPI:
         if at_header is None:
             at_header = self.header
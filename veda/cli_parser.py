@@ -14,6 +14,12 @@ from eth_utils import (
 from veda.constants import (
     VEDA_NETWORK_ID,
 )
+from veda.db.cache import (
+    DEFAULT_TRIE_NODE_CACHE_SIZE,
+)
+from veda.db.state_cache import (
+    DEFAULT_STATE_CACHE_SIZE,
+)
 
 from veda import __version__
 
@@ -121,6 +127,7 @@ veda_parser = parser.add_argument_group('core')
 logging_parser = parser.add_argument_group('logging')
 network_parser = parser.add_argument_group('network')
 chain_parser = parser.add_argument_group('chain')
+database_parser = parser.add_argument_group('database')
 debug_parser = parser.add_argument_group('debug')
 
 
@@ -195,6 +202,54 @@ chain_parser.add_argument(
     ),
 )
 
+#
+# Database configuration
+#
+database_parser.add_argument(
+    '--db-workers',
+    type=int,
+    help=(
+        "Serve database connections from a single selector thread with this many "
+        "worker threads, instead of a thread per connection"
+    ),
+)
+database_parser.add_argument(
+    '--trie-node-cache-size',
+    type=int,
+    default=DEFAULT_TRIE_NODE_CACHE_SIZE // (1024 * 1024),
+    help=(
+        "Size in MB of the trie node cache, that every process reading the state keeps. "
+        "Use 0 to disable it. Default: %(default)s"
+    ),
+)
+database_parser.add_argument(
+    '--state-cache-size',
+    type=int,
+    default=DEFAULT_STATE_CACHE_SIZE // (1024 * 1024),
+    help=(
+        "Size in MB of the account and storage cache, that every process reading the "
+        "state keeps across blocks. Use 0 to disable it. Default: %(default)s"
+    ),
+)
+database_parser.add_argument(
+    '--state-pruning-blocks',
+    type=int,
+    help=(
+        "Only keep the state of this many recent blocks, and delete the trie nodes "
+        "that older states no longer share with them. By default the state of every "
+        "block is kept"
+    ),
+)
+database_parser.add_argument(
+    '--freezer-depth',
+    type=int,
+    help=(
+        "Move the headers, transactions and receipts of canonical blocks older than "
+        "this many blocks out of the database, into append-only freezer files. By "
+        "default all blocks stay in the database"
+    ),
+)
+
 #
 # Debug configuration
 #
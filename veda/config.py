@@ -470,6 +470,27 @@ class VedaAppConfig(BaseAppConfig):
         path = self.veda_config.data_dir / DATABASE_DIR_NAME
         return self.veda_config.with_app_suffix(path) / "full"
 
+    @property
+    def freezer_dir(self) -> Path:
+        """
+        Path where the freezer files with old blocks are stored.
+
+        This is resolved relative to the ``data_dir``
+        """
+        path = self.veda_config.data_dir / DATABASE_DIR_NAME
+        return self.veda_config.with_app_suffix(path) / "ancient"
+
+    @property
+    def canonical_index_dir(self) -> Path:
+        """
+        Path where the memory mapped index of canonical block hashes and headers is
+        stored.
+
+        This is resolved relative to the ``data_dir``
+        """
+        path = self.veda_config.data_dir / DATABASE_DIR_NAME
+        return self.veda_config.with_app_suffix(path) / "canonical"
+
     def get_chain_config(self) -> VedaChainConfig:
         """
         Return the :class:`~veda.config.Eth1ChainConfig` either derived from the ``network_id``
@@ -5,7 +5,10 @@ import logging
 from typing import (
     FrozenSet,
     Iterator,
+    Optional,
+    Sequence,
     Set,
+    Tuple,
 )
 
 from veda.abc import (
@@ -53,6 +56,13 @@ class KeyAccessLoggerDB(BaseDB):
             self._keys_read.add(key)
             return result
 
+    def multi_get(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        values = self.wrapped_db.multi_get(keys)
+        for key, value in zip(keys, values):
+            if value is not None or self._log_missing_keys:
+                self._keys_read.add(key)
+        return values
+
     def __setitem__(self, key: bytes, value: bytes) -> None:
         self.wrapped_db[key] = value
 
@@ -101,6 +111,13 @@ class KeyAccessLoggerAtomicDB(BaseAtomicDB):
             self._keys_read.add(key)
             return result
 
+    def multi_get(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        values = self.wrapped_db.multi_get(keys)
+        for key, value in zip(keys, values):
+            if value is not None or self._log_missing_keys:
+                self._keys_read.add(key)
+        return values
+
     def __setitem__(self, key: bytes, value: bytes) -> None:
         self.wrapped_db[key] = value
 
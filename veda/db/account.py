@@ -1,6 +1,7 @@
 from typing import (
     Dict,
     Iterable,
+    Optional,
     Set,
     Tuple,
     cast,
@@ -54,16 +55,30 @@ from veda.db.batch import (
 )
 from veda.db.cache import (
     CacheDB,
+    TrieNodeCacheDB,
 )
 from veda.db.diff import (
     DBDiff,
 )
+from veda.db.flat_snapshot import (
+    FlatAccountLookup,
+    FlatStateSnapshot,
+    FlatStorageLookup,
+    SlotChanges,
+)
 from veda.db.journal import (
     JournalDB,
 )
+from veda.db.state_cache import (
+    CachedAccountLookup,
+    get_state_cache,
+)
 from veda.db.storage import (
     AccountStorageDB,
 )
+from veda.db.trie import (
+    update_trie,
+)
 from veda.db.witness import (
     AccountQueryTracker,
     MetaWitness,
@@ -104,12 +119,18 @@ class AccountDB(AccountDatabaseAPI):
 
         .. code::
 
-            db > _batchdb ------------------------> _journaldb -----------> code lookups
-             \
-              -> _batchtrie -> _trie -> _trie_cache -> _journaltrie ---> account lookups
+            db > _raw_store_db > _batchdb -------------------> _journaldb ----> code lookups
+                              \
+                               -> _batchtrie -> _trie -> _trie_cache -> _journaltrie
+                                                                  ---> account lookups
 
         Journaling sequesters writes at the _journal* attrs ^, until persist is called.
 
+        _raw_store_db logs the keys read for the witness, and reads through the
+        process-wide trie node cache, see :class:`~veda.db.cache.TrieNodeCacheDB`.
+        Everything stored through it is keyed by its hash, so the node cache
+        survives state root changes and persists.
+
         _batchtrie enables us to prune all trie changes while building
         state,  without deleting old trie roots.
 
@@ -126,6 +147,14 @@ class AccountDB(AccountDatabaseAPI):
         the key in _journaltrie, because the cache is only invalidated
         after a state root change.
 
+        Below _trie_cache, accounts are read through the process-wide
+        :class:`~veda.db.state_cache.StateCache`, which follows the state root
+        from one block to the next, see :meth:`make_state_root`. On a miss, they
+        are read from the :class:`~veda.db.flat_snapshot.FlatStateSnapshot` when
+        it is at the current state root, or has history back to it, and from _trie
+        otherwise. The snapshot is moved to the new state root in the same batch as
+        the trie, in :meth:`persist`.
+
         _journaltrie is a journaling of the accounts (an address->rlp mapping,
         rather than the nodes stored by the trie). This enables
         a squashing of all account changes before pushing them into the trie.
@@ -135,18 +164,42 @@ class AccountDB(AccountDatabaseAPI):
         AccountDB synchronizes the snapshot/revert/persist of both of the
         journals.
         """
-        self._raw_store_db = KeyAccessLoggerAtomicDB(db, log_missing_keys=False)
+        self._raw_store_db = KeyAccessLoggerAtomicDB(
+            TrieNodeCacheDB(db),
+            log_missing_keys=False,
+        )
         self._batchdb = BatchDB(self._raw_store_db)
         self._batchtrie = BatchDB(self._raw_store_db, read_through_deletes=True)
         self._journaldb = JournalDB(self._batchdb)
         self._trie = HashTrie(HexaryTrie(self._batchtrie, state_root, prune=True))
         self._trie_logger = KeyAccessLoggerDB(self._trie, log_missing_keys=False)
-        self._trie_cache = CacheDB(self._trie_logger)
+        self._state_cache = get_state_cache()
+        self._flat_snapshot = FlatStateSnapshot(db)
+        self._flat_snapshot_root = self._flat_snapshot.get_root()
+        if self._flat_snapshot_root is None and state_root == BLANK_ROOT_HASH:
+            # An empty snapshot is complete for the empty state
+            self._flat_snapshot_root = BLANK_ROOT_HASH
+        if state_root == self._flat_snapshot_root:
+            history_version = None
+        else:
+            history_version = self._flat_snapshot.get_history_version(state_root)
+        self._flat_lookup = FlatAccountLookup(
+            self._trie_logger,
+            self._trie,
+            self._flat_snapshot,
+            state_root if history_version is not None else self._flat_snapshot_root,
+            history_version,
+        )
+        self._trie_cache = CacheDB(
+            CachedAccountLookup(self._flat_lookup, self._trie, self._state_cache)
+        )
         self._journaltrie = JournalDB(self._trie_cache)
         self._account_cache = LRU(2048)
         self._account_stores: Dict[Address, AccountStorageDatabaseAPI] = {}
         self._dirty_accounts: Set[Address] = set()
         self._root_hash_at_last_persist = state_root
+        # The encoded accounts changed since the last persist, b"" when deleted
+        self._changed_accounts: Dict[Address, bytes] = {}
         self._accessed_accounts: Set[Address] = set()
         self._accessed_bytecodes: Set[Address] = set()
         # Track whether an account or slot have been accessed
@@ -222,10 +275,44 @@ class AccountDB(AccountDatabaseAPI):
             store = self._account_stores[address]
         else:
             storage_root = self._get_storage_root(address)
-            store = AccountStorageDB(self._raw_store_db, storage_root, address)
+            store = AccountStorageDB(
+                self._raw_store_db,
+                storage_root,
+                address,
+                self._state_cache,
+                self._get_flat_storage(address, storage_root),
+            )
             self._account_stores[address] = store
         return store
 
+    def _get_flat_storage(self,
+                          address: Address,
+                          storage_root: Hash32) -> Optional[FlatStorageLookup]:
+        if self._trie.root_hash != self._flat_lookup.snapshot_root:
+            return None
+
+        address_hash = keccak(address)
+        incarnation, encoded_account = self._flat_snapshot.get_account(
+            address_hash,
+            self._flat_lookup.version,
+        )
+        if encoded_account:
+            flat_storage_root = rlp.decode(encoded_account, sedes=Account).storage_root
+        else:
+            flat_storage_root = BLANK_ROOT_HASH
+
+        if flat_storage_root == storage_root:
+            return FlatStorageLookup(
+                self._flat_snapshot,
+                address_hash,
+                incarnation,
+                storage_root,
+                self._flat_lookup.version,
+            )
+        else:
+            # The storage root was changed since the last persist
+            return None
+
     def _dirty_account_stores(
         self,
     ) -> Iterable[Tuple[Address, AccountStorageDatabaseAPI]]:
@@ -472,10 +559,17 @@ class AccountDB(AccountDatabaseAPI):
 
         diff = self._journaltrie.diff()
         if diff.deleted_keys() or diff.pending_items():
-            # In addition to squashing (which is redundant here), this context manager
-            # causes an atomic commit of the changes, so exceptions will revert the trie
-            with self._trie.squash_changes() as memory_trie:
-                self._apply_account_diff_without_proof(diff, memory_trie)
+            old_state_root = self.state_root
+            self._apply_account_diff_without_proof(diff)
+
+            changed_accounts = dict(diff.pending_items())
+            changed_accounts.update((address, b"") for address in diff.deleted_keys())
+            self._changed_accounts.update(changed_accounts)
+            self._state_cache.update_accounts(
+                old_state_root,
+                self.state_root,
+                changed_accounts,
+            )
 
         self._journaltrie.reset()
         self._trie_cache.reset_cache()
@@ -485,6 +579,12 @@ class AccountDB(AccountDatabaseAPI):
     def persist(self) -> MetaWitnessAPI:
         self.make_state_root()
 
+        # collect the storage changes for the flat snapshot, before they are committed
+        changed_storage = {
+            keccak(address): store.get_changed_slots()
+            for address, store in self._dirty_account_stores()
+        }
+
         # persist storage
         with self._raw_store_db.atomic_batch() as write_batch:
             for address, store in self._dirty_account_stores():
@@ -521,13 +621,41 @@ class AccountDB(AccountDatabaseAPI):
         self._validate_generated_root()
         new_root_hash = self.state_root
         self.logger.debug2("Persisting new state root: 0x%s", new_root_hash.hex())
+        update_flat_snapshot = self._flat_snapshot_root == self._root_hash_at_last_persist
         with self._raw_store_db.atomic_batch() as write_batch:
             self._batchtrie.commit_to(write_batch, apply_deletes=False)
             self._batchdb.commit_to(write_batch, apply_deletes=False)
+            if update_flat_snapshot:
+                # Only a snapshot of the state persisted last can be moved forward
+                self._apply_flat_snapshot_diff(write_batch, new_root_hash, changed_storage)
+        if update_flat_snapshot:
+            self._flat_snapshot_root = new_root_hash
+            self._flat_lookup.snapshot_root = new_root_hash
+            self._flat_lookup.version = None
+        self._changed_accounts = {}
         self._root_hash_at_last_persist = new_root_hash
 
         return meta_witness
 
+    def _apply_flat_snapshot_diff(self,
+                                  write_batch: DatabaseAPI,
+                                  new_root_hash: Hash32,
+                                  changed_storage: Dict[Hash32, SlotChanges]) -> None:
+        changed_accounts = {
+            keccak(address): encoded_account
+            for address, encoded_account in self._changed_accounts.items()
+        }
+        self._flat_snapshot.apply_diff(
+            write_batch,
+            new_root_hash,
+            changed_accounts,
+            {
+                address_hash: slot_changes
+                for address_hash, slot_changes in changed_storage.items()
+                if slot_changes.wiped or slot_changes.changed_slots
+            },
+        )
+
     def _get_accessed_node_hashes(self) -> Set[Hash32]:
         return cast(Set[Hash32], self._raw_store_db.keys_read)
 
@@ -602,33 +730,18 @@ class AccountDB(AccountDatabaseAPI):
             if not was_account_accessed:
                 self._accessed_accounts.remove(cast_deleted_address)
 
-    def _apply_account_diff_without_proof(
-        self, diff: DBDiff, trie: DatabaseAPI
-    ) -> None:
+    def _apply_account_diff_without_proof(self, diff: DBDiff) -> None:
         """
         Apply diff of trie updates, when original nodes might be missing.
-        Note that doing this naively will raise exceptions about missing nodes
-        from *intermediate* trie roots. This captures exceptions and uses the previous
-        trie root hash that will be recognized by other nodes.
+        All changes are applied to the trie at once, so the upper nodes are encoded
+        once per block instead of once per account. Missing nodes are reported
+        against the previous trie root hash that will be recognized by other nodes,
+        and leave the trie unchanged.
         """
         # It's fairly common that when an account is deleted, we need to retrieve nodes
         # for accounts that were not needed during normal execution. We only need these
         # nodes to refactor the trie.
-        for delete_key in diff.deleted_keys():
-            try:
-                del trie[delete_key]
-            except trie_exceptions.MissingTrieNode as exc:
-                self.logger.debug(
-                    "Missing node while deleting account with key %s: %s",
-                    encode_hex(delete_key),
-                    exc,
-                )
-                raise MissingAccountTrieNode(
-                    exc.missing_node_hash,
-                    self._root_hash_at_last_persist,
-                    exc.requested_key,
-                ) from exc
-
+        #
         # It's fairly unusual, but possible, that setting an account will need unknown
         # nodes during a trie refactor. Here is an example that seems to cause it:
         #
@@ -643,19 +756,18 @@ class AccountDB(AccountDatabaseAPI):
         #   - The leaf for key (0, 1, 2) now contains only the (2) part, so needs to
         #       be rebuilt
         #   - We need the full body of the old (1, 2) leaf node, to rebuild
-
-        for key, val in diff.pending_items():
-            try:
-                trie[key] = val
-            except trie_exceptions.MissingTrieNode as exc:
-                self.logger.debug(
-                    "Missing node on account update key %s to %s: %s",
-                    encode_hex(key),
-                    encode_hex(val),
-                    exc,
-                )
-                raise MissingAccountTrieNode(
-                    exc.missing_node_hash,
-                    self._root_hash_at_last_persist,
-                    exc.requested_key,
-                ) from exc
+        changes = {keccak(address): b"" for address in diff.deleted_keys()}
+        changes.update((keccak(address), val) for address, val in diff.pending_items())
+        try:
+            self._trie.root_hash = update_trie(self._batchtrie, self._trie.root_hash, changes)
+        except trie_exceptions.MissingTrieNode as exc:
+            self.logger.debug(
+                "Missing node while updating account with key %s: %s",
+                encode_hex(exc.requested_key),
+                exc,
+            )
+            raise MissingAccountTrieNode(
+                exc.missing_node_hash,
+                self._root_hash_at_last_persist,
+                exc.requested_key,
+            ) from exc
@@ -2,14 +2,22 @@ from abc import abstractmethod
 from typing import (
     Dict,
     Iterable,
+    Optional,
     Sequence,
     Tuple,
     Type,
+    Union,
 )
 
-from eth_typing import Hash32
+from eth_typing import (
+    BlockNumber,
+    Hash32,
+)
+from eth_utils import encode_hex
+import rlp
 
 from veda.abc import (
+    AtomicDatabaseAPI,
     BlockAPI,
     BlockHeaderAPI,
     ReceiptAPI,
@@ -17,7 +25,22 @@ from veda.abc import (
     SignedTransactionAPI,
     TransactionBuilderAPI,
 )
-from veda.db.chain import ChainDB
+from veda.db.canonical_index import get_canonical_index
+from veda.db.chain import BlockDataKey, ChainDB
+from veda.db.freezer import get_freezer
+from veda.db.header import _decode_block_header
+from veda.db.manager import AsyncDBClient
+from veda.db.schema import SchemaV1
+from veda.db.snapshot import AsyncPinnedSnapshotDB
+from veda.exceptions import (
+    CanonicalHeadNotFound,
+    HeaderNotFound,
+    TransactionNotFound,
+)
+from veda.validation import (
+    validate_block_number,
+    validate_word,
+)
 
 from veda._utils.async_dispatch import async_method
 from veda.db.async_headerdb import BaseAsyncHeaderDB
@@ -54,6 +77,13 @@ class BaseAsyncChainDB(BaseAsyncHeaderDB, ChainDB):
             transaction_class: Type[TransactionBuilderAPI]) -> Iterable[SignedTransactionAPI]:
         ...
 
+    @abstractmethod
+    async def coro_get_transaction_index(
+        self,
+        transaction_hash: Hash32,
+    ) -> Tuple[BlockNumber, int]:
+        ...
+
     @abstractmethod
     async def coro_get_receipts(
         self,
@@ -79,3 +109,124 @@ class AsyncChainDB(BaseAsyncChainDB):
     coro_persist_trie_data_dict = async_method(BaseAsyncChainDB.persist_trie_data_dict)
     coro_get_block_transactions = async_method(BaseAsyncChainDB.get_block_transactions)
     coro_get_receipts = async_method(BaseAsyncChainDB.get_receipts)
+    coro_get_transaction_index = async_method(BaseAsyncChainDB.get_transaction_index)
+
+
+class AsyncIPCChainDB(AsyncChainDB):
+    """
+    An :class:`AsyncChainDB` which serves the hot header and index lookups directly
+    from an :class:`~veda.db.manager.AsyncDBClient`, instead of a blocking read on an
+    executor thread. Everything else falls back to the threaded implementation.
+    """
+    def __init__(self,
+                 db: AtomicDatabaseAPI,
+                 async_db: Union[AsyncDBClient, AsyncPinnedSnapshotDB]) -> None:
+        super().__init__(db)
+        self.async_db = async_db
+
+    async def coro_exists(self, key: bytes) -> bool:
+        return await self.async_db.coro_exists(key)
+
+    async def coro_get(self, key: bytes) -> bytes:
+        return await self.async_db.coro_get(key)
+
+    async def coro_get_canonical_block_hash(self, block_number: BlockNumber) -> Hash32:
+        validate_block_number(block_number)
+        canonical_index = get_canonical_index()
+        if canonical_index is not None:
+            block_hash = canonical_index.get_hash(block_number)
+            if block_hash is not None:
+                return block_hash
+
+        number_to_hash_key = SchemaV1.make_block_number_to_hash_lookup_key(block_number)
+
+        try:
+            encoded_key = await self.async_db.coro_get(number_to_hash_key)
+        except KeyError:
+            raise HeaderNotFound(
+                f"No canonical header for block number #{block_number}"
+            )
+        else:
+            return rlp.decode(encoded_key, sedes=rlp.sedes.binary)
+
+    async def coro_get_canonical_block_header_by_number(
+        self,
+        block_number: BlockNumber,
+    ) -> BlockHeaderAPI:
+        validate_block_number(block_number)
+        canonical_index = get_canonical_index()
+        if canonical_index is not None:
+            header_rlp = canonical_index.get_header(block_number)
+            if header_rlp is not None:
+                return _decode_block_header(header_rlp)
+
+        canonical_block_hash = await self.coro_get_canonical_block_hash(block_number)
+        return await self.coro_get_block_header_by_hash(canonical_block_hash)
+
+    async def coro_get_canonical_head(self) -> BlockHeaderAPI:
+        try:
+            canonical_head_hash = await self.async_db.coro_get(
+                SchemaV1.make_canonical_head_hash_lookup_key()
+            )
+        except KeyError:
+            raise CanonicalHeadNotFound("No canonical head set for this chain")
+        return await self.coro_get_block_header_by_hash(Hash32(canonical_head_hash))
+
+    async def coro_get_block_header_by_hash(self, block_hash: Hash32) -> BlockHeaderAPI:
+        validate_word(block_hash, title="Block Hash")
+        try:
+            header_rlp = await self.async_db.coro_get(block_hash)
+        except KeyError:
+            header_rlp = await self._coro_get_frozen_header(block_hash)
+            if header_rlp is None:
+                raise HeaderNotFound(f"No header with hash {encode_hex(block_hash)} found")
+        return _decode_block_header(header_rlp)
+
+    async def coro_get_score(self, block_hash: Hash32) -> int:
+        try:
+            encoded_score = await self.async_db.coro_get(
+                SchemaV1.make_block_hash_to_score_lookup_key(block_hash)
+            )
+        except KeyError:
+            raise HeaderNotFound(f"No header with hash {encode_hex(block_hash)} found")
+        return rlp.decode(encoded_score, sedes=rlp.sedes.big_endian_int)
+
+    async def coro_header_exists(self, block_hash: Hash32) -> bool:
+        validate_word(block_hash, title="Block Hash")
+        if await self.async_db.coro_exists(block_hash):
+            return True
+        return await self._coro_get_frozen_header(block_hash) is not None
+
+    async def _coro_get_frozen_header(self, block_hash: Hash32) -> Optional[bytes]:
+        freezer = get_freezer()
+        if freezer is None:
+            return None
+
+        try:
+            encoded_number = await self.async_db.coro_get(
+                SchemaV1.make_frozen_header_number_key(block_hash)
+            )
+        except KeyError:
+            return None
+
+        block_number = BlockNumber(int.from_bytes(encoded_number, 'big'))
+        if freezer.has_block(block_number, block_hash):
+            return freezer.get_header(block_number)
+        else:
+            return None
+
+    async def coro_get_transaction_index(
+        self,
+        transaction_hash: Hash32,
+    ) -> Tuple[BlockNumber, int]:
+        key = SchemaV1.make_transaction_hash_to_block_lookup_key(transaction_hash)
+        try:
+            encoded_key = await self.async_db.coro_get(key)
+        except KeyError:
+            raise TransactionNotFound(
+                f"Transaction {encode_hex(transaction_hash)} "
+                "not found in canonical chain"
+            )
+
+        transaction_key = rlp.decode(encoded_key, sedes=BlockDataKey)
+        return (transaction_key.block_number, transaction_key.index)
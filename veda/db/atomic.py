@@ -4,6 +4,7 @@ from contextlib import (
 import logging
 from typing import (
     Iterator,
+    Tuple,
 )
 
 from eth_utils import (
@@ -17,9 +18,11 @@ from veda.abc import (
 from veda.db.backends.base import (
     BaseAtomicDB,
     BaseDB,
+    BaseDBSnapshot,
 )
 from veda.db.backends.memory import (
     MemoryDB,
+    MemoryDBSnapshot,
 )
 from veda.db.diff import (
     DBDiff,
@@ -57,6 +60,25 @@ class AtomicDB(BaseAtomicDB):
         with AtomicDBWriteBatch._commit_unless_raises(self) as readable_batch:
             yield readable_batch
 
+    def snapshot(self) -> BaseDBSnapshot:
+        if isinstance(self.wrapped_db, MemoryDB):
+            return MemoryDBSnapshot(dict(self.wrapped_db.kv_store))
+        else:
+            return super().snapshot()
+
+    def iterate(self,
+                start: bytes = None,
+                stop: bytes = None) -> Iterator[Tuple[bytes, bytes]]:
+        if not isinstance(self.wrapped_db, MemoryDB):
+            return super().iterate(start, stop)
+
+        kv_store = self.wrapped_db.kv_store
+        keys = sorted(
+            key for key in kv_store
+            if (start is None or key >= start) and (stop is None or key < stop)
+        )
+        return ((key, kv_store[key]) for key in keys if key in kv_store)
+
 
 class AtomicDBWriteBatch(BaseDB, AtomicWriteBatchAPI):
     """
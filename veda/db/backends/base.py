@@ -1,5 +1,16 @@
+from abc import (
+    abstractmethod,
+)
+import contextlib
 from typing import (
     Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from eth_utils import (
+    ValidationError,
 )
 
 from veda.abc import (
@@ -43,6 +54,9 @@ class BaseDB(DatabaseAPI):
         except KeyError:
             pass
 
+    def multi_get(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        return tuple(self.get(key) for key in keys)
+
     def __iter__(self) -> Iterator[bytes]:
         raise NotImplementedError("By default, DB classes cannot be iterated.")
 
@@ -78,4 +92,66 @@ class BaseAtomicDB(BaseDB, AtomicDatabaseAPI):
             # both be saved, or neither will
     """
 
-    pass
+    def snapshot(self) -> 'BaseDBSnapshot':
+        """
+        Return a read-only view of the database as it is right now. Writes made
+        afterwards are not visible through the snapshot.
+
+        Backends that can't take snapshots raise :class:`NotImplementedError`.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support snapshots")
+
+    def iterate(self,
+                start: bytes = None,
+                stop: bytes = None) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Iterate over the ``(key, value)`` pairs with ``start <= key < stop`` in key
+        order. A missing bound leaves that end of the range open.
+
+        Backends that can't iterate raise :class:`NotImplementedError`.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support iteration")
+
+    def seek(self,
+             start: bytes = None,
+             stop: bytes = None) -> Optional[Tuple[bytes, bytes]]:
+        """
+        Return the first ``(key, value)`` pair with ``start <= key < stop``, or
+        ``None`` if there is none.
+
+        Backends that can't iterate raise :class:`NotImplementedError`.
+        """
+        with contextlib.closing(iter(self.iterate(start, stop))) as items:
+            for item in items:
+                return item
+        return None
+
+
+class BaseDBSnapshot(BaseDB):
+    """
+    A read-only, point-in-time view of a database, as returned by
+    :meth:`BaseAtomicDB.snapshot`. Call :meth:`close` to release it.
+    """
+
+    def __setitem__(self, key: bytes, value: bytes) -> None:
+        raise ValidationError("Cannot write to a database snapshot")
+
+    def __delitem__(self, key: bytes) -> None:
+        raise ValidationError("Cannot delete from a database snapshot")
+
+    def iterate(self,
+                start: bytes = None,
+                stop: bytes = None) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Like :meth:`BaseAtomicDB.iterate`, over the contents of the snapshot.
+
+        Snapshots that can't iterate raise :class:`NotImplementedError`.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support iteration")
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        Release the resources held by the snapshot.
+        """
+        ...
@@ -8,6 +8,7 @@ from pathlib import (
 from typing import (
     TYPE_CHECKING,
     Iterator,
+    Tuple,
 )
 
 from eth_utils import (
@@ -29,6 +30,7 @@ from veda.db.diff import (
 from .base import (
     BaseAtomicDB,
     BaseDB,
+    BaseDBSnapshot,
 )
 
 if TYPE_CHECKING:
@@ -84,6 +86,44 @@ class LevelDB(BaseAtomicDB):
             finally:
                 readable_batch.decommission()
 
+    def snapshot(self) -> 'LevelDBSnapshot':
+        return LevelDBSnapshot(self.db.snapshot())
+
+    def iterate(self,
+                start: bytes = None,
+                stop: bytes = None) -> Iterator[Tuple[bytes, bytes]]:
+        with self.db.iterator(start=start, stop=stop) as iterator:
+            yield from iterator
+
+
+class LevelDBSnapshot(BaseDBSnapshot):
+    """
+    Read-only view of a :class:`LevelDB` backed by a native leveldb snapshot.
+    """
+
+    logger = logging.getLogger("veda.db.backends.LevelDBSnapshot")
+
+    def __init__(self, snapshot: "plyvel.Snapshot") -> None:
+        self._snapshot = snapshot
+
+    def __getitem__(self, key: bytes) -> bytes:
+        v = self._snapshot.get(key)
+        if v is None:
+            raise KeyError(key)
+        return v
+
+    def _exists(self, key: bytes) -> bool:
+        return self._snapshot.get(key) is not None
+
+    def iterate(self,
+                start: bytes = None,
+                stop: bytes = None) -> Iterator[Tuple[bytes, bytes]]:
+        with self._snapshot.iterator(start=start, stop=stop) as iterator:
+            yield from iterator
+
+    def close(self) -> None:
+        self._snapshot.close()
+
 
 class LevelDBWriteBatch(BaseDB, AtomicWriteBatchAPI):
     """
@@ -1,10 +1,12 @@
 from typing import (
     Dict,
     Iterator,
+    Tuple,
 )
 
 from .base import (
     BaseDB,
+    BaseDBSnapshot,
 )
 
 
@@ -37,3 +39,30 @@ class MemoryDB(BaseDB):
 
     def __repr__(self) -> str:
         return f"MemoryDB({self.kv_store!r})"
+
+
+class MemoryDBSnapshot(BaseDBSnapshot):
+    """
+    Read-only copy of the contents of a :class:`MemoryDB`.
+    """
+
+    def __init__(self, kv_store: Dict[bytes, bytes]) -> None:
+        self._kv_store = kv_store
+
+    def __getitem__(self, key: bytes) -> bytes:
+        return self._kv_store[key]
+
+    def _exists(self, key: bytes) -> bool:
+        return key in self._kv_store
+
+    def iterate(self,
+                start: bytes = None,
+                stop: bytes = None) -> Iterator[Tuple[bytes, bytes]]:
+        keys = sorted(
+            key for key in self._kv_store
+            if (start is None or key >= start) and (stop is None or key < stop)
+        )
+        return ((key, self._kv_store[key]) for key in keys)
+
+    def close(self) -> None:
+        self._kv_store = {}
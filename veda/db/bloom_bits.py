@@ -0,0 +1,251 @@
+import collections
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from eth_bloom.bloom import (
+    get_bloom_bits,
+)
+from eth_typing import (
+    Address,
+    BlockNumber,
+)
+
+from veda.abc import (
+    ChainDatabaseAPI,
+    DatabaseAPI,
+)
+from veda.db.log_index import (
+    TopicFilter,
+)
+from veda.db.schema import (
+    SchemaV1,
+)
+from veda.exceptions import (
+    HeaderNotFound,
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Number of blocks that share a bit row
+SECTION_SIZE = 4096
+
+ROW_BYTES = SECTION_SIZE // 8
+
+KEY_PREFIX = SchemaV1.make_bloom_bits_key(0, 0)[:-10]
+
+# The options of a criterion, each as the three bits it sets in a bloom
+BloomCriterion = Tuple[Tuple[int, ...], ...]
+
+
+def _get_set_bits(bloom: int) -> Tuple[int, ...]:
+    bits = []
+    while bloom:
+        lowest = bloom & -bloom
+        bits.append(lowest.bit_length() - 1)
+        bloom ^= lowest
+    return tuple(bits)
+
+
+def _get_value_bits(value: bytes) -> Tuple[int, ...]:
+    return tuple(bloom_bit.bit_length() - 1 for bloom_bit in get_bloom_bits(value))
+
+
+def _update_block_bloom_bits(db: DatabaseAPI,
+                             block_number: BlockNumber,
+                             bloom: int,
+                             is_set: bool) -> None:
+    bits = _get_set_bits(bloom)
+    if not bits:
+        return
+
+    section, offset = divmod(block_number, SECTION_SIZE)
+    byte_index, mask = divmod(offset, 8)
+    mask = 0x80 >> mask
+
+    keys = tuple(SchemaV1.make_bloom_bits_key(bit, section) for bit in bits)
+    for key, row in zip(keys, db.multi_get(keys)):
+        updated = bytearray(row or bytes(ROW_BYTES))
+        if is_set:
+            updated[byte_index] |= mask
+        else:
+            updated[byte_index] &= ~mask & 0xff
+
+        if is_set or any(updated):
+            db[key] = bytes(updated)
+        else:
+            db.delete(key)
+
+
+def add_block_bloom_bits(db: DatabaseAPI, block_number: BlockNumber, bloom: int) -> None:
+    """
+    Set the bit of the canonical block at ``block_number`` in the row of every bit
+    of its ``bloom``.
+    """
+    _update_block_bloom_bits(db, block_number, bloom, True)
+
+
+def remove_block_bloom_bits(db: DatabaseAPI, block_number: BlockNumber, bloom: int) -> None:
+    """
+    Clear the bits of a block that is no longer canonical at ``block_number``.
+    """
+    _update_block_bloom_bits(db, block_number, bloom, False)
+
+
+def get_bloom_bits_tail(db: DatabaseAPI) -> Optional[BlockNumber]:
+    """
+    Return the number of the first block from which on all canonical blocks are in
+    the bloom bits, or ``None`` if there are none.
+    """
+    encoded = db.get(SchemaV1.make_bloom_bits_tail_key())
+    if encoded is None:
+        return None
+    else:
+        return BlockNumber(int.from_bytes(encoded, 'big'))
+
+
+def set_bloom_bits_tail(db: DatabaseAPI, block_number: BlockNumber) -> None:
+    db[SchemaV1.make_bloom_bits_tail_key()] = block_number.to_bytes(8, 'big')
+
+
+def _match_section(rows: Dict[int, Optional[bytes]],
+                   criteria: Sequence[BloomCriterion]) -> List[int]:
+    # Return the offsets of the blocks that match every criterion in the section
+    if numpy is not None:
+        empty = numpy.zeros(ROW_BYTES, dtype=numpy.uint8)
+        vectors = {
+            bit: empty if row is None else numpy.frombuffer(row, dtype=numpy.uint8)
+            for bit, row in rows.items()
+        }
+        result = None
+        for criterion in criteria:
+            matches = empty
+            for option_bits in criterion:
+                option_matches = vectors[option_bits[0]]
+                for bit in option_bits[1:]:
+                    option_matches = option_matches & vectors[bit]
+                matches = matches | option_matches
+            result = matches if result is None else result & matches
+        if not result.any():
+            return []
+        return numpy.flatnonzero(numpy.unpackbits(result)).tolist()
+
+    int_vectors = {
+        bit: 0 if row is None else int.from_bytes(row, 'big') for bit, row in rows.items()
+    }
+    int_result = -1
+    for criterion in criteria:
+        int_matches = 0
+        for option_bits in criterion:
+            int_option_matches = -1
+            for bit in option_bits:
+                int_option_matches &= int_vectors[bit]
+            int_matches |= int_option_matches
+        int_result &= int_matches
+
+    # The first block of the section is the highest bit of the row
+    offsets = []
+    while int_result:
+        highest = int_result.bit_length() - 1
+        offsets.append(SECTION_SIZE - 1 - highest)
+        int_result ^= 1 << highest
+    return offsets
+
+
+def find_bloom_candidates(db: DatabaseAPI,
+                          from_block: BlockNumber,
+                          to_block: BlockNumber,
+                          addresses: Optional[Sequence[Address]],
+                          topics: TopicFilter) -> Tuple[BlockNumber, ...]:
+    """
+    Return the numbers of the blocks between ``from_block`` and ``to_block`` whose
+    bloom may have logs from one of ``addresses`` with the ``topics``, by combining
+    the bit rows of every address and topic option, one section at a time.
+
+    Needs at least one address or topic option. Bloom filters have false positives,
+    and don't know the positions of topics, so check the logs of every candidate.
+    """
+    criteria: List[BloomCriterion] = []
+    if addresses is not None:
+        criteria.append(tuple(_get_value_bits(address) for address in addresses))
+    for options in topics:
+        if options is not None:
+            criteria.append(tuple(_get_value_bits(topic) for topic in options))
+    if not criteria:
+        raise ValueError("Cannot look up blooms without an address or topic")
+
+    bits = sorted({bit for criterion in criteria for option in criterion for bit in option})
+    candidates: List[BlockNumber] = []
+    for section in range(from_block // SECTION_SIZE, to_block // SECTION_SIZE + 1):
+        keys = tuple(SchemaV1.make_bloom_bits_key(bit, section) for bit in bits)
+        rows = dict(zip(bits, db.multi_get(keys)))
+        section_start = section * SECTION_SIZE
+        candidates.extend(
+            BlockNumber(section_start + offset)
+            for offset in _match_section(rows, criteria)
+            if from_block <= section_start + offset <= to_block
+        )
+    return tuple(candidates)
+
+
+def rebuild_bloom_bits(chaindb: ChainDatabaseAPI, batch_size: int = 10000) -> int:
+    """
+    Write the bloom bits of every canonical block, replacing the previous ones. The
+    tail is only written at the end, so an interrupted run leaves them unused.
+
+    Needs a database that supports ``iterate()``. Returns the number of blocks
+    written.
+    """
+    db = chaindb.db
+    with db.atomic_batch() as write_batch:
+        write_batch.delete(SchemaV1.make_bloom_bits_tail_key())
+
+    # Remove the rows of the previous run
+    stop = KEY_PREFIX[:-1] + bytes((KEY_PREFIX[-1] + 1,))
+    stale_keys = [key for key, _ in db.iterate(KEY_PREFIX, stop)]
+    for index in range(0, len(stale_keys), batch_size):
+        with db.atomic_batch() as write_batch:
+            for key in stale_keys[index:index + batch_size]:
+                write_batch.delete(key)
+
+    rows: Dict[int, bytearray] = collections.defaultdict(lambda: bytearray(ROW_BYTES))
+
+    def flush(section: int) -> None:
+        with db.atomic_batch() as write_batch:
+            for bit, row in rows.items():
+                write_batch[SchemaV1.make_bloom_bits_key(bit, section)] = bytes(row)
+        rows.clear()
+
+    # Walk down from the head, until the first block of the canonical chain
+    block_number = chaindb.get_canonical_head().block_number
+    section = block_number // SECTION_SIZE
+    block_count = 0
+    while block_number >= 0:
+        try:
+            header = chaindb.get_canonical_block_header_by_number(BlockNumber(block_number))
+        except HeaderNotFound:
+            break
+
+        if block_number // SECTION_SIZE != section:
+            flush(section)
+            section = block_number // SECTION_SIZE
+
+        byte_index, mask = divmod(block_number % SECTION_SIZE, 8)
+        for bit in _get_set_bits(header.bloom):
+            rows[bit][byte_index] |= 0x80 >> mask
+
+        block_count += 1
+        block_number -= 1
+
+    flush(section)
+    with db.atomic_batch() as write_batch:
+        set_bloom_bits_tail(write_batch, BlockNumber(block_number + 1))
+    return block_count
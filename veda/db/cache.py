@@ -1,11 +1,28 @@
+from contextlib import (
+    contextmanager,
+)
+import threading
+from typing import (
+    Dict,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
 from lru import (
     LRU,
 )
 
 from veda.abc import (
+    AtomicDatabaseAPI,
+    AtomicWriteBatchAPI,
     DatabaseAPI,
 )
 from veda.db.backends.base import (
+    BaseAtomicDB,
     BaseDB,
 )
 
@@ -37,3 +54,176 @@ class CacheDB(BaseDB):
         if key in self._cached_values:
             del self._cached_values[key]
         del self._db[key]
+
+
+DEFAULT_TRIE_NODE_CACHE_SIZE = 64 * 1024 * 1024
+
+
+class TrieNodeCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+    size: int
+
+
+class TrieNodeCache:
+    """
+    A least recently used cache of trie nodes, bounded by the total size of the
+    cached nodes in bytes.
+
+    Nodes are looked up by their hash, so they never change and the cache never has
+    to be invalidated. Values that don't belong to a 32 byte key are not cached.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_TRIE_NODE_CACHE_SIZE) -> None:
+        self._max_size = max_size
+        # The byte budget is enforced below, every node takes at least one byte
+        self._nodes = LRU(max(max_size, 1))
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        value = self._nodes.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def add(self, key: bytes, value: bytes) -> None:
+        if len(key) != 32 or len(value) > self._max_size:
+            return
+
+        with self._lock:
+            if key in self._nodes:
+                return
+            self._nodes[key] = value
+            self._size += len(value)
+            while self._size > self._max_size:
+                _, evicted = self._nodes.popitem(least_recent=True)
+                self._size -= len(evicted)
+
+    def discard(self, key: bytes) -> None:
+        with self._lock:
+            value = self._nodes.pop(key, None)
+            if value is not None:
+                self._size -= len(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._nodes.clear()
+            self._size = 0
+
+    def stats(self) -> TrieNodeCacheStats:
+        return TrieNodeCacheStats(self.hits, self.misses, len(self._nodes), self._size)
+
+
+_trie_node_cache = TrieNodeCache()
+
+
+def get_trie_node_cache() -> TrieNodeCache:
+    """
+    Return the trie node cache shared by all state databases in this process.
+    """
+    return _trie_node_cache
+
+
+def configure_trie_node_cache(max_size: int) -> None:
+    """
+    Replace the trie node cache of this process with an empty one of ``max_size``
+    bytes. A size of zero disables caching.
+    """
+    global _trie_node_cache
+    _trie_node_cache = TrieNodeCache(max_size)
+
+
+class TrieNodeCacheDB(BaseAtomicDB):
+    """
+    Serve reads of content addressed values, like trie nodes and bytecode, from a
+    :class:`TrieNodeCache`, and fill the cache with everything read or written.
+
+    Must only wrap databases where a key always maps to the same value.
+    """
+
+    def __init__(self, db: AtomicDatabaseAPI, node_cache: TrieNodeCache = None) -> None:
+        self._db = db
+        if node_cache is None:
+            self._node_cache = get_trie_node_cache()
+        else:
+            self._node_cache = node_cache
+
+    def __getitem__(self, key: bytes) -> bytes:
+        value = self._node_cache.get(key)
+        if value is None:
+            value = self._db[key]
+            self._node_cache.add(key, value)
+        return value
+
+    def multi_get(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        values = [self._node_cache.get(key) for key in keys]
+        missing_keys = tuple(key for key, value in zip(keys, values) if value is None)
+        if not missing_keys:
+            return tuple(values)
+
+        fetched = iter(self._db.multi_get(missing_keys))
+        for index, value in enumerate(values):
+            if value is None:
+                value = values[index] = next(fetched)
+                if value is not None:
+                    self._node_cache.add(keys[index], value)
+        return tuple(values)
+
+    def __setitem__(self, key: bytes, value: bytes) -> None:
+        self._db[key] = value
+        self._node_cache.add(key, value)
+
+    def __delitem__(self, key: bytes) -> None:
+        self._node_cache.discard(key)
+        del self._db[key]
+
+    def _exists(self, key: bytes) -> bool:
+        # A cached node may belong to a write that was rolled back, so ask the database
+        return key in self._db
+
+    @contextmanager
+    def atomic_batch(self) -> Iterator[AtomicWriteBatchAPI]:
+        with self._db.atomic_batch() as write_batch:
+            caching_batch = _TrieNodeCacheWriteBatch(write_batch)
+            yield caching_batch
+
+        # Only cache the writes once they are committed
+        for key, value in caching_batch.written.items():
+            self._node_cache.add(key, value)
+        for key in caching_batch.deleted:
+            self._node_cache.discard(key)
+
+
+class _TrieNodeCacheWriteBatch(BaseDB, AtomicWriteBatchAPI):
+    def __init__(self, write_batch: AtomicWriteBatchAPI) -> None:
+        self._write_batch = write_batch
+        self.written: Dict[bytes, bytes] = {}
+        self.deleted: Set[bytes] = set()
+
+    def __getitem__(self, key: bytes) -> bytes:
+        return self._write_batch[key]
+
+    def __setitem__(self, key: bytes, value: bytes) -> None:
+        self._write_batch[key] = value
+        # Other keys, like those of the flat state snapshot, are not content addressed
+        if len(key) == 32:
+            self.written[key] = value
+            self.deleted.discard(key)
+
+    def __delitem__(self, key: bytes) -> None:
+        del self._write_batch[key]
+        self.written.pop(key, None)
+        self.deleted.add(key)
+
+    def _exists(self, key: bytes) -> bool:
+        return key in self._write_batch
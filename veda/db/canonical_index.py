@@ -0,0 +1,422 @@
+import contextlib
+import contextvars
+import logging
+import mmap
+import os
+import pathlib
+import struct
+import threading
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from eth_typing import (
+    BlockNumber,
+    Hash32,
+)
+import rlp
+
+from veda.abc import (
+    DatabaseAPI,
+)
+from veda.db.freezer import (
+    get_frozen_header,
+)
+from veda.db.schema import (
+    SchemaV1,
+)
+from veda.vm.header import (
+    HeaderSedes,
+)
+
+
+HASH_BYTES = 32
+
+# Start and end offset of an encoded header in the headers file
+HEADER_ENTRY = struct.Struct('>QQ')
+
+# First block number, block count, generation and end of the header data
+META = struct.Struct('>QQQQ')
+GENERATION_OFFSET = 16
+
+# The files grow in steps, so readers rarely need to map them again
+GROWTH_BYTES = 1024 * 1024
+
+NUMBER_TO_HASH_PREFIX = SchemaV1.make_block_number_to_hash_lookup_key(BlockNumber(0))[:-1]
+
+
+_pinned_bounds: contextvars.ContextVar[Optional[Tuple[int, int]]] = contextvars.ContextVar(
+    '_pinned_bounds',
+    default=None,
+)
+"""
+Last block number and generation of the tables that reads in the current context
+may use, if they are limited, see :func:`pin_canonical_index`.
+"""
+
+# Bounds no block is within, as no generation is negative
+_NO_BOUNDS = (-1, -1)
+
+
+class CanonicalIndex:
+    """
+    Dense tables of the canonical chain by block number, memory mapped for reading:
+    the block hashes as a fixed width array, and the encoded headers with a table of
+    their offsets. Any process can read them without a round trip to the database.
+
+    The database process keeps the tables in step with the canonical chain, see
+    :class:`CanonicalIndexWriter`. Blocks that aren't in the tables, or that are
+    being rewritten after a reorg, return ``None``, so read them from the database.
+    """
+
+    def __init__(self, directory: pathlib.Path) -> None:
+        self.directory = directory
+        self._paths = {
+            name: directory / name for name in ('meta', 'hashes', 'header-offsets', 'headers')
+        }
+        self._map_lock = threading.Lock()
+        self._maps: Dict[str, Union[mmap.mmap, bytes]] = {}
+
+    def _get_map(self, name: str, size: int) -> Optional[Union[mmap.mmap, bytes]]:
+        # Return a map of the file that covers at least ``size`` bytes
+        mapped = self._maps.get(name, b"")
+        if len(mapped) >= size:
+            return mapped
+        with self._map_lock:
+            try:
+                with open(self._paths[name], 'rb') as file:
+                    if os.fstat(file.fileno()).st_size < size:
+                        return None
+                    # Files never shrink, so a map stays valid while it is used
+                    mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except FileNotFoundError:
+                return None
+            self._maps[name] = mapped
+            return mapped
+
+    def _read_meta(self) -> Optional[Tuple[int, int, int, int]]:
+        meta = self._get_map('meta', META.size)
+        if meta is None:
+            return None
+        return META.unpack(meta[:META.size])
+
+    def _is_unchanged(self, generation: int) -> bool:
+        meta = self._maps['meta']
+        return meta[GENERATION_OFFSET:GENERATION_OFFSET + 8] == generation.to_bytes(8, 'big')
+
+    def get_bounds(self) -> Optional[Tuple[BlockNumber, int]]:
+        """
+        Return the last block number in the tables and their generation, or ``None``
+        if they are empty or a reorg is being written.
+
+        Blocks up to that number can be read as of then while the generation stays
+        the same, because rewriting any of them changes it.
+        """
+        meta = self._read_meta()
+        if meta is None:
+            return None
+        first_block_number, block_count, generation, _ = meta
+        if generation % 2 or not block_count:
+            return None
+        return BlockNumber(first_block_number + block_count - 1), generation
+
+    def _get_position(self, block_number: BlockNumber) -> Optional[Tuple[int, int]]:
+        meta = self._read_meta()
+        if meta is None:
+            return None
+        first_block_number, block_count, generation, _ = meta
+        # An odd generation means a reorg is being written
+        if generation % 2 or not 0 <= block_number - first_block_number < block_count:
+            return None
+
+        # Pinned reads only see the tables as they were when the bounds were taken
+        pinned_bounds = _pinned_bounds.get()
+        if pinned_bounds is not None:
+            last_block_number, pinned_generation = pinned_bounds
+            if block_number > last_block_number or generation != pinned_generation:
+                return None
+        return block_number - first_block_number, generation
+
+    def get_hash(self, block_number: BlockNumber) -> Optional[Hash32]:
+        """
+        Return the hash of the canonical block at ``block_number``, or ``None`` if it
+        isn't in the tables.
+        """
+        position = self._get_position(block_number)
+        if position is None:
+            return None
+        index, generation = position
+
+        hashes = self._get_map('hashes', (index + 1) * HASH_BYTES)
+        if hashes is None:
+            return None
+        block_hash = hashes[index * HASH_BYTES:(index + 1) * HASH_BYTES]
+        if self._is_unchanged(generation):
+            return Hash32(block_hash)
+        else:
+            return None
+
+    def get_header(self, block_number: BlockNumber) -> Optional[bytes]:
+        """
+        Return the encoded header of the canonical block at ``block_number``, or
+        ``None`` if it isn't in the tables.
+        """
+        position = self._get_position(block_number)
+        if position is None:
+            return None
+        index, generation = position
+
+        offsets = self._get_map('header-offsets', (index + 1) * HEADER_ENTRY.size)
+        if offsets is None:
+            return None
+        start, end = HEADER_ENTRY.unpack_from(offsets, index * HEADER_ENTRY.size)
+        headers = self._get_map('headers', end)
+        if headers is None:
+            return None
+        encoded_header = headers[start:end]
+        if self._is_unchanged(generation):
+            return encoded_header
+        else:
+            return None
+
+
+class CanonicalIndexWriter:
+    """
+    Keeps the tables of a :class:`CanonicalIndex` in step with the canonical chain in
+    ``db``. Only the database process writes them: it passes the keys of every write
+    to :meth:`update` once the write is committed, and before the client gets the
+    response, so the tables are never behind what the client wrote.
+
+    Blocks are appended as they become canonical. A write that changes the block at
+    a number that is in the tables already is a reorg: the tables are cut back to
+    that number, and rewritten from the database.
+    """
+    logger = logging.getLogger('veda.db.canonical_index.CanonicalIndexWriter')
+
+    # Number of blocks to append at a time while catching up
+    batch_size = 1024
+
+    def __init__(self, directory: pathlib.Path, db: DatabaseAPI) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self._db = db
+        self._lock = threading.Lock()
+        self._caught_up = False
+
+        self._fds = {
+            name: os.open(directory / name, os.O_RDWR | os.O_CREAT)
+            for name in ('meta', 'hashes', 'header-offsets', 'headers')
+        }
+        encoded_meta = os.pread(self._fds['meta'], META.size, 0)
+        if len(encoded_meta) == META.size:
+            meta = META.unpack(encoded_meta)
+        else:
+            meta = (0, 0, 0, 0)
+        self._first_block_number, self._block_count, self._generation, self._data_end = meta
+        # A writer that stopped while rewriting a reorg left an odd generation
+        self._generation += self._generation % 2
+        self._write_meta()
+
+    def _write_meta(self) -> None:
+        os.pwrite(self._fds['meta'], META.pack(
+            self._first_block_number,
+            self._block_count,
+            self._generation,
+            self._data_end,
+        ), 0)
+
+    def _write_at(self, name: str, data: bytes, offset: int) -> None:
+        fd = self._fds[name]
+        size = os.fstat(fd).st_size
+        if offset + len(data) > size:
+            os.ftruncate(fd, offset + len(data) + GROWTH_BYTES)
+        os.pwrite(fd, data, offset)
+
+    def catch_up(self) -> None:
+        """
+        Check the last blocks in the tables against the database, and append the
+        canonical blocks that are missing. Meant to run on a thread when the database
+        process starts, while it serves requests.
+        """
+        while True:
+            with self._lock:
+                if not self._fds:
+                    return
+                block_number = self._first_block_number + self._block_count - 1
+                if not self._block_count or (
+                        self._get_canonical_hash(block_number) == self._read_hash(block_number)):
+                    break
+                self._truncate(BlockNumber(block_number))
+
+        while True:
+            with self._lock:
+                if not self._fds:
+                    return
+                if not self._append_canonical_blocks(self.batch_size):
+                    self._caught_up = True
+                    break
+        self.logger.info(
+            "Canonical index has %d blocks from #%d on",
+            self._block_count,
+            self._first_block_number,
+        )
+
+    def update(self, keys: Iterable[bytes]) -> None:
+        """
+        Update the tables after a write of ``keys`` to the database.
+        """
+        changed_numbers = [
+            int(key[len(NUMBER_TO_HASH_PREFIX):])
+            for key in keys
+            if key.startswith(NUMBER_TO_HASH_PREFIX)
+        ]
+        if not changed_numbers:
+            return
+
+        with self._lock:
+            lowest = min(changed_numbers)
+            if lowest < self._first_block_number + self._block_count:
+                self._truncate(BlockNumber(lowest))
+            # Until the initial catch up is done, it appends the new blocks too
+            if self._caught_up:
+                while self._append_canonical_blocks(self.batch_size):
+                    pass
+
+    def _truncate(self, block_number: BlockNumber) -> None:
+        # Readers that started before check the generation, and retry in the database
+        self._generation += 1
+        self._write_meta()
+        self._block_count = max(0, block_number - self._first_block_number)
+        if self._block_count:
+            last_entry = os.pread(
+                self._fds['header-offsets'],
+                HEADER_ENTRY.size,
+                (self._block_count - 1) * HEADER_ENTRY.size,
+            )
+            _, self._data_end = HEADER_ENTRY.unpack(last_entry)
+        else:
+            self._data_end = 0
+        self._write_meta()
+        self._generation += 1
+        self._write_meta()
+
+    def _read_hash(self, block_number: int) -> bytes:
+        offset = (block_number - self._first_block_number) * HASH_BYTES
+        return os.pread(self._fds['hashes'], HASH_BYTES, offset)
+
+    def _get_canonical_hash(self, block_number: int) -> Optional[Hash32]:
+        encoded = self._db.get(
+            SchemaV1.make_block_number_to_hash_lookup_key(BlockNumber(block_number))
+        )
+        if encoded is None:
+            return None
+        return rlp.decode(encoded, sedes=rlp.sedes.binary)
+
+    def _find_first_canonical_block_number(self) -> Optional[BlockNumber]:
+        head_hash = self._db.get(SchemaV1.make_canonical_head_hash_lookup_key())
+        if head_hash is None:
+            return None
+        encoded_head = self._db.get(head_hash)
+        if encoded_head is None:
+            return None
+
+        # The canonical chain has no gaps from the genesis on, so search for its start
+        low, high = 0, rlp.decode(encoded_head, sedes=HeaderSedes).block_number
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_canonical_hash(middle) is None:
+                low = middle + 1
+            else:
+                high = middle
+        return BlockNumber(low)
+
+    def _append_canonical_blocks(self, limit: int) -> int:
+        if not self._block_count:
+            first_block_number = self._find_first_canonical_block_number()
+            if first_block_number is None:
+                return 0
+            self._first_block_number = first_block_number
+            self._data_end = 0
+
+        next_block_number = self._first_block_number + self._block_count
+        hashes: List[bytes] = []
+        encoded_headers: List[bytes] = []
+        for block_number in range(next_block_number, next_block_number + limit):
+            block_hash = self._get_canonical_hash(block_number)
+            if block_hash is None:
+                break
+            encoded_header = self._db.get(block_hash)
+            if encoded_header is None:
+                encoded_header = get_frozen_header(self._db, block_hash)
+                if encoded_header is None:
+                    break
+            hashes.append(block_hash)
+            encoded_headers.append(encoded_header)
+
+        if not hashes:
+            return 0
+
+        offsets = []
+        data_end = self._data_end
+        for encoded_header in encoded_headers:
+            offsets.append(HEADER_ENTRY.pack(data_end, data_end + len(encoded_header)))
+            data_end += len(encoded_header)
+
+        # Write the entries before the count that makes them visible
+        index = self._block_count
+        self._write_at('headers', b"".join(encoded_headers), self._data_end)
+        self._write_at('header-offsets', b"".join(offsets), index * HEADER_ENTRY.size)
+        self._write_at('hashes', b"".join(hashes), index * HASH_BYTES)
+        self._data_end = data_end
+        self._block_count += len(hashes)
+        self._write_meta()
+        return len(hashes)
+
+    def close(self) -> None:
+        with self._lock:
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds = {}
+
+
+_canonical_index: Optional[CanonicalIndex] = None
+
+
+def get_canonical_index() -> Optional[CanonicalIndex]:
+    """
+    Return the canonical index this process reads, or ``None`` if it has none.
+    """
+    return _canonical_index
+
+
+def configure_canonical_index(directory: Optional[pathlib.Path]) -> None:
+    """
+    Read canonical block hashes and headers from the tables in ``directory`` in this
+    process. The directory doesn't need to exist yet.
+    """
+    global _canonical_index
+    if directory is None:
+        _canonical_index = None
+    else:
+        _canonical_index = CanonicalIndex(directory)
+
+
+@contextlib.contextmanager
+def pin_canonical_index(bounds: Optional[Tuple[BlockNumber, int]]) -> Iterator[None]:
+    """
+    Only read the blocks up to the number in ``bounds`` from the canonical index in
+    this context, and only while the tables are still at the generation in
+    ``bounds``, as returned by :meth:`CanonicalIndex.get_bounds`. With no bounds,
+    reads in this context don't use the tables at all.
+    """
+    token = _pinned_bounds.set(_NO_BOUNDS if bounds is None else bounds)
+    try:
+        yield
+    finally:
+        _pinned_bounds.reset(token)
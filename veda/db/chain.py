@@ -1,8 +1,13 @@
+import collections
 import functools
 import itertools
+import logging
 from typing import (
+    Counter,
     Dict,
     Iterable,
+    List,
+    Optional,
     Sequence,
     Tuple,
     Type,
@@ -38,9 +43,16 @@ from veda.abc import (
     TransactionDecoderAPI,
 )
 from veda.constants import (
+    BLANK_ROOT_HASH,
     EMPTY_UNCLE_HASH,
     GENESIS_PARENT_HASH,
 )
+from veda.db.bloom_bits import (
+    add_block_bloom_bits,
+    get_bloom_bits_tail,
+    remove_block_bloom_bits,
+    set_bloom_bits_tail,
+)
 from veda.db.chain_gaps import (
     GENESIS_CHAIN_GAPS,
     GapChange,
@@ -49,8 +61,20 @@ from veda.db.chain_gaps import (
     is_block_number_in_gap,
     reopen_gap,
 )
+from veda.db.freezer import (
+    Freezer,
+    FrozenBlock,
+    get_freezer,
+)
 from veda.db.header import (
     HeaderDB,
+    _decode_block_header,
+)
+from veda.db.log_index import (
+    get_log_index_tail,
+    index_block_logs,
+    set_log_index_tail,
+    unindex_block_logs,
 )
 from veda.db.schema import (
     SchemaV1,
@@ -63,6 +87,9 @@ from veda.exceptions import (
     ReceiptNotFound,
     TransactionNotFound,
 )
+from veda.rlp.receipts import (
+    Receipt,
+)
 from veda.rlp.sedes import (
     chain_gaps,
 )
@@ -95,7 +122,59 @@ class BlockDataKey(rlp.Serializable):
     ]
 
 
+# The most blocks that a single call to ChainDB.freeze_blocks() moves to the freezer
+FREEZE_BATCH_SIZE = 1024
+
+BLOCK_DATA_OFFSET_BYTES = 4
+
+
+def _encode_block_data(encoded_items: Sequence[bytes]) -> bytes:
+    """
+    Concatenate the encoded transactions or receipts of a block, after their count and
+    the end offset of every item, so that any item can be sliced out directly.
+    """
+    offsets = []
+    end = 0
+    for encoded_item in encoded_items:
+        end += len(encoded_item)
+        offsets.append(end.to_bytes(BLOCK_DATA_OFFSET_BYTES, 'big'))
+    return b"".join((
+        len(encoded_items).to_bytes(BLOCK_DATA_OFFSET_BYTES, 'big'),
+        *offsets,
+        *encoded_items,
+    ))
+
+
+def _get_block_data_item(block_data: bytes, index: int) -> bytes:
+    """
+    Return an item of :func:`_encode_block_data`, or ``b""`` if there is none at
+    ``index``.
+    """
+    count = int.from_bytes(block_data[:BLOCK_DATA_OFFSET_BYTES], 'big')
+    if not 0 <= index < count:
+        return b""
+
+    data_start = BLOCK_DATA_OFFSET_BYTES * (count + 1)
+    end_position = BLOCK_DATA_OFFSET_BYTES * (index + 1)
+    if index:
+        start = int.from_bytes(
+            block_data[end_position - BLOCK_DATA_OFFSET_BYTES:end_position],
+            'big',
+        )
+    else:
+        start = 0
+    end = int.from_bytes(block_data[end_position:end_position + BLOCK_DATA_OFFSET_BYTES], 'big')
+    return block_data[data_start + start:data_start + end]
+
+
+def _decode_block_data(block_data: bytes) -> Tuple[bytes, ...]:
+    count = int.from_bytes(block_data[:BLOCK_DATA_OFFSET_BYTES], 'big')
+    return tuple(_get_block_data_item(block_data, index) for index in range(count))
+
+
 class ChainDB(HeaderDB, ChainDatabaseAPI):
+    logger = logging.getLogger('veda.db.chain.ChainDB')
+
     def __init__(self, db: AtomicDatabaseAPI) -> None:
         self.db = db
 
@@ -217,7 +296,7 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
         receipts: Tuple[ReceiptAPI, ...],
         genesis_parent_hash: Hash32 = GENESIS_PARENT_HASH,
     ) -> Tuple[Tuple[Hash32, ...], Tuple[Hash32, ...]]:
-        tx_root_hash, tx_kv_nodes = make_trie_root_and_nodes(block.transactions)
+        tx_root_hash, _ = make_trie_root_and_nodes(block.transactions)
 
         if tx_root_hash != block.header.transaction_root:
             raise ValidationError(
@@ -225,7 +304,7 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
                 f"does not match expected value: {tx_root_hash!r}"
             )
 
-        receipt_root_hash, receipt_kv_nodes = make_trie_root_and_nodes(receipts)
+        receipt_root_hash, _ = make_trie_root_and_nodes(receipts)
 
         if receipt_root_hash != block.header.receipt_root:
             raise ValidationError(
@@ -234,8 +313,16 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
             )
 
         with self.db.atomic_batch() as db:
-            self._persist_trie_data_dict(db, receipt_kv_nodes)
-            self._persist_trie_data_dict(db, tx_kv_nodes)
+            self._persist_block_data(
+                db,
+                receipt_root_hash,
+                tuple(receipt.encode() for receipt in receipts),
+            )
+            self._persist_block_data(
+                db,
+                tx_root_hash,
+                tuple(transaction.encode() for transaction in block.transactions),
+            )
 
             return self._persist_block(db, block, genesis_parent_hash)
 
@@ -248,6 +335,12 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
             db, header_chain, genesis_parent_hash
         )
 
+        for header in old_canonical_headers:
+            remove_block_bloom_bits(db, header.block_number, header.bloom)
+            receipts = cls._get_stored_block_receipts(db, header)
+            if receipts:
+                unindex_block_logs(db, header.block_number, receipts)
+
         for header in new_canonical_headers:
             if header.hash == block.hash:
                 # Most of the time this is called to persist a block whose parent is the
@@ -262,6 +355,16 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
                     db, transaction_hash, header, index
                 )
 
+            receipts = cls._get_stored_block_receipts(db, header)
+            if receipts:
+                index_block_logs(db, header.block_number, receipts)
+            add_block_bloom_bits(db, header.block_number, header.bloom)
+            # Blocks imported before the first indexed one are only indexed by a rebuild
+            if get_log_index_tail(db) is None:
+                set_log_index_tail(db, header.block_number)
+            if get_bloom_bits_tail(db) is None:
+                set_bloom_bits_tail(db, header.block_number)
+
         # if block.uncles:
         #     uncles_hash = cls._persist_uncles(db, block.uncles)
         # else:
@@ -278,6 +381,24 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
         cls._update_chain_gaps(db, block)
         return new_canonical_hashes, old_canonical_hashes
 
+    @classmethod
+    def _get_stored_block_receipts(
+        cls, db: DatabaseAPI, header: BlockHeaderAPI
+    ) -> Tuple[ReceiptAPI, ...]:
+        """
+        Return the receipts of a block for the log index, or nothing if they were
+        never stored.
+        """
+        if header.receipt_root == BLANK_ROOT_HASH:
+            return ()
+        try:
+            return tuple(
+                Receipt.decode(encoded)
+                for encoded in cls._get_block_data_from_root_hash(db, header.receipt_root)
+            )
+        except MissingTrieNode:
+            return ()
+
     #
     # Block Data API (Transactions, Receipts, and Withdrawals)
     #
@@ -291,6 +412,12 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
         useful for retrieving encoded transactions or withdrawals from the
         transaction_root or withdrawals_root of a block.
         """
+        block_data = db.get(SchemaV1.make_block_data_key(block_root_hash))
+        if block_data is not None:
+            yield from _decode_block_data(block_data)
+            return
+
+        # Stored as a trie, before the block data was stored flat
         item_db = HexaryTrie(db, root_hash=block_root_hash)
         for item_idx in itertools.count():
             item_key = rlp.encode(item_idx)
@@ -300,6 +427,44 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
             else:
                 break
 
+    @staticmethod
+    def _get_block_data_item_from_root_hash(
+        db: DatabaseAPI,
+        block_root_hash: Hash32,
+        index: int,
+    ) -> bytes:
+        """
+        Return a single encoded item from a root hash in a block, or ``b""`` if there is
+        none at ``index``.
+        """
+        block_data = db.get(SchemaV1.make_block_data_key(block_root_hash))
+        if block_data is not None:
+            return _get_block_data_item(block_data, index)
+        else:
+            return HexaryTrie(db, root_hash=block_root_hash)[rlp.encode(index)]
+
+    def persist_block_data(self, root_hash: Hash32, encoded_items: Sequence[bytes]) -> None:
+        with self.db.atomic_batch() as db:
+            self._persist_block_data(db, root_hash, encoded_items)
+
+    @staticmethod
+    def _persist_block_data(
+        db: DatabaseAPI, root_hash: Hash32, encoded_items: Sequence[bytes]
+    ) -> None:
+        if not encoded_items:
+            # Nothing to read from an empty trie
+            return
+        db[SchemaV1.make_block_data_key(root_hash)] = _encode_block_data(encoded_items)
+
+        freezer = get_freezer()
+        if freezer is not None and freezer.writable:
+            # Count the blocks that use the data, so that freezing a block doesn't
+            # delete data that another block shares, like a list of equal receipts
+            refcount_key = SchemaV1.make_block_data_refcount_key(root_hash)
+            encoded = db.get(refcount_key)
+            refcount = 0 if encoded is None else int.from_bytes(encoded, 'big')
+            db[refcount_key] = (refcount + 1).to_bytes(4, 'big')
+
     #
     # Transaction API
     #
@@ -323,6 +488,13 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
     def get_block_transactions(
         self, header: BlockHeaderAPI, transaction_decoder: Type[TransactionDecoderAPI]
     ) -> Tuple[SignedTransactionAPI, ...]:
+        freezer = self._get_block_freezer(header.block_number, header.hash)
+        if freezer is not None:
+            return tuple(
+                transaction_decoder.decode(encoded_transaction)
+                for encoded_transaction in freezer.get_transactions(header.block_number)
+            )
+
         return self._get_block_transactions(
             header.transaction_root, transaction_decoder
         )
@@ -341,10 +513,16 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
     def _get_block_transaction_hashes(
         cls, db: DatabaseAPI, block_header: BlockHeaderAPI
     ) -> Iterable[Hash32]:
-        all_encoded_transactions = cls._get_block_data_from_root_hash(
-            db,
-            block_header.transaction_root,
-        )
+        freezer = cls._get_block_freezer(block_header.block_number, block_header.hash)
+        if freezer is not None:
+            all_encoded_transactions: Iterable[bytes] = freezer.get_transactions(
+                block_header.block_number,
+            )
+        else:
+            all_encoded_transactions = cls._get_block_data_from_root_hash(
+                db,
+                block_header.transaction_root,
+            )
         for encoded_transaction in all_encoded_transactions:
             yield cast(Hash32, keccak(encoded_transaction))
 
@@ -352,14 +530,14 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
     def get_receipts(
         self, header: BlockHeaderAPI, receipt_decoder: Type[ReceiptDecoderAPI]
     ) -> Iterable[ReceiptAPI]:
-        receipt_db = HexaryTrie(db=self.db, root_hash=header.receipt_root)
-        for receipt_idx in itertools.count():
-            receipt_key = rlp.encode(receipt_idx)
-            receipt_data = receipt_db[receipt_key]
-            if receipt_data != b"":
+        freezer = self._get_block_freezer(header.block_number, header.hash)
+        if freezer is not None:
+            for receipt_data in freezer.get_receipts(header.block_number):
                 yield receipt_decoder.decode(receipt_data)
-            else:
-                break
+            return
+
+        for receipt_data in self._get_block_data_from_root_hash(self.db, header.receipt_root):
+            yield receipt_decoder.decode(receipt_data)
 
     def get_transaction_by_index(
         self,
@@ -368,14 +546,29 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
         transaction_decoder: Type[TransactionDecoderAPI],
     ) -> SignedTransactionAPI:
         try:
-            block_header = self.get_canonical_block_header_by_number(block_number)
+            block_hash = self.get_canonical_block_hash(block_number)
         except HeaderNotFound:
             raise TransactionNotFound(
                 f"Block {block_number} is not in the canonical chain"
             )
-        transaction_db = HexaryTrie(self.db, root_hash=block_header.transaction_root)
-        encoded_index = rlp.encode(transaction_index)
-        encoded_transaction = transaction_db[encoded_index]
+
+        freezer = self._get_block_freezer(block_number, block_hash)
+        if freezer is not None:
+            encoded_transactions = freezer.get_transactions(block_number)
+            if transaction_index < len(encoded_transactions):
+                return transaction_decoder.decode(encoded_transactions[transaction_index])
+            else:
+                raise TransactionNotFound(
+                    f"No transaction is at index {transaction_index} "
+                    f"of block {block_number}"
+                )
+
+        block_header = self.get_block_header_by_hash(block_hash)
+        encoded_transaction = self._get_block_data_item_from_root_hash(
+            self.db,
+            block_header.transaction_root,
+            transaction_index,
+        )
         if encoded_transaction != b"":
             return transaction_decoder.decode(encoded_transaction)
         else:
@@ -406,13 +599,26 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
         receipt_decoder: Type[ReceiptDecoderAPI],
     ) -> ReceiptAPI:
         try:
-            block_header = self.get_canonical_block_header_by_number(block_number)
+            block_hash = self.get_canonical_block_hash(block_number)
         except HeaderNotFound:
             raise ReceiptNotFound(f"Block {block_number} is not in the canonical chain")
 
-        receipt_db = HexaryTrie(db=self.db, root_hash=block_header.receipt_root)
-        receipt_key = rlp.encode(receipt_index)
-        receipt_data = receipt_db[receipt_key]
+        freezer = self._get_block_freezer(block_number, block_hash)
+        if freezer is not None:
+            encoded_receipts = freezer.get_receipts(block_number)
+            if receipt_index < len(encoded_receipts):
+                return receipt_decoder.decode(encoded_receipts[receipt_index])
+            else:
+                raise ReceiptNotFound(
+                    f"Receipt with index {receipt_index} not found in block"
+                )
+
+        block_header = self.get_block_header_by_hash(block_hash)
+        receipt_data = self._get_block_data_item_from_root_hash(
+            self.db,
+            block_header.receipt_root,
+            receipt_index,
+        )
         if receipt_data != b"":
             return receipt_decoder.decode(receipt_data)
         else:
@@ -521,3 +727,131 @@ class ChainDB(HeaderDB, ChainDatabaseAPI):
     ) -> None:
         for key, value in trie_data_dict.items():
             db[key] = value
+
+    #
+    # Freezer API
+    #
+    @staticmethod
+    def _get_block_freezer(block_number: BlockNumber, block_hash: Hash32) -> Optional[Freezer]:
+        """
+        Return the freezer if the block was moved to it, ``None`` otherwise.
+        """
+        freezer = get_freezer()
+        if freezer is not None and freezer.has_block(block_number, block_hash):
+            return freezer
+        else:
+            return None
+
+    def freeze_blocks(self, stop_block_number: BlockNumber) -> int:
+        """
+        Move the headers, transactions and receipts of the canonical blocks below
+        ``stop_block_number`` to the freezer, at most ``FREEZE_BATCH_SIZE`` at a time,
+        and delete them from the database. Returns the number of blocks moved.
+
+        Frozen blocks are expected to be final. If a reorg replaces one of them
+        anyway, the new block stays in the database.
+        """
+        freezer = get_freezer()
+        if freezer is None or not freezer.writable:
+            raise ValidationError("Freezing blocks needs a writable freezer")
+
+        first_block_number = freezer.next_block_number
+        if first_block_number is None:
+            first_block_number = self._get_first_canonical_block_number(stop_block_number)
+        stop_block_number = min(stop_block_number, first_block_number + FREEZE_BATCH_SIZE)
+        frozen_blocks = []
+        for block_number in range(first_block_number, stop_block_number):
+            try:
+                header = self.get_canonical_block_header_by_number(BlockNumber(block_number))
+            except HeaderNotFound:
+                # Blocks are frozen in order, so stop at the first gap
+                break
+            frozen_blocks.append(FrozenBlock(
+                header.hash,
+                rlp.encode(header),
+                tuple(self._get_block_data_from_root_hash(self.db, header.transaction_root)),
+                tuple(self._get_block_data_from_root_hash(self.db, header.receipt_root)),
+            ))
+        if frozen_blocks:
+            freezer.append(BlockNumber(first_block_number), frozen_blocks)
+
+        # Also delete blocks that were frozen before, if deleting them failed
+        deleted_count = self._get_frozen_block_count(self.db)
+        if deleted_count < len(freezer):
+            with self.db.atomic_batch() as db:
+                self._delete_frozen_blocks(db, freezer, deleted_count, len(freezer))
+
+        if frozen_blocks:
+            self.logger.debug(
+                "Froze blocks #%d to #%d",
+                first_block_number,
+                first_block_number + len(frozen_blocks) - 1,
+            )
+        return len(frozen_blocks)
+
+    def _get_first_canonical_block_number(self, stop_block_number: BlockNumber) -> BlockNumber:
+        # The canonical chain has no gaps from the genesis on, so search for its start
+        low, high = 0, stop_block_number
+        while low < high:
+            middle = (low + high) // 2
+            number_to_hash_key = SchemaV1.make_block_number_to_hash_lookup_key(
+                BlockNumber(middle),
+            )
+            if self.db.exists(number_to_hash_key):
+                high = middle
+            else:
+                low = middle + 1
+        return BlockNumber(low)
+
+    @staticmethod
+    def _get_frozen_block_count(db: DatabaseAPI) -> int:
+        encoded = db.get(SchemaV1.make_frozen_block_count_key())
+        return 0 if encoded is None else int.from_bytes(encoded, 'big')
+
+    @classmethod
+    def _delete_frozen_blocks(cls,
+                              db: DatabaseAPI,
+                              freezer: Freezer,
+                              start_index: int,
+                              stop_index: int) -> None:
+        dereferenced: Counter[Hash32] = collections.Counter()
+        for index in range(start_index, stop_index):
+            block_number = BlockNumber(freezer.first_block_number + index)
+            block_hash = freezer.get_hash(block_number)
+            try:
+                canonical_hash = cls._get_canonical_block_hash(db, block_number)
+            except HeaderNotFound:
+                canonical_hash = None
+            if canonical_hash != block_hash:
+                # Replaced by a reorg since it was frozen
+                continue
+
+            header = _decode_block_header(freezer.get_header(block_number))
+            dereferenced[header.transaction_root] += 1
+            dereferenced[header.receipt_root] += 1
+
+            db.delete(block_hash)
+            db[SchemaV1.make_frozen_header_number_key(block_hash)] = block_number.to_bytes(
+                8,
+                'big',
+            )
+
+        # Data without a count was persisted before the freezer was enabled, and might
+        # be shared with any other block, so it is never deleted. The same goes for
+        # data that is still stored as a trie.
+        root_hashes: List[Hash32] = list(dereferenced)
+        refcount_keys = tuple(
+            SchemaV1.make_block_data_refcount_key(root_hash) for root_hash in root_hashes
+        )
+        for root_hash, refcount_key, encoded in zip(
+                root_hashes, refcount_keys, db.multi_get(refcount_keys)):
+            if encoded is None:
+                continue
+            refcount = int.from_bytes(encoded, 'big') - dereferenced[root_hash]
+            if refcount > 0:
+                db[refcount_key] = refcount.to_bytes(4, 'big')
+            else:
+                db.delete(refcount_key)
+                db.delete(SchemaV1.make_block_data_key(root_hash))
+
+        db[SchemaV1.make_frozen_block_count_key()] = stop_index.to_bytes(8, 'big')
@@ -0,0 +1,384 @@
+import logging
+from typing import (
+    Dict,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from eth_hash.auto import (
+    keccak,
+)
+from eth_typing import (
+    Hash32,
+)
+import rlp
+from trie import (
+    HexaryTrie,
+)
+from trie.iter import (
+    NodeIterator,
+)
+
+from veda.abc import (
+    AtomicDatabaseAPI,
+    DatabaseAPI,
+)
+from veda.constants import (
+    BLANK_ROOT_HASH,
+)
+from veda.db.backends.base import (
+    BaseDB,
+)
+from veda.db.hash_trie import (
+    HashTrie,
+)
+from veda.db.schema import (
+    SchemaV1,
+)
+from veda.rlp.accounts import (
+    Account,
+)
+
+
+INCARNATION_BYTES = 4
+
+MAX_VERSION = 2 ** 64 - 1
+
+ACCOUNT_KEY_PREFIX = SchemaV1.make_state_snapshot_account_key(Hash32(b""))
+STORAGE_KEY_PREFIX = SchemaV1.make_state_snapshot_storage_key(Hash32(b""), 0, Hash32(b""))[:-4]
+HISTORY_KEY_PREFIXES = (
+    SchemaV1.make_state_history_root_key(Hash32(b"")),
+    SchemaV1.make_state_history_account_key(Hash32(b""), 0)[:-8],
+    SchemaV1.make_state_history_storage_key(Hash32(b""), 0, Hash32(b""), 0)[:-12],
+)
+
+
+class SlotChanges(NamedTuple):
+    """
+    The changes to the storage of an account since the last persist.
+    """
+    # Whether the storage was wiped before the changed slots were written
+    wiped: bool
+    # Encoded values by slot hash, empty for a deleted slot
+    changed_slots: Dict[Hash32, bytes]
+
+
+class FlatStateSnapshot:
+    """
+    A flat copy of the state at a single state root, stored next to the tries:
+
+    - hashed address -> incarnation and account RLP
+    - hashed address, incarnation and hashed slot -> storage value RLP
+
+    Reading an account or a slot this way is a single lookup instead of a trie walk.
+    The tries stay the source of truth, and the snapshot is only used while the state
+    root being read is the one the snapshot was updated to.
+
+    Wiping the storage of an account bumps its incarnation, which hides all of its
+    old slots without having to find and delete them. Deleted accounts keep their
+    entry, with an empty RLP, so their incarnation is never reused.
+
+    Every update of the snapshot gets the next version number, and keeps the values
+    it replaced as the history of that version. The state of an older version is
+    then read as the value replaced by the first later update, or the current value
+    if there was none, see :meth:`get_history_version`. The old slots that a wipe
+    hides are never changed again, so their history needs no entries either.
+    """
+    logger = logging.getLogger('veda.db.flat_snapshot.FlatStateSnapshot')
+
+    def __init__(self, db: DatabaseAPI) -> None:
+        self._db = db
+
+    def get_root(self) -> Optional[Hash32]:
+        """
+        Return the state root that the snapshot is at, or ``None`` if there is none.
+        """
+        try:
+            return Hash32(self._db[SchemaV1.make_state_snapshot_root_key()])
+        except KeyError:
+            return None
+
+    def get_history_version(self, state_root: Hash32) -> Optional[int]:
+        """
+        Return the version of the snapshot that had ``state_root``, or ``None`` if
+        there is no history back to it.
+        """
+        try:
+            encoded = self._db[SchemaV1.make_state_history_root_key(state_root)]
+        except KeyError:
+            return None
+        else:
+            return int.from_bytes(encoded, 'big')
+
+    def get_account(self, address_hash: Hash32, version: int = None) -> Tuple[int, bytes]:
+        """
+        Return the incarnation and the RLP of an account, which is empty if the
+        account doesn't exist. Pass a ``version`` to read it from the history.
+        """
+        if version is not None:
+            entry = self._get_history(
+                SchemaV1.make_state_history_account_key(address_hash, version + 1),
+                SchemaV1.make_state_history_account_key(address_hash, MAX_VERSION),
+            )
+        else:
+            entry = None
+
+        if entry is None:
+            entry = self._db.get(SchemaV1.make_state_snapshot_account_key(address_hash))
+
+        if entry is None:
+            return 0, b""
+        else:
+            return int.from_bytes(entry[:INCARNATION_BYTES], 'big'), entry[INCARNATION_BYTES:]
+
+    def get_slot(self,
+                 address_hash: Hash32,
+                 incarnation: int,
+                 slot_hash: Hash32,
+                 version: int = None) -> bytes:
+        """
+        Return the RLP of a storage value, which is empty if the slot isn't set. Pass
+        a ``version`` to read it from the history.
+        """
+        if version is not None:
+            encoded = self._get_history(
+                SchemaV1.make_state_history_storage_key(
+                    address_hash,
+                    incarnation,
+                    slot_hash,
+                    version + 1,
+                ),
+                SchemaV1.make_state_history_storage_key(
+                    address_hash,
+                    incarnation,
+                    slot_hash,
+                    MAX_VERSION,
+                ),
+            )
+            if encoded is not None:
+                return encoded
+
+        key = SchemaV1.make_state_snapshot_storage_key(address_hash, incarnation, slot_hash)
+        try:
+            return self._db[key]
+        except KeyError:
+            return b""
+
+    def _get_history(self, start: bytes, stop: bytes) -> Optional[bytes]:
+        # The value replaced by the first update in the range is the one before it
+        entry = self._db.seek(start, stop)
+        if entry is None:
+            return None
+        else:
+            _, value = entry
+            return value
+
+    def apply_diff(self,
+                   write_batch: DatabaseAPI,
+                   new_root: Hash32,
+                   changed_accounts: Mapping[Hash32, bytes],
+                   changed_storage: Mapping[Hash32, SlotChanges]) -> None:
+        """
+        Move the snapshot to ``new_root``, by writing the accounts and slots that
+        changed since the root the snapshot is at into ``write_batch``, and keep the
+        values they replace as history.
+        """
+        old_root, encoded_version = self._db.multi_get((
+            SchemaV1.make_state_snapshot_root_key(),
+            SchemaV1.make_state_snapshot_version_key(),
+        ))
+        if old_root == new_root:
+            return
+        version = 0 if encoded_version is None else int.from_bytes(encoded_version, 'big')
+        version += 1
+
+        address_hashes = tuple(changed_accounts.keys() | changed_storage.keys())
+        account_keys = tuple(
+            SchemaV1.make_state_snapshot_account_key(address_hash)
+            for address_hash in address_hashes
+        )
+        old_entries = self._db.multi_get(account_keys)
+
+        slot_keys: Dict[bytes, Tuple[Hash32, int, Hash32]] = {}
+        for address_hash, account_key, old_entry in zip(address_hashes, account_keys, old_entries):
+            if old_entry is None:
+                old_entry = (0).to_bytes(INCARNATION_BYTES, 'big')
+            incarnation = int.from_bytes(old_entry[:INCARNATION_BYTES], 'big')
+            encoded_account = old_entry[INCARNATION_BYTES:]
+
+            if address_hash in changed_storage:
+                wiped, changed_slots = changed_storage[address_hash]
+                if wiped:
+                    incarnation += 1
+                for slot_hash in changed_slots:
+                    slot_key = SchemaV1.make_state_snapshot_storage_key(
+                        address_hash,
+                        incarnation,
+                        slot_hash,
+                    )
+                    slot_keys[slot_key] = (address_hash, incarnation, slot_hash)
+
+            encoded_account = changed_accounts.get(address_hash, encoded_account)
+            entry = incarnation.to_bytes(INCARNATION_BYTES, 'big') + encoded_account
+            if entry != old_entry:
+                write_batch[account_key] = entry
+                history_key = SchemaV1.make_state_history_account_key(address_hash, version)
+                write_batch[history_key] = old_entry
+
+        old_values = self._db.multi_get(tuple(slot_keys))
+        for (slot_key, slot), old_value in zip(slot_keys.items(), old_values):
+            address_hash, incarnation, slot_hash = slot
+            encoded_value = changed_storage[address_hash].changed_slots[slot_hash]
+            if encoded_value == (old_value or b""):
+                continue
+
+            if encoded_value:
+                write_batch[slot_key] = encoded_value
+            else:
+                write_batch.delete(slot_key)
+            history_key = SchemaV1.make_state_history_storage_key(
+                address_hash,
+                incarnation,
+                slot_hash,
+                version,
+            )
+            write_batch[history_key] = old_value or b""
+
+        write_batch[SchemaV1.make_state_snapshot_root_key()] = new_root
+        write_batch[SchemaV1.make_state_snapshot_version_key()] = version.to_bytes(8, 'big')
+        write_batch[SchemaV1.make_state_history_root_key(new_root)] = version.to_bytes(8, 'big')
+
+    @classmethod
+    def generate(cls,
+                 db: AtomicDatabaseAPI,
+                 state_root: Hash32,
+                 batch_size: int = 10000) -> int:
+        """
+        Build the snapshot of ``state_root`` from the tries, replacing any previous
+        snapshot and its history. The snapshot root is only written at the end, so an
+        interrupted run leaves no usable snapshot behind.
+
+        Needs a database that supports ``iterate()``. Returns the number of accounts
+        written.
+        """
+        with db.atomic_batch() as write_batch:
+            write_batch.delete(SchemaV1.make_state_snapshot_root_key())
+
+        pending: Dict[bytes, bytes] = {}
+
+        def flush() -> None:
+            with db.atomic_batch() as write_batch:
+                for key, value in pending.items():
+                    if value:
+                        write_batch[key] = value
+                    else:
+                        write_batch.delete(key)
+            pending.clear()
+
+        # Remove the entries of the previous snapshot
+        for prefix in (ACCOUNT_KEY_PREFIX, STORAGE_KEY_PREFIX) + HISTORY_KEY_PREFIXES:
+            stop = prefix[:-1] + bytes((prefix[-1] + 1,))
+            for key, _ in db.iterate(prefix, stop):
+                pending[key] = b""
+                if len(pending) >= batch_size:
+                    flush()
+        flush()
+
+        account_count = 0
+
+        for address_hash, encoded_account in NodeIterator(HexaryTrie(db, state_root)).items():
+            address_hash = Hash32(address_hash)
+            pending[SchemaV1.make_state_snapshot_account_key(address_hash)] = (
+                (0).to_bytes(INCARNATION_BYTES, 'big') + encoded_account
+            )
+            account = rlp.decode(encoded_account, sedes=Account)
+            if account.storage_root != BLANK_ROOT_HASH:
+                storage_trie = HexaryTrie(db, account.storage_root)
+                for slot_hash, encoded_value in NodeIterator(storage_trie).items():
+                    slot_key = SchemaV1.make_state_snapshot_storage_key(
+                        address_hash,
+                        0,
+                        Hash32(slot_hash),
+                    )
+                    pending[slot_key] = encoded_value
+                    if len(pending) >= batch_size:
+                        flush()
+
+            account_count += 1
+            if len(pending) >= batch_size:
+                flush()
+                cls.logger.info("Wrote %d accounts to the state snapshot", account_count)
+
+        pending[SchemaV1.make_state_snapshot_version_key()] = (0).to_bytes(8, 'big')
+        pending[SchemaV1.make_state_history_root_key(state_root)] = (0).to_bytes(8, 'big')
+        pending[SchemaV1.make_state_snapshot_root_key()] = state_root
+        flush()
+        return account_count
+
+
+class FlatAccountLookup(BaseDB):
+    """
+    Read encoded accounts from a :class:`FlatStateSnapshot` while the root of
+    ``trie`` is :attr:`snapshot_root`, and from the trie otherwise. Writes go straight
+    to ``db``.
+
+    :attr:`version` is ``None`` if :attr:`snapshot_root` is the root the snapshot is
+    at, or the version of the history to read it from.
+    """
+
+    def __init__(self,
+                 db: DatabaseAPI,
+                 trie: HashTrie,
+                 snapshot: FlatStateSnapshot,
+                 snapshot_root: Optional[Hash32],
+                 version: int = None) -> None:
+        self._db = db
+        self._trie = trie
+        self._snapshot = snapshot
+        self.snapshot_root = snapshot_root
+        self.version = version
+
+    def __getitem__(self, address: bytes) -> bytes:
+        if self._trie.root_hash == self.snapshot_root:
+            _, encoded_account = self._snapshot.get_account(keccak(address), self.version)
+            return encoded_account
+        else:
+            return self._db[address]
+
+    def __setitem__(self, address: bytes, encoded: bytes) -> None:
+        self._db[address] = encoded
+
+    def __delitem__(self, address: bytes) -> None:
+        del self._db[address]
+
+    def _exists(self, address: bytes) -> bool:
+        return self[address] != b""
+
+
+class FlatStorageLookup:
+    """
+    Read the slots of an account, as of a single storage root, from a
+    :class:`FlatStateSnapshot`.
+    """
+
+    def __init__(self,
+                 snapshot: FlatStateSnapshot,
+                 address_hash: Hash32,
+                 incarnation: int,
+                 storage_root: Hash32,
+                 version: int = None) -> None:
+        self._snapshot = snapshot
+        self._address_hash = address_hash
+        self._incarnation = incarnation
+        self.storage_root = storage_root
+        self._version = version
+
+    def get(self, slot_hash: Hash32) -> bytes:
+        return self._snapshot.get_slot(
+            self._address_hash,
+            self._incarnation,
+            slot_hash,
+            self._version,
+        )
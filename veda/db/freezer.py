@@ -0,0 +1,332 @@
+import mmap
+import os
+import pathlib
+import threading
+from typing import (
+    Dict,
+    IO,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from eth_typing import (
+    BlockNumber,
+    Hash32,
+)
+from eth_utils import (
+    ValidationError,
+)
+import rlp
+
+from veda.abc import (
+    DatabaseAPI,
+)
+from veda.db.schema import (
+    SchemaV1,
+)
+
+
+OFFSET_BYTES = 8
+
+
+class FrozenBlock(NamedTuple):
+    block_hash: Hash32
+    encoded_header: bytes
+    encoded_transactions: Tuple[bytes, ...]
+    encoded_receipts: Tuple[bytes, ...]
+
+
+class FreezerTable:
+    """
+    An append-only data file of items, next to an index file with the end offset of
+    every item as 8 bytes.
+
+    Both files are memory mapped for reading. Items are appended to the data file
+    before their offsets go into the index, so readers in other processes only ever
+    see complete items, and can read while the table grows.
+    """
+
+    def __init__(self, directory: pathlib.Path, name: str) -> None:
+        self._data_path = directory / f'{name}.dat'
+        self._index_path = directory / f'{name}.idx'
+
+        self._map_lock = threading.Lock()
+        self._data_map: Union[mmap.mmap, bytes] = b""
+        self._index_map: Union[mmap.mmap, bytes] = b""
+        self._mapped_count = 0
+
+        # Only set on the writer
+        self._data_file: Optional[IO[bytes]] = None
+        self._index_file: Optional[IO[bytes]] = None
+        self._data_size = 0
+
+    def __len__(self) -> int:
+        try:
+            return os.path.getsize(self._index_path) // OFFSET_BYTES
+        except FileNotFoundError:
+            return 0
+
+    def __getitem__(self, index: int) -> bytes:
+        if index >= self._mapped_count:
+            self._remap()
+            if index >= self._mapped_count:
+                raise IndexError(f"Item {index} is not in {self._data_path.name}")
+
+        # Keep a reference, in case another thread remaps in the meantime
+        index_map, data_map = self._index_map, self._data_map
+        end_position = index * OFFSET_BYTES
+        if index:
+            start = int.from_bytes(index_map[end_position - OFFSET_BYTES:end_position], 'big')
+        else:
+            start = 0
+        end = int.from_bytes(index_map[end_position:end_position + OFFSET_BYTES], 'big')
+        return data_map[start:end]
+
+    def _remap(self) -> None:
+        if len(self) <= self._mapped_count:
+            return
+        with self._map_lock:
+            try:
+                with open(self._index_path, 'rb') as index_file:
+                    count = os.fstat(index_file.fileno()).st_size // OFFSET_BYTES
+                    if count <= self._mapped_count:
+                        return
+                    index_map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+                with open(self._data_path, 'rb') as data_file:
+                    if os.fstat(data_file.fileno()).st_size:
+                        data_map = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+                    else:
+                        # Only empty items so far, which can't be mapped
+                        data_map = b""
+            except FileNotFoundError:
+                return
+
+            # The old maps are closed once the last reader drops them
+            self._index_map, self._data_map = index_map, data_map
+            self._mapped_count = count
+
+    def open_for_writing(self) -> None:
+        """
+        Open the files for appending, and drop a partially written last item.
+        """
+        self._index_file = open(self._index_path, 'ab+')
+        index_size = os.fstat(self._index_file.fileno()).st_size
+        index_size -= index_size % OFFSET_BYTES
+        self._index_file.truncate(index_size)
+
+        if index_size:
+            self._index_file.seek(index_size - OFFSET_BYTES)
+            self._data_size = int.from_bytes(self._index_file.read(OFFSET_BYTES), 'big')
+        else:
+            self._data_size = 0
+        self._data_file = open(self._data_path, 'ab')
+        self._data_file.truncate(self._data_size)
+
+    def append(self, items: Sequence[bytes]) -> None:
+        offsets = []
+        for item in items:
+            self._data_file.write(item)
+            self._data_size += len(item)
+            offsets.append(self._data_size.to_bytes(OFFSET_BYTES, 'big'))
+        self._data_file.flush()
+        self._index_file.write(b"".join(offsets))
+        self._index_file.flush()
+
+    def truncate(self, count: int) -> None:
+        """
+        Drop all items from ``count`` on. Only used to repair the table on open, before
+        anyone could read the dropped items.
+        """
+        if count >= len(self):
+            return
+        self._index_file.truncate(count * OFFSET_BYTES)
+        self.close()
+        self.open_for_writing()
+
+    def sync(self) -> None:
+        os.fsync(self._data_file.fileno())
+        os.fsync(self._index_file.fileno())
+
+    def close(self) -> None:
+        for file in (self._data_file, self._index_file):
+            if file is not None:
+                file.close()
+        self._data_file = self._index_file = None
+
+
+class Freezer:
+    """
+    Append-only, memory mapped files with the headers, transactions and receipts of
+    old canonical blocks, by block number from the first frozen block on. Reading a
+    frozen block takes a single slice of a mapped file, and the blocks no longer take
+    space in the database.
+
+    Only one process may open the freezer with ``writable=True``, but any number of
+    processes can read it at the same time. A block is frozen once its hash is in the
+    ``hashes`` table, which is written last.
+    """
+
+    _table_names = ('headers', 'bodies', 'receipts', 'hashes')
+
+    def __init__(self, directory: pathlib.Path, writable: bool = False) -> None:
+        self.directory = directory
+        self.writable = writable
+        if writable:
+            directory.mkdir(parents=True, exist_ok=True)
+
+        self._tables: Dict[str, FreezerTable] = {
+            name: FreezerTable(directory, name) for name in self._table_names
+        }
+        self._hashes = self._tables['hashes']
+        self._first_block_number: Optional[BlockNumber] = None
+
+        if writable:
+            for table in self._tables.values():
+                table.open_for_writing()
+            # Drop the blocks that were only partially written
+            frozen_count = len(self)
+            for table in self._tables.values():
+                table.truncate(frozen_count)
+
+    def __len__(self) -> int:
+        """
+        Return the number of frozen blocks.
+        """
+        return len(self._hashes)
+
+    @property
+    def first_block_number(self) -> Optional[BlockNumber]:
+        """
+        Return the number of the first frozen block, or ``None`` if none is frozen yet.
+        """
+        if self._first_block_number is None:
+            try:
+                encoded = (self.directory / 'first').read_bytes()
+            except FileNotFoundError:
+                return None
+            self._first_block_number = BlockNumber(int.from_bytes(encoded, 'big'))
+        return self._first_block_number
+
+    @property
+    def next_block_number(self) -> Optional[BlockNumber]:
+        """
+        Return the number of the next block to freeze, or ``None`` if none is frozen yet.
+        """
+        first_block_number = self.first_block_number
+        if first_block_number is None:
+            return None
+        else:
+            return BlockNumber(first_block_number + len(self))
+
+    def has_block(self, block_number: BlockNumber, block_hash: Hash32) -> bool:
+        """
+        Return whether the block with ``block_hash`` is frozen at ``block_number``.
+        """
+        first_block_number = self.first_block_number
+        if first_block_number is None or block_number < first_block_number:
+            return False
+        try:
+            return self._hashes[block_number - first_block_number] == block_hash
+        except IndexError:
+            return False
+
+    def get_hash(self, block_number: BlockNumber) -> Hash32:
+        return Hash32(self._get_item('hashes', block_number))
+
+    def get_header(self, block_number: BlockNumber) -> bytes:
+        return self._get_item('headers', block_number)
+
+    def get_transactions(self, block_number: BlockNumber) -> Tuple[bytes, ...]:
+        return tuple(rlp.decode(self._get_item('bodies', block_number)))
+
+    def get_receipts(self, block_number: BlockNumber) -> Tuple[bytes, ...]:
+        return tuple(rlp.decode(self._get_item('receipts', block_number)))
+
+    def _get_item(self, table_name: str, block_number: BlockNumber) -> bytes:
+        first_block_number = self.first_block_number
+        if first_block_number is None or block_number < first_block_number:
+            raise IndexError(f"Block #{block_number} is not frozen")
+        return self._tables[table_name][block_number - first_block_number]
+
+    def append(self, first_block_number: BlockNumber, blocks: Sequence[FrozenBlock]) -> None:
+        """
+        Append the blocks from ``first_block_number`` on, and sync them to disk, so the
+        database may drop them.
+        """
+        if not self.writable:
+            raise ValidationError("Cannot append to a read-only freezer")
+
+        next_block_number = self.next_block_number
+        if next_block_number is None:
+            with open(self.directory / 'first', 'wb') as first_file:
+                first_file.write(first_block_number.to_bytes(8, 'big'))
+                first_file.flush()
+                os.fsync(first_file.fileno())
+        elif first_block_number != next_block_number:
+            raise ValidationError(
+                f"Expected to freeze block #{next_block_number} next, got #{first_block_number}"
+            )
+
+        self._tables['headers'].append(tuple(block.encoded_header for block in blocks))
+        self._tables['bodies'].append(tuple(
+            rlp.encode(block.encoded_transactions) for block in blocks
+        ))
+        self._tables['receipts'].append(tuple(
+            rlp.encode(block.encoded_receipts) for block in blocks
+        ))
+        for name in ('headers', 'bodies', 'receipts'):
+            self._tables[name].sync()
+        self._hashes.append(tuple(block.block_hash for block in blocks))
+        self._hashes.sync()
+
+    def close(self) -> None:
+        for table in self._tables.values():
+            table.close()
+
+
+_freezer: Optional[Freezer] = None
+
+
+def get_freezer() -> Optional[Freezer]:
+    """
+    Return the freezer of this process, or ``None`` if it has none.
+    """
+    return _freezer
+
+
+def configure_freezer(directory: Optional[pathlib.Path], writable: bool = False) -> None:
+    """
+    Read frozen blocks from ``directory`` in this process, and append to it if
+    ``writable``. The directory doesn't need to exist yet, to read blocks that are
+    frozen later on.
+    """
+    global _freezer
+    if _freezer is not None:
+        _freezer.close()
+    if directory is None:
+        _freezer = None
+    else:
+        _freezer = Freezer(directory, writable)
+
+
+def get_frozen_header(db: DatabaseAPI, block_hash: Hash32) -> Optional[bytes]:
+    """
+    Return the encoded header of a block that was moved to the freezer, or ``None``
+    if it isn't frozen.
+    """
+    freezer = get_freezer()
+    if freezer is None:
+        return None
+
+    encoded_number = db.get(SchemaV1.make_frozen_header_number_key(block_hash))
+    if encoded_number is None:
+        return None
+
+    block_number = BlockNumber(int.from_bytes(encoded_number, 'big'))
+    if freezer.has_block(block_number, block_hash):
+        return freezer.get_header(block_number)
+    else:
+        return None
@@ -31,6 +31,9 @@ from veda.abc import (
 from veda.constants import (
     GENESIS_PARENT_HASH,
 )
+from veda.db.canonical_index import (
+    get_canonical_index,
+)
 from veda.db.chain_gaps import (
     GAP_WRITES,
     GENESIS_CHAIN_GAPS,
@@ -39,6 +42,9 @@ from veda.db.chain_gaps import (
     fill_gap,
     reopen_gap,
 )
+from veda.db.freezer import (
+    get_frozen_header,
+)
 from veda.db.schema import (
     SchemaV1,
 )
@@ -105,6 +111,11 @@ class HeaderDB(HeaderDatabaseAPI):
     # Canonical Chain API
     #
     def get_canonical_block_hash(self, block_number: BlockNumber) -> Hash32:
+        canonical_index = get_canonical_index()
+        if canonical_index is not None:
+            block_hash = canonical_index.get_hash(block_number)
+            if block_hash is not None:
+                return block_hash
         return self._get_canonical_block_hash(self.db, block_number)
 
     @staticmethod
@@ -124,6 +135,11 @@ class HeaderDB(HeaderDatabaseAPI):
     def get_canonical_block_header_by_number(
         self, block_number: BlockNumber
     ) -> BlockHeaderAPI:
+        canonical_index = get_canonical_index()
+        if canonical_index is not None:
+            header_rlp = canonical_index.get_header(block_number)
+            if header_rlp is not None:
+                return _decode_block_header(header_rlp)
         return self._get_canonical_block_header_by_number(self.db, block_number)
 
     @classmethod
@@ -168,7 +184,9 @@ class HeaderDB(HeaderDatabaseAPI):
         try:
             header_rlp = db[block_hash]
         except KeyError:
-            raise HeaderNotFound(f"No header with hash {encode_hex(block_hash)} found")
+            header_rlp = get_frozen_header(db, block_hash)
+            if header_rlp is None:
+                raise HeaderNotFound(f"No header with hash {encode_hex(block_hash)} found")
         return _decode_block_header(header_rlp)
 
     def get_score(self, block_hash: Hash32) -> int:
@@ -188,7 +206,7 @@ class HeaderDB(HeaderDatabaseAPI):
     @staticmethod
     def _header_exists(db: DatabaseAPI, block_hash: Hash32) -> bool:
         validate_word(block_hash, title="Block Hash")
-        return block_hash in db
+        return block_hash in db or get_frozen_header(db, block_hash) is not None
 
     def persist_header(
         self, header: BlockHeaderAPI
@@ -0,0 +1,255 @@
+import collections
+import contextlib
+import struct
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
+
+from eth_typing import (
+    Address,
+    BlockNumber,
+    Hash32,
+)
+
+from veda.abc import (
+    ChainDatabaseAPI,
+    DatabaseAPI,
+    LogAPI,
+    ReceiptAPI,
+    ReceiptDecoderAPI,
+)
+from veda.db.schema import (
+    SchemaV1,
+)
+from veda.exceptions import (
+    HeaderNotFound,
+)
+
+
+# Index of the transaction, of the log in the receipt and of the log in the block
+POSTING = struct.Struct('>III')
+
+BLOCK_NUMBER_BYTES = 8
+
+KEY_PREFIXES = (
+    SchemaV1.make_log_index_address_key(Address(b""), BlockNumber(0))[:-BLOCK_NUMBER_BYTES],
+    SchemaV1.make_log_index_topic_key(0, Hash32(b""), BlockNumber(0))[:-BLOCK_NUMBER_BYTES - 1],
+)
+
+# Any topic matches at a position without options
+TopicFilter = Sequence[Optional[Sequence[Hash32]]]
+
+
+class LogPosition(NamedTuple):
+    block_number: BlockNumber
+    transaction_index: int
+    receipt_log_index: int
+    block_log_index: int
+
+
+def log_matches(log: LogAPI,
+                addresses: Optional[Sequence[Address]],
+                topics: TopicFilter) -> bool:
+    """
+    Return whether ``log`` is from one of ``addresses``, if any are given, and has
+    one of the options in ``topics`` at every position that has options.
+    """
+    if addresses is not None and log.address not in addresses:
+        return False
+    if len(topics) > len(log.topics):
+        return False
+    for options, topic in zip(topics, log.topics):
+        if options is not None and topic.to_bytes(32, 'big') not in options:
+            return False
+    return True
+
+
+def _get_block_postings(block_number: BlockNumber,
+                        receipts: Iterable[ReceiptAPI]) -> Dict[bytes, bytes]:
+    postings: Dict[bytes, List[bytes]] = collections.defaultdict(list)
+    block_log_index = 0
+    for transaction_index, receipt in enumerate(receipts):
+        for receipt_log_index, log in enumerate(receipt.logs):
+            keys = {SchemaV1.make_log_index_address_key(log.address, block_number)}
+            for position, topic in enumerate(log.topics):
+                keys.add(SchemaV1.make_log_index_topic_key(
+                    position,
+                    Hash32(topic.to_bytes(32, 'big')),
+                    block_number,
+                ))
+
+            posting = POSTING.pack(transaction_index, receipt_log_index, block_log_index)
+            for key in keys:
+                postings[key].append(posting)
+            block_log_index += 1
+
+    return {key: b"".join(block_postings) for key, block_postings in postings.items()}
+
+
+def index_block_logs(db: DatabaseAPI,
+                     block_number: BlockNumber,
+                     receipts: Iterable[ReceiptAPI]) -> None:
+    """
+    Add the logs in the receipts of the canonical block at ``block_number`` to the
+    index, by address and by topic at each position.
+    """
+    for key, postings in _get_block_postings(block_number, receipts).items():
+        db[key] = postings
+
+
+def unindex_block_logs(db: DatabaseAPI,
+                       block_number: BlockNumber,
+                       receipts: Iterable[ReceiptAPI]) -> None:
+    """
+    Drop the logs of a block that is no longer canonical at ``block_number`` from
+    the index.
+    """
+    for key in _get_block_postings(block_number, receipts):
+        db.delete(key)
+
+
+def get_log_index_tail(db: DatabaseAPI) -> Optional[BlockNumber]:
+    """
+    Return the number of the first block from which on all canonical blocks are in
+    the log index, or ``None`` if nothing is indexed.
+    """
+    encoded = db.get(SchemaV1.make_log_index_tail_key())
+    if encoded is None:
+        return None
+    else:
+        return BlockNumber(int.from_bytes(encoded, 'big'))
+
+
+def set_log_index_tail(db: DatabaseAPI, block_number: BlockNumber) -> None:
+    db[SchemaV1.make_log_index_tail_key()] = block_number.to_bytes(BLOCK_NUMBER_BYTES, 'big')
+
+
+def _get_postings(db: DatabaseAPI,
+                  term_prefix: bytes,
+                  from_block: BlockNumber,
+                  to_block: BlockNumber) -> Set[LogPosition]:
+    start = term_prefix + from_block.to_bytes(BLOCK_NUMBER_BYTES, 'big')
+    stop = term_prefix + (to_block + 1).to_bytes(BLOCK_NUMBER_BYTES, 'big')
+    positions = set()
+    with contextlib.closing(iter(db.iterate(start, stop))) as postings:
+        for key, value in postings:
+            block_number = BlockNumber(int.from_bytes(key[-BLOCK_NUMBER_BYTES:], 'big'))
+            positions.update(
+                LogPosition(block_number, *posting) for posting in POSTING.iter_unpack(value)
+            )
+    return positions
+
+
+def find_log_positions(db: DatabaseAPI,
+                       from_block: BlockNumber,
+                       to_block: BlockNumber,
+                       addresses: Optional[Sequence[Address]],
+                       topics: TopicFilter) -> Tuple[LogPosition, ...]:
+    """
+    Return the positions of the logs between ``from_block`` and ``to_block`` that
+    are from one of ``addresses`` and have the ``topics``, in chain order, by
+    intersecting the postings of every address and topic option.
+
+    Needs at least one address or topic option, and a database that supports
+    ``iterate()``. Read through a pinned snapshot, so that a reorg unindexing
+    blocks in the meantime can't drop or leave stale postings from the range.
+    """
+    # Every criterion matches if any of its options does
+    criteria: List[Tuple[bytes, ...]] = []
+    if addresses is not None:
+        criteria.append(tuple(
+            SchemaV1.make_log_index_address_key(address, BlockNumber(0))[:-BLOCK_NUMBER_BYTES]
+            for address in addresses
+        ))
+    for position, options in enumerate(topics):
+        if options is not None:
+            criteria.append(tuple(
+                SchemaV1.make_log_index_topic_key(
+                    position,
+                    topic,
+                    BlockNumber(0),
+                )[:-BLOCK_NUMBER_BYTES]
+                for topic in options
+            ))
+    if not criteria:
+        raise ValueError("Cannot look up logs in the index without an address or topic")
+
+    # Start from the criterion with the fewest options, it is usually the most selective
+    criteria.sort(key=len)
+    candidates: Optional[Set[LogPosition]] = None
+    for term_prefixes in criteria:
+        matches: Set[LogPosition] = set()
+        for term_prefix in term_prefixes:
+            matches |= _get_postings(db, term_prefix, from_block, to_block)
+        candidates = matches if candidates is None else candidates & matches
+        if not candidates:
+            return ()
+
+    return tuple(sorted(candidates))
+
+
+def rebuild_log_index(chaindb: ChainDatabaseAPI,
+                      receipt_decoder: Type[ReceiptDecoderAPI],
+                      batch_size: int = 10000) -> Tuple[int, int]:
+    """
+    Index the logs of every canonical block, replacing the previous index. The tail
+    is only written at the end, so an interrupted run leaves the index unused.
+
+    Needs a database that supports ``iterate()``. Returns the number of blocks and
+    logs indexed.
+    """
+    db = chaindb.db
+    with db.atomic_batch() as write_batch:
+        write_batch.delete(SchemaV1.make_log_index_tail_key())
+
+    pending: Dict[bytes, bytes] = {}
+
+    def flush() -> None:
+        with db.atomic_batch() as write_batch:
+            for key, value in pending.items():
+                if value:
+                    write_batch[key] = value
+                else:
+                    write_batch.delete(key)
+        pending.clear()
+
+    # Remove the postings of the previous index
+    for prefix in KEY_PREFIXES:
+        stop = prefix[:-1] + bytes((prefix[-1] + 1,))
+        for key, _ in db.iterate(prefix, stop):
+            pending[key] = b""
+            if len(pending) >= batch_size:
+                flush()
+        flush()
+
+    # Walk down from the head, until the first block of the canonical chain
+    block_number = chaindb.get_canonical_head().block_number
+    block_count = log_count = 0
+    while block_number >= 0:
+        try:
+            header = chaindb.get_canonical_block_header_by_number(BlockNumber(block_number))
+        except HeaderNotFound:
+            break
+
+        receipts = tuple(chaindb.get_receipts(header, receipt_decoder))
+        pending.update(_get_block_postings(header.block_number, receipts))
+        if len(pending) >= batch_size:
+            flush()
+
+        block_count += 1
+        log_count += sum(len(receipt.logs) for receipt in receipts)
+        block_number -= 1
+
+    pending[SchemaV1.make_log_index_tail_key()] = (
+        (block_number + 1).to_bytes(BLOCK_NUMBER_BYTES, 'big')
+    )
+    flush()
+    return block_count, log_count
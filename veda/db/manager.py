@@ -1,29 +1,44 @@
+import asyncio
 import contextlib
 import enum
 import errno
 import itertools
 import logging
 import pathlib
+import queue
 import socket
 import struct
 import threading
 from types import TracebackType
 from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
     Iterator,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
     Type,
+    Union,
 )
 
+from eth_utils import ValidationError
 from eth_utils.toolz import partition
 
 from veda.abc import (
     AtomicDatabaseAPI,
+    DatabaseAPI,
 )
 from veda.db.atomic import AtomicDBWriteBatch
-from veda.db.backends.base import BaseAtomicDB
+from veda.db.backends.base import BaseAtomicDB, BaseDBSnapshot
+from veda.db.canonical_index import CanonicalIndexWriter
 from veda.db.diff import DBDiff
 
+from veda._utils.asyncio_utils import create_task
 from veda._utils.ipc import wait_for_ipc
-from veda._utils.socket import BufferedSocket, IPCSocketServer
+from veda._utils.socket import BufferedSocket, IPCSocketServer, SelectorIPCSocketServer
 
 
 @enum.unique
@@ -33,6 +48,15 @@ class Operation(enum.Enum):
     DELETE = b'\x02'
     EXISTS = b'\x03'
     ATOMIC_BATCH = b'\x04'
+    MULTI_GET = b'\x05'
+    SNAPSHOT = b'\x06'
+    RELEASE_SNAPSHOT = b'\x07'
+    SNAPSHOT_GET = b'\x08'
+    SNAPSHOT_MULTI_GET = b'\x09'
+    ITERATE = b'\x0a'
+    SEEK = b'\x0b'
+    SNAPSHOT_ITERATE = b'\x0c'
+    SNAPSHOT_SEEK = b'\x0d'
 
 
 GET = Operation.GET
@@ -111,9 +135,167 @@ ATOMIC_BATCH Response:
 - Success Byte: 0x01
 """
 
+MULTI_GET = Operation.MULTI_GET
+"""
+MULTI_GET Request:
+
+- Operation Byte: 0x05
+- Key Count: 4-byte little endian
+- Key Sizes: Array of 4-byte little endian
+- Keys: Array of raw bytes
+
+MULTI_GET Response:
+
+- One GET Response per requested key, in request order
+"""
+
+SNAPSHOT = Operation.SNAPSHOT
+"""
+SNAPSHOT Request:
+
+- Operation Byte: 0x06
+
+SNAPSHOT Response (success):
+
+- Success Byte: 0x01
+- Snapshot ID: 8-byte little endian
+
+SNAPSHOT Response (fail, the database does not support snapshots):
+
+- Fail Byte: 0x00
+
+Snapshots are owned by the connection that took them, and are released when
+it closes.
+"""
+
+RELEASE_SNAPSHOT = Operation.RELEASE_SNAPSHOT
+"""
+RELEASE_SNAPSHOT Request:
+
+- Operation Byte: 0x07
+- Snapshot ID: 8-byte little endian
+
+RELEASE_SNAPSHOT Response:
+
+- Response Byte: Released: 0x01 or Unknown Snapshot: 0x00
+"""
+
+SNAPSHOT_GET = Operation.SNAPSHOT_GET
+"""
+SNAPSHOT_GET Request:
+
+- Operation Byte: 0x08
+- Snapshot ID: 8-byte little endian
+- Key Length: 4-byte little endian
+- Key: raw
+
+SNAPSHOT_GET Response:
+
+- Same as the GET Response
+"""
+
+SNAPSHOT_MULTI_GET = Operation.SNAPSHOT_MULTI_GET
+"""
+SNAPSHOT_MULTI_GET Request:
+
+- Operation Byte: 0x09
+- Snapshot ID: 8-byte little endian
+- Key Count: 4-byte little endian
+- Key Sizes: Array of 4-byte little endian
+- Keys: Array of raw bytes
+
+SNAPSHOT_MULTI_GET Response:
+
+- Same as the MULTI_GET Response
+"""
+
+ITERATE = Operation.ITERATE
+"""
+ITERATE Request:
+
+- Operation Byte: 0x0a
+- Start Key Length: 4-byte little endian
+- Start Key: raw, empty for no lower bound
+- Stop Key Length: 4-byte little endian
+- Stop Key: raw, empty for no upper bound
+- Batch Size: 4-byte little endian, maximum number of pairs per batch
+
+ITERATE Response (success):
+
+- Success Byte: 0x01
+- Batches, until one with a Pair Count of zero:
+  - Pair Count: 4-byte little endian
+  - Key/Value Sizes: Array of 4-byte little endian
+  - Key/Values: Array of raw bytes
+
+After each non-empty batch, the client answers with a Success Byte to receive the
+next one, or a Fail Byte to end the iteration early. The server reads ahead one
+batch while the client consumes the previous one.
+
+ITERATE Response (fail, the database does not support iteration):
+
+- Fail Byte: 0x00
+"""
+
+SEEK = Operation.SEEK
+"""
+SEEK Request:
+
+- Operation Byte: 0x0b
+- Start Key Length: 4-byte little endian
+- Start Key: raw, empty for no lower bound
+- Stop Key Length: 4-byte little endian
+- Stop Key: raw, empty for no upper bound
+
+SEEK Response (success):
+
+- Success Byte: 0x01
+- A single ITERATE batch, with the first pair of the range or none
+
+SEEK Response (fail, the database does not support iteration):
+
+- Fail Byte: 0x00
+"""
+
+SNAPSHOT_ITERATE = Operation.SNAPSHOT_ITERATE
+"""
+SNAPSHOT_ITERATE Request:
+
+- Operation Byte: 0x0c
+- Snapshot ID: 8-byte little endian
+- The rest of an ITERATE Request, after its Operation Byte
+
+SNAPSHOT_ITERATE Response:
+
+- Same as the ITERATE Response
+"""
+
+SNAPSHOT_SEEK = Operation.SNAPSHOT_SEEK
+"""
+SNAPSHOT_SEEK Request:
+
+- Operation Byte: 0x0d
+- Snapshot ID: 8-byte little endian
+- The rest of a SEEK Request, after its Operation Byte
+
+SNAPSHOT_SEEK Response:
+
+- Same as the SEEK Response
+"""
+
 
 LEN_BYTES = 4
 DOUBLE_LEN_BYTES = 2 * LEN_BYTES
+SNAPSHOT_ID_BYTES = 8
+
+# Upper bound on the number of keys sent in a single MULTI_GET request. Larger
+# lookups are split into several requests, see _encode_multi_get().
+MULTI_GET_MAX_KEYS = 1024
+
+# Default number of pairs per ITERATE batch, and the size in bytes after which the
+# DBManager sends a batch even if it holds fewer pairs than requested.
+ITERATE_BATCH_SIZE = 1024
+ITERATE_MAX_BATCH_BYTES = 1024 * 1024
 
 
 SUCCESS_BYTE = b'\x01'
@@ -130,58 +312,176 @@ SUCCESS = Result.SUCCESS
 FAIL = Result.FAIL
 
 
+def _prefix_upper_bound(prefix: bytes) -> Optional[bytes]:
+    """
+    Return the smallest key that is greater than every key starting with ``prefix``,
+    or ``None`` if there is no such key.
+    """
+    stripped = prefix.rstrip(b'\xff')
+    if not stripped:
+        return None
+    return stripped[:-1] + bytes((stripped[-1] + 1,))
+
+
+def _read_range(sock: BufferedSocket) -> Tuple[bytes, bytes]:
+    start = sock.read_exactly(int.from_bytes(sock.read_exactly(LEN_BYTES), 'little'))
+    stop = sock.read_exactly(int.from_bytes(sock.read_exactly(LEN_BYTES), 'little'))
+    return start, stop
+
+
+def _encode_range(start: Optional[bytes], stop: Optional[bytes]) -> bytes:
+    return (
+        struct.pack('<I', len(start or b'')) + (start or b'')
+        + struct.pack('<I', len(stop or b'')) + (stop or b'')
+    )
+
+
+def _encode_snapshot_id(snapshot_id: int) -> bytes:
+    return snapshot_id.to_bytes(SNAPSHOT_ID_BYTES, 'little')
+
+
+def _encode_key_request(operation: Operation, key: bytes) -> bytes:
+    return operation.value + len(key).to_bytes(LEN_BYTES, 'little') + key
+
+
+def _encode_snapshot_get(snapshot_id: int, key: bytes) -> bytes:
+    return (
+        SNAPSHOT_GET.value
+        + _encode_snapshot_id(snapshot_id)
+        + len(key).to_bytes(LEN_BYTES, 'little')
+        + key
+    )
+
+
+def _chunk_multi_get(keys: Sequence[bytes]) -> Iterator[Sequence[bytes]]:
+    for index in range(0, len(keys), MULTI_GET_MAX_KEYS):
+        yield keys[index:index + MULTI_GET_MAX_KEYS]
+
+
+def _encode_multi_get(keys: Sequence[bytes], snapshot_id: int = None) -> bytes:
+    """
+    Encode ``keys`` as one or more MULTI_GET requests of at most
+    :data:`MULTI_GET_MAX_KEYS` keys each.
+
+    Only write several requests at once if the responses are read at the same time,
+    like the :class:`AsyncDBClient` does. Otherwise the DBManager blocks on sending
+    responses once they fill the socket buffers, while the client blocks on sending
+    the rest of the requests.
+
+    If ``snapshot_id`` is given, SNAPSHOT_MULTI_GET requests are encoded instead.
+    """
+    if snapshot_id is None:
+        prefix = MULTI_GET.value
+    else:
+        prefix = SNAPSHOT_MULTI_GET.value + _encode_snapshot_id(snapshot_id)
+
+    return b''.join(
+        prefix
+        + struct.pack('<I' + 'I' * len(chunk), len(chunk), *(len(key) for key in chunk))
+        + b''.join(chunk)
+        for chunk in _chunk_multi_get(keys)
+    )
+
+
 class DBManager(IPCSocketServer):
     """
     Implements an interface for serving the BaseAtomicDB API over a socket.
     """
     logger = logging.getLogger('veda.db.manager.DBManager')
 
-    def __init__(self, db: AtomicDatabaseAPI):
+    def __init__(self,
+                 db: AtomicDatabaseAPI,
+                 canonical_index: Optional[CanonicalIndexWriter] = None) -> None:
         """
-        The AtomicDatabaseAPI that this wraps must be threadsafe.
+        The AtomicDatabaseAPI that this wraps must be threadsafe. If given, the
+        ``canonical_index`` is updated after every write, before it is acknowledged.
         """
         super().__init__()
         self.db = db
+        self.canonical_index = canonical_index
+        self._snapshots: Dict[int, BaseDBSnapshot] = {}
+        self._owned_snapshots: Dict[BufferedSocket, Set[int]] = {}
+        self._snapshot_ids = itertools.count(1)
+        self._snapshot_lock = threading.Lock()
 
     def serve_conn(self, sock: BufferedSocket) -> None:
-        while self.is_running:
-            try:
-                operation_byte = sock.read_exactly(1)
-            except OSError as err:
-                self.logger.debug("%s: closing client connection: %s", self, err)
-                break
-            except Exception:
-                self.logger.exception("Error reading operation flag")
-                break
+        try:
+            while self.is_running and self.serve_request(sock):
+                pass
+        finally:
+            self.close_conn(sock)
 
-            try:
-                operation = Operation(operation_byte)
-            except TypeError:
-                self.logger.error("Unrecognized database operation: %s", operation_byte.hex())
-                break
+    def serve_request(self, sock: BufferedSocket) -> bool:
+        """
+        Read and handle a single operation from ``sock``. Return ``False`` if the
+        connection should be closed.
+        """
+        try:
+            operation_byte = sock.read_exactly(1)
+        except OSError as err:
+            self.logger.debug("%s: closing client connection: %s", self, err)
+            return False
+        except Exception:
+            self.logger.exception("Error reading operation flag")
+            return False
 
-            try:
-                if operation is GET:
-                    self.handle_GET(sock)
-                elif operation is SET:
-                    self.handle_SET(sock)
-                elif operation is DELETE:
-                    self.handle_DELETE(sock)
-                elif operation is EXISTS:
-                    self.handle_EXISTS(sock)
-                elif operation is ATOMIC_BATCH:
-                    self.handle_ATOMIC_BATCH(sock)
-                else:
-                    self.logger.error("Got unhandled operation %s", operation)
-            except Exception as err:
-                self.logger.exception("Unhandled error during operation %s: %s", operation, err)
-                raise
+        try:
+            operation = Operation(operation_byte)
+        except TypeError:
+            self.logger.error("Unrecognized database operation: %s", operation_byte.hex())
+            return False
+
+        try:
+            if operation is GET:
+                self.handle_GET(sock)
+            elif operation is SET:
+                self.handle_SET(sock)
+            elif operation is DELETE:
+                self.handle_DELETE(sock)
+            elif operation is EXISTS:
+                self.handle_EXISTS(sock)
+            elif operation is ATOMIC_BATCH:
+                self.handle_ATOMIC_BATCH(sock)
+            elif operation is MULTI_GET:
+                self.handle_MULTI_GET(sock)
+            elif operation is SNAPSHOT:
+                self.handle_SNAPSHOT(sock)
+            elif operation is RELEASE_SNAPSHOT:
+                self.handle_RELEASE_SNAPSHOT(sock)
+            elif operation is SNAPSHOT_GET:
+                self.handle_SNAPSHOT_GET(sock)
+            elif operation is SNAPSHOT_MULTI_GET:
+                self.handle_SNAPSHOT_MULTI_GET(sock)
+            elif operation is ITERATE:
+                self.handle_ITERATE(sock)
+            elif operation is SEEK:
+                self.handle_SEEK(sock)
+            elif operation is SNAPSHOT_ITERATE:
+                self.handle_SNAPSHOT_ITERATE(sock)
+            elif operation is SNAPSHOT_SEEK:
+                self.handle_SNAPSHOT_SEEK(sock)
+            else:
+                self.logger.error("Got unhandled operation %s", operation)
+        except Exception as err:
+            self.logger.exception("Unhandled error during operation %s: %s", operation, err)
+            raise
+
+        return True
+
+    def close_conn(self, sock: BufferedSocket) -> None:
+        with self._snapshot_lock:
+            owned_snapshots = self._owned_snapshots.pop(sock, set())
+        for snapshot_id in owned_snapshots:
+            self._release_snapshot(snapshot_id)
 
     def handle_GET(self, sock: BufferedSocket) -> None:
+        self._serve_get(sock, self.db)
+
+    def _serve_get(self, sock: BufferedSocket, db: DatabaseAPI) -> None:
         key_size_data = sock.read_exactly(LEN_BYTES)
         key = sock.read_exactly(int.from_bytes(key_size_data, 'little'))
         try:
-            value = self.db[key]
+            value = db[key]
         except KeyError:
             sock.sendall(FAIL_BYTE)
         else:
@@ -195,6 +495,8 @@ class DBManager(IPCSocketServer):
         key = key_and_value_data[:key_size]
         value = key_and_value_data[key_size:]
         self.db[key] = value
+        if self.canonical_index is not None:
+            self.canonical_index.update((key,))
         sock.sendall(SUCCESS_BYTE)
 
     def handle_DELETE(self, sock: BufferedSocket) -> None:
@@ -205,6 +507,8 @@ class DBManager(IPCSocketServer):
         except KeyError:
             sock.sendall(FAIL_BYTE)
         else:
+            if self.canonical_index is not None:
+                self.canonical_index.update((key,))
             sock.sendall(SUCCESS_BYTE)
 
     def handle_EXISTS(self, sock: BufferedSocket) -> None:
@@ -230,6 +534,7 @@ class DBManager(IPCSocketServer):
             kv_sizes = kv_and_delete_sizes[:total_kv_count]
             delete_sizes = kv_and_delete_sizes[total_kv_count:total_kv_count + delete_count]
 
+            keys = []
             with self.db.atomic_batch() as batch:
                 for key_size, value_size in partition(2, kv_sizes):
                     combined_size = key_size + value_size
@@ -237,11 +542,181 @@ class DBManager(IPCSocketServer):
                     key = key_and_value_data[:key_size]
                     value = key_and_value_data[key_size:]
                     batch[key] = value
+                    keys.append(key)
                 for key_size in delete_sizes:
                     key = sock.read_exactly(key_size)
                     del batch[key]
+                    keys.append(key)
+
+            if self.canonical_index is not None:
+                self.canonical_index.update(keys)
+
+        sock.sendall(SUCCESS_BYTE)
+
+    def handle_MULTI_GET(self, sock: BufferedSocket) -> None:
+        self._serve_multi_get(sock, self.db)
+
+    def _serve_multi_get(self, sock: BufferedSocket, db: DatabaseAPI) -> None:
+        key_count = int.from_bytes(sock.read_exactly(LEN_BYTES), 'little')
+        if not key_count:
+            return
+
+        key_sizes = struct.unpack(
+            '<' + 'I' * key_count,
+            sock.read_exactly(LEN_BYTES * key_count),
+        )
+        keys_data = sock.read_exactly(sum(key_sizes))
+
+        response = bytearray()
+        offset = 0
+        for key_size in key_sizes:
+            key = keys_data[offset:offset + key_size]
+            offset += key_size
+            try:
+                value = db[key]
+            except KeyError:
+                response += FAIL_BYTE
+            else:
+                response += SUCCESS_BYTE + len(value).to_bytes(LEN_BYTES, 'little') + value
+
+        sock.sendall(response)
+
+    def handle_SNAPSHOT(self, sock: BufferedSocket) -> None:
+        try:
+            snapshot = self.db.snapshot()
+        except NotImplementedError as err:
+            self.logger.debug("Cannot take snapshot: %s", err)
+            sock.sendall(FAIL_BYTE)
+            return
+
+        with self._snapshot_lock:
+            snapshot_id = next(self._snapshot_ids)
+            self._snapshots[snapshot_id] = snapshot
+            self._owned_snapshots.setdefault(sock, set()).add(snapshot_id)
+        sock.sendall(SUCCESS_BYTE + _encode_snapshot_id(snapshot_id))
+
+    def handle_RELEASE_SNAPSHOT(self, sock: BufferedSocket) -> None:
+        snapshot_id = int.from_bytes(sock.read_exactly(SNAPSHOT_ID_BYTES), 'little')
+        with self._snapshot_lock:
+            owned_snapshots = self._owned_snapshots.get(sock, set())
+            is_owned = snapshot_id in owned_snapshots
+            owned_snapshots.discard(snapshot_id)
+
+        if is_owned:
+            self._release_snapshot(snapshot_id)
+            sock.sendall(SUCCESS_BYTE)
+        else:
+            sock.sendall(FAIL_BYTE)
+
+    def handle_SNAPSHOT_GET(self, sock: BufferedSocket) -> None:
+        self._serve_get(sock, self._read_snapshot(sock))
+
+    def handle_SNAPSHOT_MULTI_GET(self, sock: BufferedSocket) -> None:
+        self._serve_multi_get(sock, self._read_snapshot(sock))
+
+    def _read_snapshot(self, sock: BufferedSocket) -> BaseDBSnapshot:
+        snapshot_id = int.from_bytes(sock.read_exactly(SNAPSHOT_ID_BYTES), 'little')
+        with self._snapshot_lock:
+            try:
+                return self._snapshots[snapshot_id]
+            except KeyError:
+                raise ValidationError(f"Unknown database snapshot: {snapshot_id}")
+
+    def _release_snapshot(self, snapshot_id: int) -> None:
+        with self._snapshot_lock:
+            snapshot = self._snapshots.pop(snapshot_id)
+        snapshot.close()
+
+    def handle_ITERATE(self, sock: BufferedSocket) -> None:
+        self._serve_iterate(sock, self.db)
+
+    def handle_SNAPSHOT_ITERATE(self, sock: BufferedSocket) -> None:
+        self._serve_iterate(sock, self._read_snapshot(sock))
+
+    def _serve_iterate(self,
+                       sock: BufferedSocket,
+                       db: Union[AtomicDatabaseAPI, BaseDBSnapshot]) -> None:
+        start, stop = _read_range(sock)
+        batch_size = int.from_bytes(sock.read_exactly(LEN_BYTES), 'little') or ITERATE_BATCH_SIZE
+
+        try:
+            items = db.iterate(start or None, stop or None)
+        except NotImplementedError as err:
+            self.logger.debug("Cannot iterate: %s", err)
+            sock.sendall(FAIL_BYTE)
+            return
 
         sock.sendall(SUCCESS_BYTE)
+        with contextlib.closing(iter(items)) as iterator:
+            while True:
+                batch = _encode_iterate_batch(iterator, batch_size)
+                sock.sendall(batch)
+                if batch == _EMPTY_ITERATE_BATCH or sock.read_exactly(1) != SUCCESS_BYTE:
+                    break
+
+    def handle_SEEK(self, sock: BufferedSocket) -> None:
+        self._serve_seek(sock, self.db)
+
+    def handle_SNAPSHOT_SEEK(self, sock: BufferedSocket) -> None:
+        self._serve_seek(sock, self._read_snapshot(sock))
+
+    def _serve_seek(self,
+                    sock: BufferedSocket,
+                    db: Union[AtomicDatabaseAPI, BaseDBSnapshot]) -> None:
+        start, stop = _read_range(sock)
+
+        try:
+            items = db.iterate(start or None, stop or None)
+        except NotImplementedError as err:
+            self.logger.debug("Cannot seek: %s", err)
+            sock.sendall(FAIL_BYTE)
+            return
+
+        with contextlib.closing(iter(items)) as iterator:
+            sock.sendall(SUCCESS_BYTE + _encode_iterate_batch(iterator, 1))
+
+
+class SelectorDBManager(DBManager, SelectorIPCSocketServer):
+    """
+    A :class:`DBManager` which waits on all client connections from a single selector
+    thread, and runs the database operations on a pool of ``max_workers`` threads,
+    instead of dedicating a thread to every connection.
+
+    A worker is busy for the whole of an ITERATE, so long scans should be kept to
+    fewer connections than there are workers.
+    """
+    logger = logging.getLogger('veda.db.manager.SelectorDBManager')
+
+    def __init__(self,
+                 db: AtomicDatabaseAPI,
+                 max_workers: int = SelectorIPCSocketServer.max_workers,
+                 canonical_index: Optional[CanonicalIndexWriter] = None) -> None:
+        if max_workers < 1:
+            raise ValidationError(f"SelectorDBManager needs at least 1 worker, got {max_workers}")
+
+        super().__init__(db, canonical_index)
+        self.max_workers = max_workers
+
+
+_EMPTY_ITERATE_BATCH = (0).to_bytes(LEN_BYTES, 'little')
+
+
+def _encode_iterate_batch(items: Iterator[Tuple[bytes, bytes]], batch_size: int) -> bytes:
+    """
+    Encode up to ``batch_size`` pairs from ``items`` as one ITERATE batch, or fewer
+    if they add up to more than :data:`ITERATE_MAX_BATCH_BYTES`.
+    """
+    sizes = []
+    data = []
+    batch_bytes = 0
+    for key, value in itertools.islice(items, batch_size):
+        sizes.extend((len(key), len(value)))
+        data.extend((key, value))
+        batch_bytes += len(key) + len(value)
+        if batch_bytes >= ITERATE_MAX_BATCH_BYTES:
+            break
+
+    return struct.pack('<I' + 'I' * len(sizes), len(sizes) // 2, *sizes) + b''.join(data)
 
 
 class AtomicBatch(AtomicDBWriteBatch):
@@ -265,9 +740,13 @@ class AtomicBatch(AtomicDBWriteBatch):
 class DBClient(BaseAtomicDB):
     logger = logging.getLogger('veda.db.client.DBClient')
 
-    def __init__(self, sock: socket.socket):
+    def __init__(self, sock: socket.socket, path: pathlib.Path = None):
         self._socket = BufferedSocket(sock)
         self._lock = threading.Lock()
+        # Iterations open a connection of their own to the socket at ``path``, or run
+        # on this connection if it's not known, see iterate()
+        self._path = path
+        self._iterating_thread: Optional[int] = None
 
     def __enter__(self) -> None:
         self._socket.__enter__()
@@ -279,8 +758,18 @@ class DBClient(BaseAtomicDB):
         self._socket.__exit__(exc_type, exc_value, exc_tb)
 
     def __getitem__(self, key: bytes) -> bytes:
+        return self._get(_encode_key_request(GET, key), key)
+
+    def snapshot_get(self, snapshot_id: int, key: bytes) -> bytes:
+        """
+        Look up ``key`` in the DBManager snapshot ``snapshot_id``.
+        """
+        return self._get(_encode_snapshot_get(snapshot_id, key), key)
+
+    def _get(self, request: bytes, key: bytes) -> bytes:
+        self._check_not_iterating()
         with self._lock:
-            self._socket.sendall(GET.value + len(key).to_bytes(LEN_BYTES, 'little') + key)
+            self._socket.sendall(request)
             result_byte = self._socket.read_exactly(1)
 
             if result_byte == SUCCESS_BYTE:
@@ -292,7 +781,190 @@ class DBClient(BaseAtomicDB):
             else:
                 raise Exception(f"Unknown result byte: {result_byte.hex}")
 
+    def multi_get(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        """
+        Look up all ``keys`` in a single exchange with the DBManager.
+
+        Requests of more than :data:`MULTI_GET_MAX_KEYS` keys are split into several
+        MULTI_GET requests. Each one is sent once the values of the previous one are
+        read, so that the responses never pile up in the socket buffers.
+        """
+        return self._multi_get(keys)
+
+    def snapshot_multi_get(self,
+                           snapshot_id: int,
+                           keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        """
+        Like :meth:`multi_get`, but reads from the DBManager snapshot ``snapshot_id``.
+        """
+        return self._multi_get(keys, snapshot_id)
+
+    def _multi_get(self,
+                   keys: Sequence[bytes],
+                   snapshot_id: int = None) -> Tuple[Optional[bytes], ...]:
+        if not keys:
+            return ()
+
+        values = []
+        self._check_not_iterating()
+        with self._lock:
+            for chunk in _chunk_multi_get(keys):
+                self._socket.sendall(_encode_multi_get(chunk, snapshot_id))
+                for _ in chunk:
+                    result_byte = self._socket.read_exactly(1)
+                    if result_byte == SUCCESS_BYTE:
+                        value_size_data = self._socket.read_exactly(LEN_BYTES)
+                        values.append(
+                            self._socket.read_exactly(int.from_bytes(value_size_data, 'little'))
+                        )
+                    elif result_byte == FAIL_BYTE:
+                        values.append(None)
+                    else:
+                        raise Exception(f"Unknown result byte: {result_byte.hex}")
+
+        return tuple(values)
+
+    def _check_not_iterating(self) -> None:
+        if self._iterating_thread == threading.get_ident():
+            raise ValidationError(
+                "Cannot use the DBClient connection of an unfinished iteration from the "
+                "thread iterating over it. Finish or close the iteration first, or "
+                "connect the client with DBClient.connect() so that iterations get a "
+                "connection of their own."
+            )
+
+    def iterate(self,
+                start: bytes = None,
+                stop: bytes = None,
+                batch_size: int = ITERATE_BATCH_SIZE) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Iterate over the ``(key, value)`` pairs with ``start <= key < stop`` in key
+        order, streamed from the DBManager in batches of up to ``batch_size`` pairs.
+
+        An iteration keeps its connection busy until it finishes or the generator is
+        closed. Clients made by :meth:`connect` open a new connection for it, closed
+        with the generator, so the client stays usable in the meantime, from the loop
+        body too. Clients made from a bare socket iterate on their own connection,
+        and raise ``ValidationError`` if the iterating thread uses them before the
+        iteration is over.
+        """
+        request = ITERATE.value + _encode_range(start, stop) + struct.pack('<I', batch_size)
+        return self._run_iterate(request)
+
+    def snapshot_iterate(self,
+                         snapshot_id: int,
+                         start: bytes = None,
+                         stop: bytes = None,
+                         batch_size: int = ITERATE_BATCH_SIZE) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Like :meth:`iterate`, but reads from the DBManager snapshot ``snapshot_id``.
+        """
+        request = (
+            SNAPSHOT_ITERATE.value
+            + _encode_snapshot_id(snapshot_id)
+            + _encode_range(start, stop)
+            + struct.pack('<I', batch_size)
+        )
+        return self._run_iterate(request)
+
+    def _run_iterate(self, request: bytes) -> Iterator[Tuple[bytes, bytes]]:
+        if self._path is not None:
+            client = DBClient.connect(self._path)
+            try:
+                yield from client._iterate(request)
+            finally:
+                client.close()
+        else:
+            self._check_not_iterating()
+            with self._lock:
+                self._iterating_thread = threading.get_ident()
+                try:
+                    yield from self._iterate(request)
+                finally:
+                    self._iterating_thread = None
+
+    def _iterate(self, request: bytes) -> Iterator[Tuple[bytes, bytes]]:
+        # Run the ITERATE exchange, on a connection nothing else uses until it's over
+        self._socket.sendall(request)
+        if Result(self._socket.read_exactly(1)) is FAIL:
+            raise NotImplementedError("The database does not support iteration")
+
+        while True:
+            batch = self._read_iterate_batch()
+            if not batch:
+                return
+            # Ask for the next batch before handing this one out, so the
+            # DBManager reads ahead while the caller is busy.
+            self._socket.sendall(SUCCESS_BYTE)
+            try:
+                yield from batch
+            except GeneratorExit:
+                # The next batch was already requested; drain it and stop there
+                if self._read_iterate_batch():
+                    self._socket.sendall(FAIL_BYTE)
+                raise
+
+    def iterate_prefix(self,
+                       prefix: bytes,
+                       batch_size: int = ITERATE_BATCH_SIZE) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Iterate over all ``(key, value)`` pairs whose key starts with ``prefix``.
+        """
+        return self.iterate(prefix, _prefix_upper_bound(prefix), batch_size)
+
+    def seek(self,
+             start: bytes = None,
+             stop: bytes = None) -> Optional[Tuple[bytes, bytes]]:
+        """
+        Return the first ``(key, value)`` pair with ``start <= key < stop``, or
+        ``None``, in a single exchange with the DBManager.
+        """
+        return self._seek(SEEK.value + _encode_range(start, stop))
+
+    def snapshot_seek(self,
+                      snapshot_id: int,
+                      start: bytes = None,
+                      stop: bytes = None) -> Optional[Tuple[bytes, bytes]]:
+        """
+        Like :meth:`seek`, but reads from the DBManager snapshot ``snapshot_id``.
+        """
+        request = SNAPSHOT_SEEK.value + _encode_snapshot_id(snapshot_id) + _encode_range(start, stop)
+        return self._seek(request)
+
+    def _seek(self, request: bytes) -> Optional[Tuple[bytes, bytes]]:
+        self._check_not_iterating()
+        with self._lock:
+            self._socket.sendall(request)
+            if Result(self._socket.read_exactly(1)) is FAIL:
+                raise NotImplementedError("The database does not support iteration")
+            batch = self._read_iterate_batch()
+
+        if batch:
+            return batch[0]
+        else:
+            return None
+
+    def _read_iterate_batch(self) -> Tuple[Tuple[bytes, bytes], ...]:
+        pair_count = int.from_bytes(self._socket.read_exactly(LEN_BYTES), 'little')
+        if not pair_count:
+            return ()
+
+        sizes = struct.unpack(
+            '<' + 'I' * (2 * pair_count),
+            self._socket.read_exactly(DOUBLE_LEN_BYTES * pair_count),
+        )
+        data = self._socket.read_exactly(sum(sizes))
+
+        pairs = []
+        offset = 0
+        for key_size, value_size in partition(2, sizes):
+            value_offset = offset + key_size
+            pairs.append((data[offset:value_offset], data[value_offset:value_offset + value_size]))
+            offset = value_offset + value_size
+        return tuple(pairs)
+
     def __setitem__(self, key: bytes, value: bytes) -> None:
+        self._check_not_iterating()
         with self._lock:
             self._socket.sendall(
                 SET.value + struct.pack('<II', len(key), len(value)) + key + value
@@ -300,6 +972,7 @@ class DBClient(BaseAtomicDB):
             Result(self._socket.read_exactly(1))
 
     def __delitem__(self, key: bytes) -> None:
+        self._check_not_iterating()
         with self._lock:
             self._socket.sendall(DELETE.value + len(key).to_bytes(4, 'little') + key)
             result_byte = self._socket.read_exactly(1)
@@ -312,6 +985,7 @@ class DBClient(BaseAtomicDB):
             raise Exception(f"Unknown result byte: {result_byte.hex}")
 
     def _exists(self, key: bytes) -> bool:
+        self._check_not_iterating()
         with self._lock:
             self._socket.sendall(EXISTS.value + len(key).to_bytes(4, 'little') + key)
             result_byte = self._socket.read_exactly(1)
@@ -327,7 +1001,9 @@ class DBClient(BaseAtomicDB):
     def atomic_batch(self) -> Iterator[AtomicBatch]:
         batch = AtomicBatch(self)
         yield batch
-        diff = batch.finalize()
+        self._write_diff(batch.finalize())
+
+    def _write_diff(self, diff: DBDiff) -> None:
         pending_deletes = diff.deleted_keys()
         pending_kv_pairs = diff.pending_items()
 
@@ -348,6 +1024,7 @@ class DBClient(BaseAtomicDB):
             *delete_sizes,
         )
         kv_and_delete_data = b''.join(itertools.chain(*pending_kv_pairs, pending_deletes))
+        self._check_not_iterating()
         with self._lock:
             self._socket.sendall(
                 ATOMIC_BATCH.value + kv_pair_count_and_size_data + kv_and_delete_data
@@ -370,7 +1047,309 @@ class DBClient(BaseAtomicDB):
         s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
         cls.logger.debug("Opened connection to %s: %s", path, s)
         s.connect(str(path))
-        return cls(s)
+        return cls(s, path)
+
+
+class PooledDBClient(BaseAtomicDB):
+    """
+    Spreads database operations over several :class:`DBClient` connections, so that
+    reads issued from different threads don't queue up behind a single socket.
+
+    Every operation checks a connection out of the pool for its duration, and waits
+    for one to be checked back in if all of them are busy.
+    """
+    logger = logging.getLogger('veda.db.client.PooledDBClient')
+
+    def __init__(self, clients: Sequence[DBClient]) -> None:
+        if not clients:
+            raise ValidationError("PooledDBClient requires at least one connection")
+
+        self._clients = tuple(clients)
+        self._idle_clients: 'queue.LifoQueue[DBClient]' = queue.LifoQueue()
+        for client in self._clients:
+            self._idle_clients.put(client)
+
+    @property
+    def pool_size(self) -> int:
+        return len(self._clients)
+
+    @contextlib.contextmanager
+    def _checkout(self) -> Iterator[DBClient]:
+        client = self._idle_clients.get()
+        try:
+            yield client
+        finally:
+            self._idle_clients.put(client)
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self,
+                 exc_type: Type[BaseException],
+                 exc_value: BaseException,
+                 exc_tb: TracebackType) -> None:
+        self.close()
+
+    def __getitem__(self, key: bytes) -> bytes:
+        with self._checkout() as client:
+            return client[key]
+
+    def multi_get(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        with self._checkout() as client:
+            return client.multi_get(keys)
+
+    def snapshot_get(self, snapshot_id: int, key: bytes) -> bytes:
+        with self._checkout() as client:
+            return client.snapshot_get(snapshot_id, key)
+
+    def snapshot_multi_get(self,
+                           snapshot_id: int,
+                           keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        with self._checkout() as client:
+            return client.snapshot_multi_get(snapshot_id, keys)
+
+    def iterate(self,
+                start: bytes = None,
+                stop: bytes = None,
+                batch_size: int = ITERATE_BATCH_SIZE) -> Iterator[Tuple[bytes, bytes]]:
+        # Iterations of connected clients don't use the connection of the client, so
+        # they don't hold a connection of the pool either
+        return self._clients[0].iterate(start, stop, batch_size)
+
+    def iterate_prefix(self,
+                       prefix: bytes,
+                       batch_size: int = ITERATE_BATCH_SIZE) -> Iterator[Tuple[bytes, bytes]]:
+        return self._clients[0].iterate_prefix(prefix, batch_size)
+
+    def snapshot_iterate(self,
+                         snapshot_id: int,
+                         start: bytes = None,
+                         stop: bytes = None,
+                         batch_size: int = ITERATE_BATCH_SIZE) -> Iterator[Tuple[bytes, bytes]]:
+        return self._clients[0].snapshot_iterate(snapshot_id, start, stop, batch_size)
+
+    def seek(self,
+             start: bytes = None,
+             stop: bytes = None) -> Optional[Tuple[bytes, bytes]]:
+        with self._checkout() as client:
+            return client.seek(start, stop)
+
+    def snapshot_seek(self,
+                      snapshot_id: int,
+                      start: bytes = None,
+                      stop: bytes = None) -> Optional[Tuple[bytes, bytes]]:
+        with self._checkout() as client:
+            return client.snapshot_seek(snapshot_id, start, stop)
+
+    def __setitem__(self, key: bytes, value: bytes) -> None:
+        with self._checkout() as client:
+            client[key] = value
+
+    def __delitem__(self, key: bytes) -> None:
+        with self._checkout() as client:
+            del client[key]
+
+    def _exists(self, key: bytes) -> bool:
+        with self._checkout() as client:
+            return client._exists(key)
+
+    @contextlib.contextmanager
+    def atomic_batch(self) -> Iterator[AtomicBatch]:
+        batch = AtomicBatch(self)
+        yield batch
+        diff = batch.finalize()
+        with self._checkout() as client:
+            client._write_diff(diff)
+
+    def close(self) -> None:
+        for client in self._clients:
+            client.close()
+
+    @classmethod
+    def connect(cls,
+                path: pathlib.Path,
+                pool_size: int,
+                timeout: int = 5) -> "PooledDBClient":
+        if pool_size < 1:
+            raise ValidationError(f"Pool size must be at least 1, got {pool_size}")
+
+        clients = tuple(DBClient.connect(path, timeout) for _ in range(pool_size))
+        cls.logger.debug("Opened %d pooled connections to %s", pool_size, path)
+        return cls(clients)
+
+
+ResponseReader = Callable[[asyncio.StreamReader], Awaitable[Any]]
+
+
+async def _read_value(reader: asyncio.StreamReader) -> Optional[bytes]:
+    result_byte = await reader.readexactly(1)
+    if result_byte == SUCCESS_BYTE:
+        value_size_data = await reader.readexactly(LEN_BYTES)
+        return await reader.readexactly(int.from_bytes(value_size_data, 'little'))
+    elif result_byte == FAIL_BYTE:
+        return None
+    else:
+        raise Exception(f"Unknown result byte: {result_byte.hex}")
+
+
+async def _read_flag(reader: asyncio.StreamReader) -> bool:
+    result_byte = await reader.readexactly(1)
+    if result_byte == SUCCESS_BYTE:
+        return True
+    elif result_byte == FAIL_BYTE:
+        return False
+    else:
+        raise Exception(f"Unknown result byte: {result_byte.hex}")
+
+
+class AsyncDBClient:
+    """
+    An asyncio client for the :class:`DBManager` protocol.
+
+    Requests are written as soon as they are made and a single reader task resolves
+    them in the order the DBManager answers, so any number of requests can be in
+    flight on one connection without blocking the event loop.
+    """
+    logger = logging.getLogger('veda.db.client.AsyncDBClient')
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._pending: 'asyncio.Queue[Tuple[ResponseReader, asyncio.Future[Any]]]' = (
+            asyncio.Queue()
+        )
+        self._response_task = create_task(
+            self._read_responses(),
+            f'AsyncDBClient/{writer.get_extra_info("peername")}',
+        )
+
+    async def __aenter__(self) -> 'AsyncDBClient':
+        return self
+
+    async def __aexit__(self,
+                        exc_type: Type[BaseException],
+                        exc_value: BaseException,
+                        exc_tb: TracebackType) -> None:
+        await self.close()
+
+    async def _read_responses(self) -> None:
+        while True:
+            read_response, future = await self._pending.get()
+            try:
+                result = await read_response(self._reader)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_exception(ConnectionError("AsyncDBClient is closed"))
+                raise
+            except Exception as err:
+                self.logger.debug("%s: closing after failed read: %s", self, err)
+                if not future.done():
+                    future.set_exception(err)
+                self._fail_pending(err)
+                return
+            if not future.done():
+                future.set_result(result)
+
+    def _fail_pending(self, err: Exception) -> None:
+        while not self._pending.empty():
+            _, future = self._pending.get_nowait()
+            if not future.done():
+                future.set_exception(err)
+
+    async def _request(self, request: bytes, read_response: ResponseReader) -> Any:
+        if self._response_task.done():
+            raise ConnectionError("AsyncDBClient is closed")
+
+        future: 'asyncio.Future[Any]' = asyncio.get_running_loop().create_future()
+        # Writing and queueing happen without yielding to the loop, so responses are
+        # always matched with their requests in order.
+        self._writer.write(request)
+        self._pending.put_nowait((read_response, future))
+        await self._writer.drain()
+        return await future
+
+    async def coro_get(self, key: bytes) -> bytes:
+        value = await self._request(_encode_key_request(GET, key), _read_value)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    async def coro_multi_get(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        return await self._coro_multi_get(keys)
+
+    async def _coro_multi_get(self,
+                              keys: Sequence[bytes],
+                              snapshot_id: int = None) -> Tuple[Optional[bytes], ...]:
+        if not keys:
+            return ()
+
+        async def read_values(reader: asyncio.StreamReader) -> Tuple[Optional[bytes], ...]:
+            return tuple([await _read_value(reader) for _ in keys])
+
+        return await self._request(_encode_multi_get(keys, snapshot_id), read_values)
+
+    async def coro_exists(self, key: bytes) -> bool:
+        return await self._request(_encode_key_request(EXISTS, key), _read_flag)
+
+    async def coro_set(self, key: bytes, value: bytes) -> None:
+        await self._request(
+            SET.value + struct.pack('<II', len(key), len(value)) + key + value,
+            _read_flag,
+        )
+
+    async def coro_delete(self, key: bytes) -> None:
+        if not await self._request(_encode_key_request(DELETE, key), _read_flag):
+            raise KeyError(key)
+
+    async def coro_snapshot(self) -> int:
+        """
+        Take a snapshot of the database and return its id. It stays readable from
+        any connection until released, or until this client disconnects.
+        """
+        async def read_snapshot_id(reader: asyncio.StreamReader) -> Optional[int]:
+            if await _read_flag(reader):
+                return int.from_bytes(await reader.readexactly(SNAPSHOT_ID_BYTES), 'little')
+            else:
+                return None
+
+        snapshot_id = await self._request(SNAPSHOT.value, read_snapshot_id)
+        if snapshot_id is None:
+            raise NotImplementedError("The database does not support snapshots")
+        return snapshot_id
+
+    async def coro_release_snapshot(self, snapshot_id: int) -> None:
+        request = RELEASE_SNAPSHOT.value + _encode_snapshot_id(snapshot_id)
+        if not await self._request(request, _read_flag):
+            raise ValidationError(f"Unknown database snapshot: {snapshot_id}")
+
+    async def coro_snapshot_get(self, snapshot_id: int, key: bytes) -> bytes:
+        value = await self._request(_encode_snapshot_get(snapshot_id, key), _read_value)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    async def coro_snapshot_multi_get(
+            self,
+            snapshot_id: int,
+            keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        return await self._coro_multi_get(keys, snapshot_id)
+
+    async def close(self) -> None:
+        self._response_task.cancel()
+        self._fail_pending(ConnectionError("AsyncDBClient is closed"))
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except OSError as e:
+            if e.errno != errno.ENOTCONN:
+                raise
+
+    @classmethod
+    async def connect(cls, path: pathlib.Path, timeout: int = 5) -> "AsyncDBClient":
+        await asyncio.get_running_loop().run_in_executor(None, wait_for_ipc, path, timeout)
+        reader, writer = await asyncio.open_unix_connection(str(path))
+        cls.logger.debug("Opened async connection to %s", path)
+        return cls(reader, writer)
 
 
 def _run() -> None:
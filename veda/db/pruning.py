@@ -0,0 +1,284 @@
+import collections
+import itertools
+import logging
+import time
+from typing import (
+    Any,
+    Counter,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from eth_typing import (
+    BlockNumber,
+    Hash32,
+)
+import rlp
+from trie.constants import (
+    NODE_TYPE_BRANCH,
+    NODE_TYPE_EXTENSION,
+    NODE_TYPE_LEAF,
+)
+from trie.typing import (
+    RawHexaryNode,
+)
+from trie.utils.nodes import (
+    get_node_type,
+)
+
+from veda.abc import (
+    AtomicDatabaseAPI,
+)
+from veda.constants import (
+    BLANK_ROOT_HASH,
+)
+from veda.db.cache import (
+    get_trie_node_cache,
+)
+from veda.db.manager import (
+    MULTI_GET_MAX_KEYS,
+)
+from veda.db.schema import (
+    SchemaV1,
+)
+
+
+class StatePruner:
+    """
+    Delete the account and storage trie nodes that are no longer reachable from the
+    state of the last ``blocks_to_keep`` blocks.
+
+    Every trie node that is managed by the pruner has a reference count: the number
+    of stored nodes and accounts that point to it, plus one for every kept block that
+    has it as state root. Adding a block references its state root, and a node that
+    is reached for the first time references its children in turn. When a block falls
+    out of the window its state root is dereferenced, and nodes that drop to zero are
+    deleted, and dereference their children.
+
+    Nodes without a reference count, like those written before pruning was enabled,
+    are counted once the state of a new block reaches them, and are never deleted
+    otherwise. The first state added can reach all of them, so count them once up
+    front with :meth:`adopt_state`. Bytecode is never deleted.
+    """
+    logger = logging.getLogger('veda.db.pruning.StatePruner')
+
+    def __init__(self, db: AtomicDatabaseAPI, blocks_to_keep: int) -> None:
+        if blocks_to_keep < 1:
+            raise ValueError(f"Must keep the state of at least one block, got {blocks_to_keep}")
+        self._db = db
+        self._blocks_to_keep = blocks_to_keep
+
+        # Pending changes of a single add_block() call, 0 for a deleted count
+        self._refcounts: Dict[Hash32, int] = {}
+        self._deleted_nodes: Set[Hash32] = set()
+
+    @property
+    def blocks_to_keep(self) -> int:
+        return self._blocks_to_keep
+
+    def adopt_state(self, block_number: BlockNumber, state_root: Hash32) -> bool:
+        """
+        Keep the state of an already persisted block, usually the canonical head when
+        pruning starts, unless it is kept already. Returns whether it was added.
+
+        When pruning is first enabled on an existing database, this counts the
+        references of every node of the state. Otherwise the first imported block
+        would do it, and take as long.
+        """
+        if self._db.get(SchemaV1.make_state_pruning_root_key(block_number)) == state_root:
+            return False
+
+        self.logger.info(
+            "Counting the trie node references of the state of block #%d, this can "
+            "take a while the first time pruning is enabled",
+            block_number,
+        )
+        start = time.monotonic()
+        self.add_block(block_number, state_root)
+        self.logger.info(
+            "Counted the state of block #%d in %.1fs",
+            block_number,
+            time.monotonic() - start,
+        )
+        return True
+
+    def add_block(self, block_number: BlockNumber, state_root: Hash32) -> int:
+        """
+        Keep the state of a newly persisted block, and delete the nodes that only the
+        state of the block falling out of the window still used.
+
+        Adding a block number again replaces the state root kept for it. Returns the
+        number of deleted nodes.
+        """
+        journal_key = SchemaV1.make_state_pruning_root_key(block_number)
+        previous_root = self._db.get(journal_key)
+        if previous_root == state_root:
+            return 0
+
+        pruned_roots = {}
+        pruned_number = block_number - self._blocks_to_keep
+        # Walk back until the first gap, in case fewer blocks are kept than before
+        while pruned_number >= 0:
+            pruned_root = self._db.get(SchemaV1.make_state_pruning_root_key(pruned_number))
+            if pruned_root is None:
+                break
+            pruned_roots[pruned_number] = Hash32(pruned_root)
+            pruned_number -= 1
+
+        try:
+            # Reference the new state first, so that the nodes it shares with the
+            # released states are never deleted
+            self._reference(state_root)
+            if previous_root is not None:
+                self._dereference(Hash32(previous_root))
+            for pruned_root in pruned_roots.values():
+                self._dereference(pruned_root)
+
+            with self._db.atomic_batch() as write_batch:
+                for node_hash, refcount in self._refcounts.items():
+                    refcount_key = SchemaV1.make_trie_node_refcount_key(node_hash)
+                    if refcount:
+                        write_batch[refcount_key] = refcount.to_bytes(4, 'big')
+                    else:
+                        write_batch.delete(refcount_key)
+                for node_hash in self._deleted_nodes:
+                    write_batch.delete(node_hash)
+                for number in pruned_roots:
+                    write_batch.delete(SchemaV1.make_state_pruning_root_key(number))
+                write_batch[journal_key] = state_root
+
+            node_cache = get_trie_node_cache()
+            for node_hash in self._deleted_nodes:
+                node_cache.discard(node_hash)
+
+            deleted_count = len(self._deleted_nodes)
+        finally:
+            self._refcounts = {}
+            self._deleted_nodes = set()
+
+        self.logger.debug(
+            "Kept state of block #%d, released %d old states and deleted %d trie nodes",
+            block_number,
+            len(pruned_roots),
+            deleted_count,
+        )
+        return deleted_count
+
+    def _reference(self, root_hash: Hash32) -> None:
+        references: Counter[Hash32] = collections.Counter()
+        if root_hash != BLANK_ROOT_HASH:
+            references[root_hash] += 1
+
+        # Walk the trie in batches of nodes, to look up the counts of a batch at once
+        while references:
+            node_hashes, references = _pop_batch(references)
+            new_nodes = []
+            for node_hash, refcount in zip(node_hashes, self._get_refcounts(tuple(node_hashes))):
+                if not refcount:
+                    new_nodes.append(node_hash)
+                self._refcounts[node_hash] = (refcount or 0) + node_hashes[node_hash]
+
+            for node_hash, encoded_node in zip(new_nodes, self._db.multi_get(tuple(new_nodes))):
+                if encoded_node is None:
+                    self.logger.warning("Trie node %s is missing", node_hash.hex())
+                else:
+                    references.update(_get_references(rlp.decode(encoded_node)))
+
+    def _dereference(self, root_hash: Hash32) -> None:
+        references: Counter[Hash32] = collections.Counter()
+        if root_hash != BLANK_ROOT_HASH:
+            references[root_hash] += 1
+
+        while references:
+            node_hashes, references = _pop_batch(references)
+            dead_nodes = []
+            for node_hash, refcount in zip(node_hashes, self._get_refcounts(tuple(node_hashes))):
+                if not refcount:
+                    # Not managed by the pruner, or already deleted
+                    continue
+                refcount -= node_hashes[node_hash]
+                if refcount <= 0:
+                    dead_nodes.append(node_hash)
+                    refcount = 0
+                self._refcounts[node_hash] = refcount
+
+            for node_hash, encoded_node in zip(dead_nodes, self._db.multi_get(tuple(dead_nodes))):
+                self._deleted_nodes.add(node_hash)
+                if encoded_node is not None:
+                    references.update(_get_references(rlp.decode(encoded_node)))
+
+    def _get_refcounts(self, node_hashes: Sequence[Hash32]) -> Tuple[Optional[int], ...]:
+        stored_hashes = tuple(
+            node_hash for node_hash in node_hashes if node_hash not in self._refcounts
+        )
+        stored_refcounts = dict(zip(
+            stored_hashes,
+            self._db.multi_get(tuple(
+                SchemaV1.make_trie_node_refcount_key(node_hash) for node_hash in stored_hashes
+            )),
+        ))
+
+        refcounts: List[Optional[int]] = []
+        for node_hash in node_hashes:
+            if node_hash in self._refcounts:
+                refcounts.append(self._refcounts[node_hash])
+            else:
+                encoded = stored_refcounts[node_hash]
+                refcounts.append(None if encoded is None else int.from_bytes(encoded, 'big'))
+        return tuple(refcounts)
+
+
+def _pop_batch(references: Counter[Hash32]) -> Tuple[Counter[Hash32], Counter[Hash32]]:
+    """
+    Split up to :data:`MULTI_GET_MAX_KEYS` nodes off ``references``, so that a single
+    lookup never holds a whole level of a large trie. Returns them and the rest.
+    """
+    if len(references) <= MULTI_GET_MAX_KEYS:
+        return references, collections.Counter()
+    batch = collections.Counter(dict(itertools.islice(references.items(), MULTI_GET_MAX_KEYS)))
+    for node_hash in batch:
+        del references[node_hash]
+    return batch, references
+
+
+def _get_references(node: RawHexaryNode) -> Iterable[Hash32]:
+    """
+    Yield the hashes of the nodes that a decoded trie node points to.
+    """
+    node_type = get_node_type(node)
+    if node_type == NODE_TYPE_BRANCH:
+        for child in node[:16]:
+            yield from _get_child_references(child)
+        if node[16]:
+            yield from _get_value_references(node[16])
+    elif node_type == NODE_TYPE_EXTENSION:
+        yield from _get_child_references(node[1])
+    elif node_type == NODE_TYPE_LEAF:
+        yield from _get_value_references(node[1])
+
+
+def _get_child_references(child: Any) -> Iterable[Hash32]:
+    if isinstance(child, list):
+        # Nodes shorter than a hash are embedded in their parent
+        yield from _get_references(child)
+    elif len(child) == 32:
+        yield Hash32(child)
+
+
+def _get_value_references(value: bytes) -> Iterable[Hash32]:
+    # Only the account trie has values that point to other nodes, through the
+    # storage root of an account. Storage values are plain integers.
+    try:
+        item = rlp.decode(value)
+    except rlp.DecodingError:
+        return
+
+    if isinstance(item, list) and len(item) == 4:
+        _nonce, _balance, storage_root, _code_hash = item
+        if len(storage_root) == 32 and storage_root != BLANK_ROOT_HASH:
+            yield Hash32(storage_root)
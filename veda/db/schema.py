@@ -1,4 +1,5 @@
 from eth_typing import (
+    Address,
     BlockNumber,
     Hash32,
 )
@@ -49,3 +50,101 @@ class SchemaV1(SchemaAPI):
     @staticmethod
     def make_block_hash_to_transactions(block_hash: Hash32) -> bytes:
         return b"block-hash-to-transactions:%d" % block_hash
+
+    @staticmethod
+    def make_block_data_key(root_hash: Hash32) -> bytes:
+        return b"block-data:%s" % root_hash
+
+    # Flat state snapshot
+    @staticmethod
+    def make_state_snapshot_root_key() -> bytes:
+        return b"v1:state-snapshot-root"
+
+    @staticmethod
+    def make_state_snapshot_account_key(address_hash: Hash32) -> bytes:
+        return b"state-snapshot-account:%s" % address_hash
+
+    @staticmethod
+    def make_state_snapshot_storage_key(address_hash: Hash32,
+                                        incarnation: int,
+                                        slot_hash: Hash32) -> bytes:
+        return b"state-snapshot-storage:%s%s%s" % (
+            address_hash,
+            incarnation.to_bytes(4, 'big'),
+            slot_hash,
+        )
+
+    @staticmethod
+    def make_state_snapshot_version_key() -> bytes:
+        return b"v1:state-snapshot-version"
+
+    # State history
+    @staticmethod
+    def make_state_history_root_key(state_root: Hash32) -> bytes:
+        return b"state-history-root:%s" % state_root
+
+    @staticmethod
+    def make_state_history_account_key(address_hash: Hash32, version: int) -> bytes:
+        return b"state-history-account:%s%s" % (address_hash, version.to_bytes(8, 'big'))
+
+    @staticmethod
+    def make_state_history_storage_key(address_hash: Hash32,
+                                       incarnation: int,
+                                       slot_hash: Hash32,
+                                       version: int) -> bytes:
+        return b"state-history-storage:%s%s%s%s" % (
+            address_hash,
+            incarnation.to_bytes(4, 'big'),
+            slot_hash,
+            version.to_bytes(8, 'big'),
+        )
+
+    # State pruning
+    @staticmethod
+    def make_trie_node_refcount_key(node_hash: Hash32) -> bytes:
+        return b"trie-node-refcount:%s" % node_hash
+
+    @staticmethod
+    def make_state_pruning_root_key(block_number: BlockNumber) -> bytes:
+        return b"state-pruning-root:%d" % block_number
+
+    # Freezer
+    @staticmethod
+    def make_frozen_block_count_key() -> bytes:
+        return b"v1:frozen-block-count"
+
+    @staticmethod
+    def make_frozen_header_number_key(block_hash: Hash32) -> bytes:
+        return b"frozen-header-number:%s" % block_hash
+
+    @staticmethod
+    def make_block_data_refcount_key(root_hash: Hash32) -> bytes:
+        return b"block-data-refcount:%s" % root_hash
+
+    # Log index
+    @staticmethod
+    def make_log_index_tail_key() -> bytes:
+        return b"v1:log-index-tail"
+
+    @staticmethod
+    def make_log_index_address_key(address: Address, block_number: BlockNumber) -> bytes:
+        return b"log-index-address:%s%s" % (address, block_number.to_bytes(8, 'big'))
+
+    @staticmethod
+    def make_log_index_topic_key(position: int,
+                                 topic: Hash32,
+                                 block_number: BlockNumber) -> bytes:
+        return b"log-index-topic:%s%s%s" % (
+            position.to_bytes(1, 'big'),
+            topic,
+            block_number.to_bytes(8, 'big'),
+        )
+
+    # Bloom bits
+    @staticmethod
+    def make_bloom_bits_tail_key() -> bytes:
+        return b"v1:bloom-bits-tail"
+
+    @staticmethod
+    def make_bloom_bits_key(bit: int, section: int) -> bytes:
+        return b"bloom-bits:%s%s" % (bit.to_bytes(2, 'big'), section.to_bytes(8, 'big'))
@@ -0,0 +1,172 @@
+from contextlib import (
+    closing,
+    contextmanager,
+)
+import logging
+from typing import (
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from eth_utils import (
+    ValidationError,
+)
+
+from veda.abc import (
+    AtomicDatabaseAPI,
+    AtomicWriteBatchAPI,
+)
+from veda.db.atomic import (
+    AtomicDBWriteBatch,
+)
+from veda.db.backends.base import (
+    BaseAtomicDB,
+)
+from veda.db.batch import (
+    BatchDB,
+)
+from veda.db.diff import (
+    DBDiff,
+    DiffMissingError,
+)
+
+
+class WriteSessionDB(BaseAtomicDB):
+    """
+    Wraps an atomic database, and collects all writes made during a
+    :meth:`write_session` into a single atomic batch on the wrapped database.
+
+    Inside a session, the writes are visible to reads through this database, and
+    every ``atomic_batch()`` commits into the session instead of the wrapped database.
+    Outside of a session, all calls go straight to the wrapped database.
+    """
+    logger = logging.getLogger("veda.db.WriteSessionDB")
+
+    wrapped_db: AtomicDatabaseAPI = None
+    _session: Optional[BatchDB] = None
+
+    def __init__(self, wrapped_db: AtomicDatabaseAPI) -> None:
+        self.wrapped_db = wrapped_db
+
+    @property
+    def in_session(self) -> bool:
+        return self._session is not None
+
+    @contextmanager
+    def write_session(self) -> Iterator[None]:
+        """
+        Commit every write made in this context to the wrapped database at once, when
+        the context exits. If an exception is raised, all of them are dropped.
+        """
+        if self._session is not None:
+            raise ValidationError("Cannot open a write session inside another one")
+
+        session = self._session = BatchDB(self.wrapped_db)
+        try:
+            yield
+        except Exception:
+            self.logger.debug("Dropped writes of failed session: %r", session.diff())
+            raise
+        else:
+            with self.wrapped_db.atomic_batch() as write_batch:
+                session.commit_to(write_batch, apply_deletes=True)
+        finally:
+            self._session = None
+
+    def __getitem__(self, key: bytes) -> bytes:
+        if self._session is None:
+            return self.wrapped_db[key]
+        else:
+            return self._session[key]
+
+    def multi_get(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        if self._session is None:
+            return self.wrapped_db.multi_get(keys)
+
+        # Serve pending writes from the session, and fetch the rest in one go
+        values: List[Optional[bytes]] = [None] * len(keys)
+        missing_indices = []
+        track_diff = self._session._track_diff
+        for index, key in enumerate(keys):
+            try:
+                values[index] = track_diff[key]
+            except DiffMissingError as missing:
+                if not missing.is_deleted:
+                    missing_indices.append(index)
+
+        if missing_indices:
+            fetched = self.wrapped_db.multi_get(tuple(keys[index] for index in missing_indices))
+            for index, value in zip(missing_indices, fetched):
+                values[index] = value
+
+        return tuple(values)
+
+    def __setitem__(self, key: bytes, value: bytes) -> None:
+        if self._session is None:
+            self.wrapped_db[key] = value
+        else:
+            self._session[key] = value
+
+    def __delitem__(self, key: bytes) -> None:
+        if self._session is None:
+            del self.wrapped_db[key]
+        else:
+            del self._session[key]
+
+    def _exists(self, key: bytes) -> bool:
+        if self._session is None:
+            return key in self.wrapped_db
+        else:
+            return key in self._session
+
+    def iterate(self,
+                start: bytes = None,
+                stop: bytes = None) -> Iterator[Tuple[bytes, bytes]]:
+        if self._session is None:
+            return self.wrapped_db.iterate(start, stop)
+        else:
+            return self._iterate_session(self._session.diff(), start, stop)
+
+    def seek(self,
+             start: bytes = None,
+             stop: bytes = None) -> Optional[Tuple[bytes, bytes]]:
+        if self._session is None:
+            return self.wrapped_db.seek(start, stop)
+        else:
+            return super().seek(start, stop)
+
+    def _iterate_session(self,
+                         diff: DBDiff,
+                         start: bytes,
+                         stop: bytes) -> Iterator[Tuple[bytes, bytes]]:
+        def in_range(key: bytes) -> bool:
+            return (start is None or key >= start) and (stop is None or key < stop)
+
+        deleted_keys = set(key for key in diff.deleted_keys() if in_range(key))
+        pending = sorted((key, value) for key, value in diff.pending_items() if in_range(key))
+
+        # Merge the pending writes of the session into the wrapped database, in order
+        index = 0
+        with closing(iter(self.wrapped_db.iterate(start, stop))) as stored:
+            for key, value in stored:
+                while index < len(pending) and pending[index][0] < key:
+                    yield pending[index]
+                    index += 1
+                if index < len(pending) and pending[index][0] == key:
+                    yield pending[index]
+                    index += 1
+                elif key not in deleted_keys:
+                    yield key, value
+        yield from pending[index:]
+
+    @contextmanager
+    def atomic_batch(self) -> Iterator[AtomicWriteBatchAPI]:
+        if self._session is None:
+            with self.wrapped_db.atomic_batch() as write_batch:
+                yield write_batch
+        else:
+            with AtomicDBWriteBatch._commit_unless_raises(self._session) as write_batch:
+                yield write_batch
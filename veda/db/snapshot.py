@@ -0,0 +1,253 @@
+import asyncio
+import collections
+import contextlib
+import contextvars
+import logging
+from typing import (
+    AsyncIterator,
+    Iterator,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from eth_typing import BlockNumber
+from eth_utils import ValidationError
+import rlp
+
+from veda.abc import AtomicWriteBatchAPI
+from veda.db.backends.base import BaseAtomicDB
+from veda.db.canonical_index import (
+    get_canonical_index,
+    pin_canonical_index,
+)
+from veda.db.manager import (
+    AsyncDBClient,
+    DBClient,
+    PooledDBClient,
+)
+from veda.db.schema import SchemaV1
+from veda.vm.header import HeaderSedes
+
+
+_pinned_snapshot: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    '_pinned_snapshot',
+    default=None,
+)
+"""
+Id of the DBManager snapshot that reads in the current context are pinned to, if any.
+"""
+
+
+class SnapshotPinner:
+    """
+    Keeps a DBManager snapshot of the last committed chain head, and pins readers
+    to it with :meth:`pin`.
+
+    :meth:`refresh` is called after every block import. Readers that are still
+    running keep the snapshot they started with; it is released once the last
+    of them is done.
+
+    Pinned readers only use the canonical index for the blocks it had up to the
+    head of their snapshot, while no reorg has rewritten it since.
+    """
+    logger = logging.getLogger('veda.db.snapshot.SnapshotPinner')
+
+    def __init__(self, async_db: AsyncDBClient) -> None:
+        self._async_db = async_db
+        self._current: Optional[int] = None
+        self._current_bounds: Optional[Tuple[BlockNumber, int]] = None
+        self._readers: 'collections.Counter[int]' = collections.Counter()
+        self._retired: Set[int] = set()
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def current_snapshot(self) -> Optional[int]:
+        return self._current
+
+    async def refresh(self) -> None:
+        """
+        Take a new snapshot for all subsequent readers.
+
+        Raises :class:`NotImplementedError` if the database doesn't support snapshots.
+        """
+        async with self._refresh_lock:
+            # Read the bounds of the index first: a reorg written after that, even
+            # one the snapshot already sees, changes the generation
+            canonical_index = get_canonical_index()
+            if canonical_index is None:
+                index_bounds = None
+            else:
+                index_bounds = canonical_index.get_bounds()
+
+            snapshot_id = await self._async_db.coro_snapshot()
+            bounds = await self._get_canonical_bounds(snapshot_id, index_bounds)
+            previous = self._current
+            self._current, self._current_bounds = snapshot_id, bounds
+            self.logger.debug("Pinned readers to snapshot %d", snapshot_id)
+            if previous is not None:
+                await self._retire(previous)
+
+    async def _get_canonical_bounds(
+            self,
+            snapshot_id: int,
+            index_bounds: Optional[Tuple[BlockNumber, int]],
+    ) -> Optional[Tuple[BlockNumber, int]]:
+        # Limit the index to the canonical head of the snapshot, or don't use it
+        if index_bounds is None:
+            return None
+        last_block_number, generation = index_bounds
+        try:
+            head_hash = await self._async_db.coro_snapshot_get(
+                snapshot_id,
+                SchemaV1.make_canonical_head_hash_lookup_key(),
+            )
+            encoded_head = await self._async_db.coro_snapshot_get(snapshot_id, head_hash)
+        except KeyError:
+            return None
+        head_block_number = rlp.decode(encoded_head, sedes=HeaderSedes).block_number
+        return BlockNumber(min(last_block_number, head_block_number)), generation
+
+    @contextlib.asynccontextmanager
+    async def pin(self) -> AsyncIterator[Optional[int]]:
+        """
+        Route all database reads made in this context, including those run on an
+        executor through :func:`~veda.rpc._utils.async_dispatch.async_method`, to the
+        current snapshot.
+        """
+        snapshot_id = self._current
+        if snapshot_id is None:
+            yield None
+            return
+
+        self._readers[snapshot_id] += 1
+        token = _pinned_snapshot.set(snapshot_id)
+        try:
+            with pin_canonical_index(self._current_bounds):
+                yield snapshot_id
+        finally:
+            _pinned_snapshot.reset(token)
+            self._readers[snapshot_id] -= 1
+            if not self._readers[snapshot_id]:
+                del self._readers[snapshot_id]
+                if snapshot_id in self._retired:
+                    self._retired.remove(snapshot_id)
+                    await self._release(snapshot_id)
+
+    async def _retire(self, snapshot_id: int) -> None:
+        if self._readers[snapshot_id]:
+            self._retired.add(snapshot_id)
+        else:
+            del self._readers[snapshot_id]
+            await self._release(snapshot_id)
+
+    async def _release(self, snapshot_id: int) -> None:
+        try:
+            await self._async_db.coro_release_snapshot(snapshot_id)
+        except (ConnectionError, ValidationError) as err:
+            self.logger.debug("Could not release snapshot %d: %s", snapshot_id, err)
+
+
+class PinnedSnapshotDB(BaseAtomicDB):
+    """
+    Reads through the snapshot pinned by :meth:`SnapshotPinner.pin`, or the live
+    database if no snapshot is pinned.
+
+    Writes are only allowed outside of a pinned context, because they would not be
+    visible to the reads that follow them.
+    """
+    logger = logging.getLogger('veda.db.snapshot.PinnedSnapshotDB')
+
+    def __init__(self, db: Union[DBClient, PooledDBClient]) -> None:
+        self._db = db
+
+    def __getitem__(self, key: bytes) -> bytes:
+        snapshot_id = _pinned_snapshot.get()
+        if snapshot_id is None:
+            return self._db[key]
+        else:
+            return self._db.snapshot_get(snapshot_id, key)
+
+    def multi_get(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        snapshot_id = _pinned_snapshot.get()
+        if snapshot_id is None:
+            return self._db.multi_get(keys)
+        else:
+            return self._db.snapshot_multi_get(snapshot_id, keys)
+
+    def _exists(self, key: bytes) -> bool:
+        snapshot_id = _pinned_snapshot.get()
+        if snapshot_id is None:
+            return key in self._db
+        else:
+            return self._db.snapshot_multi_get(snapshot_id, (key,))[0] is not None
+
+    def iterate(self,
+                start: bytes = None,
+                stop: bytes = None) -> Iterator[Tuple[bytes, bytes]]:
+        snapshot_id = _pinned_snapshot.get()
+        if snapshot_id is None:
+            return self._db.iterate(start, stop)
+        else:
+            return self._db.snapshot_iterate(snapshot_id, start, stop)
+
+    def seek(self,
+             start: bytes = None,
+             stop: bytes = None) -> Optional[Tuple[bytes, bytes]]:
+        snapshot_id = _pinned_snapshot.get()
+        if snapshot_id is None:
+            return self._db.seek(start, stop)
+        else:
+            return self._db.snapshot_seek(snapshot_id, start, stop)
+
+    def __setitem__(self, key: bytes, value: bytes) -> None:
+        self._validate_unpinned()
+        self._db[key] = value
+
+    def __delitem__(self, key: bytes) -> None:
+        self._validate_unpinned()
+        del self._db[key]
+
+    @contextlib.contextmanager
+    def atomic_batch(self) -> Iterator[AtomicWriteBatchAPI]:
+        self._validate_unpinned()
+        with self._db.atomic_batch() as batch:
+            yield batch
+
+    def _validate_unpinned(self) -> None:
+        snapshot_id = _pinned_snapshot.get()
+        if snapshot_id is not None:
+            raise ValidationError(f"Cannot write while reading from snapshot {snapshot_id}")
+
+
+class AsyncPinnedSnapshotDB:
+    """
+    The :class:`AsyncDBClient` counterpart of :class:`PinnedSnapshotDB`.
+    """
+
+    def __init__(self, async_db: AsyncDBClient) -> None:
+        self._async_db = async_db
+
+    async def coro_get(self, key: bytes) -> bytes:
+        snapshot_id = _pinned_snapshot.get()
+        if snapshot_id is None:
+            return await self._async_db.coro_get(key)
+        else:
+            return await self._async_db.coro_snapshot_get(snapshot_id, key)
+
+    async def coro_multi_get(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        snapshot_id = _pinned_snapshot.get()
+        if snapshot_id is None:
+            return await self._async_db.coro_multi_get(keys)
+        else:
+            return await self._async_db.coro_snapshot_multi_get(snapshot_id, keys)
+
+    async def coro_exists(self, key: bytes) -> bool:
+        snapshot_id = _pinned_snapshot.get()
+        if snapshot_id is None:
+            return await self._async_db.coro_exists(key)
+        else:
+            values = await self._async_db.coro_snapshot_multi_get(snapshot_id, (key,))
+            return values[0] is not None
@@ -0,0 +1,266 @@
+import itertools
+import threading
+from typing import (
+    Any,
+    Hashable,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from eth_typing import (
+    Address,
+    Hash32,
+)
+from lru import (
+    LRU,
+)
+
+from veda.abc import (
+    DatabaseAPI,
+)
+from veda.db.backends.base import (
+    BaseDB,
+)
+from veda.db.hash_trie import (
+    HashTrie,
+)
+
+
+DEFAULT_STATE_CACHE_SIZE = 32 * 1024 * 1024
+
+# Rough cost of an entry on top of its value: the LRU node, the key and the tuples
+_ENTRY_OVERHEAD = 160
+
+
+class StateCacheStats(NamedTuple):
+    account_hits: int
+    account_misses: int
+    slot_hits: int
+    slot_misses: int
+    entries: int
+    size: int
+
+
+class StateCache:
+    """
+    A least recently used cache of encoded accounts and storage slot values, which
+    carries over from one block to the next. It is bounded by an estimate of its
+    memory use in bytes.
+
+    Accounts are cached for a single state root at a time. When a new state root is
+    made from the cached one, :meth:`update_accounts` moves the cache over to it and
+    updates the changed accounts in place. Any other state root starts a new lineage.
+    Lookups take the same lock as updates, so they never see an entry of the new
+    root as one of the old root.
+
+    Storage slots are cached per account, for a single storage root at a time, and
+    :meth:`update_slots` moves them over to a new storage root in the same way.
+
+    A missing account or slot is cached as an empty value.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_STATE_CACHE_SIZE) -> None:
+        self._max_size = max_size
+        # The byte budget is enforced below, every entry is charged at least the overhead
+        self._entries = LRU(max(max_size // _ENTRY_OVERHEAD, 1))
+        self._size = 0
+        self._lock = threading.Lock()
+
+        # Generations tell apart the entries of different lineages, so that switching
+        # lineage doesn't need to find and drop the old entries, they just age out.
+        self._generations = itertools.count()
+        self._state: Tuple[Optional[Hash32], int] = (None, next(self._generations))
+
+        self.account_hits = 0
+        self.account_misses = 0
+        self.slot_hits = 0
+        self.slot_misses = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def state_root(self) -> Optional[Hash32]:
+        return self._state[0]
+
+    #
+    # Accounts
+    #
+    def get_account(self, state_root: Hash32, address: Address) -> Optional[bytes]:
+        with self._lock:
+            cached_root, generation = self._state
+            if cached_root == state_root:
+                encoded = self._entries.get((generation, address))
+            else:
+                encoded = None
+
+            if encoded is None:
+                self.account_misses += 1
+            else:
+                self.account_hits += 1
+        return encoded
+
+    def add_account(self, state_root: Hash32, address: Address, encoded: bytes) -> None:
+        with self._lock:
+            if self._state[0] != state_root:
+                self._state = (state_root, next(self._generations))
+            self._add((self._state[1], address), encoded, len(encoded))
+
+    def update_accounts(self,
+                        old_state_root: Hash32,
+                        new_state_root: Hash32,
+                        changed_accounts: Mapping[Address, bytes]) -> None:
+        """
+        Move the cache from ``old_state_root`` to ``new_state_root``, which differ
+        only by ``changed_accounts``.
+        """
+        with self._lock:
+            cached_root, generation = self._state
+            if cached_root != old_state_root:
+                generation = next(self._generations)
+            self._state = (new_state_root, generation)
+
+            for address, encoded in changed_accounts.items():
+                self._add((generation, address), encoded, len(encoded))
+
+    #
+    # Storage
+    #
+    def get_slot(self, address: Address, storage_root: Hash32, slot: bytes) -> Optional[bytes]:
+        with self._lock:
+            storage = self._entries.get(address)
+            if storage is not None and storage[0] == storage_root:
+                encoded = self._entries.get((storage[1], slot))
+            else:
+                encoded = None
+
+            if encoded is None:
+                self.slot_misses += 1
+            else:
+                self.slot_hits += 1
+        return encoded
+
+    def add_slot(self,
+                 address: Address,
+                 storage_root: Hash32,
+                 slot: bytes,
+                 encoded: bytes) -> None:
+        with self._lock:
+            storage = self._entries.get(address)
+            if storage is None or storage[0] != storage_root:
+                storage = (storage_root, next(self._generations))
+                self._add(address, storage, 0)
+            self._add((storage[1], slot), encoded, len(encoded))
+
+    def update_slots(self,
+                     address: Address,
+                     old_storage_root: Hash32,
+                     new_storage_root: Hash32,
+                     changed_slots: Mapping[bytes, bytes]) -> None:
+        """
+        Move the cached storage of ``address`` from ``old_storage_root`` to
+        ``new_storage_root``, which differ only by ``changed_slots``.
+        """
+        with self._lock:
+            storage = self._entries.get(address)
+            if storage is not None and storage[0] == old_storage_root:
+                generation = storage[1]
+            else:
+                generation = next(self._generations)
+            self._add(address, (new_storage_root, generation), 0)
+
+            for slot, encoded in changed_slots.items():
+                self._add((generation, slot), encoded, len(encoded))
+
+    #
+    # Bookkeeping
+    #
+    def _add(self, key: Hashable, value: Any, value_size: int) -> None:
+        cost = value_size + _ENTRY_OVERHEAD
+        if cost > self._max_size:
+            return
+
+        previous = self._entries.get(key)
+        if previous is not None:
+            self._size -= self._cost(previous)
+        self._entries[key] = value
+        self._size += cost
+
+        while self._size > self._max_size:
+            _, evicted = self._entries.popitem(least_recent=True)
+            self._size -= self._cost(evicted)
+
+    @staticmethod
+    def _cost(value: Any) -> int:
+        if isinstance(value, bytes):
+            return len(value) + _ENTRY_OVERHEAD
+        else:
+            return _ENTRY_OVERHEAD
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._state = (None, next(self._generations))
+
+    def stats(self) -> StateCacheStats:
+        with self._lock:
+            return StateCacheStats(
+                self.account_hits,
+                self.account_misses,
+                self.slot_hits,
+                self.slot_misses,
+                len(self._entries),
+                self._size,
+            )
+
+
+_state_cache = StateCache()
+
+
+def get_state_cache() -> StateCache:
+    """
+    Return the state cache shared by all state databases in this process.
+    """
+    return _state_cache
+
+
+def configure_state_cache(max_size: int) -> None:
+    """
+    Replace the state cache of this process with an empty one of ``max_size`` bytes.
+    A size of zero disables caching.
+    """
+    global _state_cache
+    _state_cache = StateCache(max_size)
+
+
+class CachedAccountLookup(BaseDB):
+    """
+    Read encoded accounts at the current root of ``trie`` through a :class:`StateCache`.
+    Writes go straight to ``db``.
+    """
+
+    def __init__(self, db: DatabaseAPI, trie: HashTrie, state_cache: StateCache) -> None:
+        self._db = db
+        self._trie = trie
+        self._state_cache = state_cache
+
+    def __getitem__(self, address: bytes) -> bytes:
+        state_root = self._trie.root_hash
+        encoded = self._state_cache.get_account(state_root, Address(address))
+        if encoded is None:
+            encoded = self._db[address]
+            self._state_cache.add_account(state_root, Address(address), encoded)
+        return encoded
+
+    def __setitem__(self, address: bytes, encoded: bytes) -> None:
+        self._db[address] = encoded
+
+    def __delitem__(self, address: bytes) -> None:
+        del self._db[address]
+
+    def _exists(self, address: bytes) -> bool:
+        return self[address] != b""
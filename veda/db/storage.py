@@ -1,4 +1,5 @@
 from typing import (
+    Dict,
     FrozenSet,
     List,
     NamedTuple,
@@ -49,9 +50,20 @@ from veda.db.batch import (
 from veda.db.cache import (
     CacheDB,
 )
+from veda.db.flat_snapshot import (
+    FlatStorageLookup,
+    SlotChanges,
+)
 from veda.db.journal import (
     JournalDB,
 )
+from veda.db.state_cache import (
+    StateCache,
+    get_state_cache,
+)
+from veda.db.trie import (
+    update_trie,
+)
 from veda.typing import (
     JournalDBCheckpoint,
 )
@@ -70,6 +82,7 @@ class PendingWrites(NamedTuple):
     write_trie: HexaryTrie  # The write trie at the time of deletion
     trie_nodes_batch: BatchDB  # A batch of all trie nodes written to the trie
     starting_root_hash: Hash32  # The starting root hash
+    changed_slots: Dict[bytes, bytes]  # The slots written to the trie
 
 
 class StorageLookup(BaseDB):
@@ -78,6 +91,10 @@ class StorageLookup(BaseDB):
     lookup. Similarly, it persists changes to the appropriate trie at write time.
 
     StorageLookup also tracks the state roots changed since the last persist.
+
+    Reads from the starting root go through the shared :class:`StateCache`, which is
+    moved over to the new root with the changed slots when committing. On a miss,
+    they are read from the flat state snapshot, if it has the starting root.
     """
 
     logger = get_extended_debug_logger("veda.db.storage.StorageLookup")
@@ -88,13 +105,30 @@ class StorageLookup(BaseDB):
     # These are the new trie nodes, waiting to be committed to disk
     _trie_nodes_batch: BatchDB
 
+    # The encoded values written to the write trie, by slot key, b"" when deleted
+    _changed_slots: Dict[bytes, bytes]
+
+    # The writes not applied to the write trie yet, by hashed slot. They are applied
+    # all at once when the root hash is needed.
+    _pending_slots: Dict[Hash32, bytes]
+
     # When deleting an account, push the pending write info onto this stack.
     # This stack can get as big as the number of transactions per block: one for
     # each delete.
     _historical_write_tries: List[PendingWrites]
 
-    def __init__(self, db: DatabaseAPI, storage_root: Hash32, address: Address) -> None:
+    def __init__(self,
+                 db: DatabaseAPI,
+                 storage_root: Hash32,
+                 address: Address,
+                 state_cache: StateCache = None,
+                 flat_storage: FlatStorageLookup = None) -> None:
         self._db = db
+        if state_cache is None:
+            self._state_cache = get_state_cache()
+        else:
+            self._state_cache = state_cache
+        self._flat_storage = flat_storage
 
         # Set the starting root hash, to be used for on-disk storage read lookups
         self._initialize_to_root_hash(storage_root)
@@ -127,7 +161,33 @@ class StorageLookup(BaseDB):
         return keccak(padded_slot)
 
     def __getitem__(self, key: bytes) -> bytes:
+        if self._write_trie is None:
+            encoded = self._state_cache.get_slot(self._address, self._starting_root_hash, key)
+            if encoded is None:
+                encoded = self._read_slot(key)
+                self._state_cache.add_slot(
+                    self._address,
+                    self._starting_root_hash,
+                    key,
+                    encoded,
+                )
+            return encoded
+        else:
+            return self._read_slot(key)
+
+    def _read_slot(self, key: bytes) -> bytes:
         hashed_slot = self._decode_key(key)
+        if hashed_slot in self._pending_slots:
+            return self._pending_slots[hashed_slot]
+
+        flat_storage = self._flat_storage
+        if (
+            flat_storage is not None
+            and self._write_trie is None
+            and self._starting_root_hash == flat_storage.storage_root
+        ):
+            return flat_storage.get(hashed_slot)
+
         read_trie = self._get_read_trie()
         try:
             return read_trie[hashed_slot]
@@ -142,20 +202,34 @@ class StorageLookup(BaseDB):
 
     def __setitem__(self, key: bytes, value: bytes) -> None:
         hashed_slot = self._decode_key(key)
-        write_trie = self._get_write_trie()
-        write_trie[hashed_slot] = value
+        self._get_write_trie()
+        self._pending_slots[hashed_slot] = value
+        self._changed_slots[key] = value
 
     def _exists(self, key: bytes) -> bool:
         # used by BaseDB for __contains__ checks
         hashed_slot = self._decode_key(key)
+        if hashed_slot in self._pending_slots:
+            return self._pending_slots[hashed_slot] != b""
         read_trie = self._get_read_trie()
         return hashed_slot in read_trie
 
     def __delitem__(self, key: bytes) -> None:
         hashed_slot = self._decode_key(key)
+        self._get_write_trie()
+        self._pending_slots[hashed_slot] = b""
+        self._changed_slots[key] = b""
+
+    def _apply_pending_slots(self) -> None:
+        if not self._pending_slots:
+            return
         write_trie = self._get_write_trie()
         try:
-            del write_trie[hashed_slot]
+            write_trie.root_hash = update_trie(
+                self._trie_nodes_batch,
+                write_trie.root_hash,
+                self._pending_slots,
+            )
         except trie_exceptions.MissingTrieNode as exc:
             raise MissingStorageTrieNode(
                 exc.missing_node_hash,
@@ -164,6 +238,7 @@ class StorageLookup(BaseDB):
                 exc.prefix,
                 self._address,
             ) from exc
+        self._pending_slots = {}
 
     @property
     def has_changed_root(self) -> bool:
@@ -171,16 +246,31 @@ class StorageLookup(BaseDB):
 
     def get_changed_root(self) -> Hash32:
         if self._write_trie is not None:
+            self._apply_pending_slots()
             return self._write_trie.root_hash
         else:
             raise ValidationError(
                 "Asked for changed root when no writes have been made"
             )
 
+    def get_changed_slots(self) -> SlotChanges:
+        """
+        Return the changes that have not been committed yet, by hashed slot.
+        """
+        return SlotChanges(
+            bool(self._historical_write_tries),
+            {
+                self._decode_key(key): encoded
+                for key, encoded in self._changed_slots.items()
+            },
+        )
+
     def _initialize_to_root_hash(self, root_hash: Hash32) -> None:
         self._starting_root_hash = root_hash
         self._write_trie = None
         self._trie_nodes_batch = None
+        self._changed_slots = {}
+        self._pending_slots = {}
 
         # Reset the historical writes, which can't be reverted after committing
         self._historical_write_tries = []
@@ -199,8 +289,16 @@ class StorageLookup(BaseDB):
                 f"{len(self._historical_write_tries)}; Root hash = "
                 f"{encode_hex(self._starting_root_hash)}"
             )
+        self._apply_pending_slots()
         self._trie_nodes_batch.commit_to(db, apply_deletes=False)
 
+        self._state_cache.update_slots(
+            self._address,
+            self._starting_root_hash,
+            self._write_trie.root_hash,
+            self._changed_slots,
+        )
+
         # Mark the trie as having been all written out to the database.
         # It removes the 'dirty' flag and clears out any pending writes.
         self._initialize_to_root_hash(self._write_trie.root_hash)
@@ -213,6 +311,7 @@ class StorageLookup(BaseDB):
         :return: index for reviving the previous trie
         """
         write_trie = self._get_write_trie()
+        self._apply_pending_slots()
 
         # Write the previous trie into a historical stack
         self._historical_write_tries.append(
@@ -220,6 +319,7 @@ class StorageLookup(BaseDB):
                 write_trie,
                 self._trie_nodes_batch,
                 self._starting_root_hash,
+                self._changed_slots,
             )
         )
 
@@ -227,6 +327,8 @@ class StorageLookup(BaseDB):
         self._starting_root_hash = BLANK_ROOT_HASH
         self._write_trie = None
         self._trie_nodes_batch = None
+        self._changed_slots = {}
+        self._pending_slots = {}
 
         return new_idx
 
@@ -249,7 +351,10 @@ class StorageLookup(BaseDB):
             self._write_trie,
             self._trie_nodes_batch,
             self._starting_root_hash,
+            self._changed_slots,
         ) = self._historical_write_tries[trie_index]
+        # The pending writes went to the trie that is dropped
+        self._pending_slots = {}
 
         # Cannot roll forward after a rollback, so remove created/ignored tries.
         # This also deletes the trie that you just reverted to. It will be re-added
@@ -264,7 +369,12 @@ class AccountStorageDB(AccountStorageDatabaseAPI):
     logger = get_extended_debug_logger("veda.db.storage.AccountStorageDB")
 
     def __init__(
-        self, db: AtomicDatabaseAPI, storage_root: Hash32, address: Address
+        self,
+        db: AtomicDatabaseAPI,
+        storage_root: Hash32,
+        address: Address,
+        state_cache: StateCache = None,
+        flat_storage: FlatStorageLookup = None,
     ) -> None:
         """
         Database entries go through several pipes, like so...
@@ -300,7 +410,13 @@ class AccountStorageDB(AccountStorageDatabaseAPI):
         big_endian encoding of the slot integer, and the rlp-encoded value.
         """
         self._address = address
-        self._storage_lookup = StorageLookup(db, storage_root, address)
+        self._storage_lookup = StorageLookup(
+            db,
+            storage_root,
+            address,
+            state_cache,
+            flat_storage,
+        )
         self._storage_cache = CacheDB(self._storage_lookup)
         self._locked_changes = JournalDB(self._storage_cache)
         self._journal_storage = JournalDB(self._locked_changes)
@@ -447,6 +563,13 @@ class AccountStorageDB(AccountStorageDatabaseAPI):
     def get_changed_root(self) -> Hash32:
         return self._storage_lookup.get_changed_root()
 
+    def get_changed_slots(self) -> SlotChanges:
+        """
+        Return whether the storage was wiped, and the encoded values written to it
+        after that, which are still to be persisted.
+        """
+        return self._storage_lookup.get_changed_slots()
+
     def persist(self, db: DatabaseAPI) -> None:
         self._validate_flushed()
         if self._storage_lookup.has_changed_root:
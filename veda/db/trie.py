@@ -1,11 +1,20 @@
 import functools
+import itertools
+import os
 from typing import (
+    Any,
     Dict,
+    Iterator,
+    List,
+    Mapping,
     Sequence,
     Tuple,
     Union,
 )
 
+from eth_hash.auto import (
+    keccak,
+)
 from eth_typing import (
     Hash32,
 )
@@ -13,8 +22,12 @@ import rlp
 from trie import (
     HexaryTrie,
 )
+from trie.exceptions import (
+    MissingTrieNode,
+)
 
 from veda.abc import (
+    DatabaseAPI,
     ReceiptAPI,
     SignedTransactionAPI,
 )
@@ -38,6 +51,11 @@ def make_trie_root_and_nodes(items: BlockRootData) -> TrieRootAndData:
 # Given that, it probably makes sense to use a relatively small cache size here.
 @functools.lru_cache(128)
 def _make_trie_root_and_nodes(items: Tuple[bytes, ...]) -> TrieRootAndData:
+    return _make_ordered_trie_root_and_nodes(items)
+
+
+def _make_trie_root_and_nodes_per_key(items: Tuple[bytes, ...]) -> TrieRootAndData:
+    # Reference implementation of the ordered trie, setting the keys one at a time
     kv_store: Dict[Hash32, bytes] = {}
     trie = HexaryTrie(kv_store, BLANK_ROOT_HASH)
     with trie.squash_changes() as memory_trie:
@@ -45,3 +63,375 @@ def _make_trie_root_and_nodes(items: Tuple[bytes, ...]) -> TrieRootAndData:
             index_key = rlp.encode(index, sedes=rlp.sedes.big_endian_int)
             memory_trie[index_key] = item
     return trie.root_hash, kv_store
+
+
+# A decoded trie node: b"" when blank, else a list of 2 or 17 items. Children are
+# referenced by hash, or inline as a list when they encode to less than 32 bytes.
+Node = Any
+
+# Trie keys and paths below are hex strings, one character per nibble
+TrieChanges = List[Tuple[str, bytes]]
+
+BLANK_NODE = b""
+
+
+def _encode_length(length: int, offset: int) -> bytes:
+    if length < 56:
+        return bytes((offset + length,))
+    encoded_length = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes((offset + 55 + len(encoded_length),)) + encoded_length
+
+
+def _encode_node(node: Node) -> bytes:
+    # Trie nodes only hold strings and lists, which don't need the sedes lookups
+    # of rlp.encode()
+    if isinstance(node, list):
+        payload = b"".join([_encode_node(item) for item in node])
+        return _encode_length(len(payload), 0xc0) + payload
+    elif len(node) == 1 and node[0] < 0x80:
+        return node
+    else:
+        return _encode_length(len(node), 0x80) + node
+
+
+def _decode_item(encoded: bytes, position: int) -> Tuple[Node, int]:
+    prefix = encoded[position]
+    if prefix < 0x80:
+        return encoded[position:position + 1], position + 1
+    elif prefix < 0xb8:
+        start = position + 1
+        end = start + prefix - 0x80
+        return encoded[start:end], end
+    elif prefix < 0xc0:
+        start = position + 1 + prefix - 0xb7
+        end = start + int.from_bytes(encoded[position + 1:start], 'big')
+        return encoded[start:end], end
+    elif prefix < 0xf8:
+        start = position + 1
+        end = start + prefix - 0xc0
+    else:
+        start = position + 1 + prefix - 0xf7
+        end = start + int.from_bytes(encoded[position + 1:start], 'big')
+
+    items = []
+    position = start
+    while position < end:
+        item, position = _decode_item(encoded, position)
+        items.append(item)
+    return items, end
+
+
+def _decode_node(encoded: bytes) -> Node:
+    node, end = _decode_item(encoded, 0)
+    if end != len(encoded):
+        raise rlp.DecodingError("Trailing bytes after trie node", encoded)
+    return node
+
+
+def _encode_path(path: str, is_leaf: bool) -> bytes:
+    flag = 2 if is_leaf else 0
+    if len(path) % 2:
+        return bytes.fromhex(f"{flag + 1}{path}")
+    else:
+        return bytes.fromhex(f"{flag}0{path}")
+
+
+def _decode_path(encoded_path: bytes) -> Tuple[str, bool]:
+    hex_path = encoded_path.hex()
+    flag = int(hex_path[0], 16)
+    if flag & 1:
+        return hex_path[1:], bool(flag & 2)
+    else:
+        return hex_path[2:], bool(flag & 2)
+
+
+class _TrieUpdate:
+    """
+    Applies a batch of changes to a trie in one pass. Only the nodes on the paths to
+    the changed keys are read, and every node of the new trie is encoded and hashed
+    once, where setting the keys one at a time re-encodes the upper nodes for every
+    key.
+    """
+
+    def __init__(self, db: DatabaseAPI, root_hash: Hash32) -> None:
+        self.db = db
+        self.root_hash = root_hash
+        self.new_nodes: Dict[Hash32, bytes] = {}
+
+    def _reference(self, node: Node) -> Union[Hash32, Node]:
+        encoded = _encode_node(node)
+        if len(encoded) < 32:
+            return node
+        node_hash = keccak(encoded)
+        self.new_nodes[node_hash] = encoded
+        return node_hash
+
+    def _resolve(self, reference: Union[bytes, Node], prefix: str, key: str) -> Node:
+        # Decode the node at ``prefix``, which is needed to change ``key``
+        if reference == BLANK_NODE or isinstance(reference, list):
+            return reference
+        try:
+            encoded = self.db[reference]
+        except KeyError:
+            raise MissingTrieNode(
+                reference,
+                self.root_hash,
+                bytes.fromhex(key),
+                tuple(int(nibble, 16) for nibble in prefix),
+            )
+        return _decode_node(encoded)
+
+    def _build(self, items: TrieChanges) -> Node:
+        # Build the trie of sorted items with values, without reading any nodes
+        if not items:
+            return BLANK_NODE
+        elif len(items) == 1:
+            path, value = items[0]
+            return [_encode_path(path, True), value]
+
+        common_prefix = os.path.commonprefix((items[0][0], items[-1][0]))
+        if common_prefix:
+            branch = self._build([(path[len(common_prefix):], value) for path, value in items])
+            return [_encode_path(common_prefix, False), self._reference(branch)]
+
+        node: List[Union[bytes, Node]] = [BLANK_NODE] * 17
+        for nibble, group in itertools.groupby(items, key=lambda item: item[0][:1]):
+            if nibble:
+                child = self._build([(path[1:], value) for path, value in group])
+                node[int(nibble, 16)] = self._reference(child)
+            else:
+                node[16] = next(group)[1]
+        return node
+
+    def _with_prefix(self, path: str, node: Node) -> Node:
+        # Put ``path`` in front of a new node, merging it into a leaf or extension
+        if node == BLANK_NODE:
+            return BLANK_NODE
+        elif len(node) == 2:
+            node_path, is_leaf = _decode_path(node[0])
+            return [_encode_path(path + node_path, is_leaf), node[1]]
+        else:
+            return [_encode_path(path, False), self._reference(node)]
+
+    def apply(self, node: Node, prefix: str, changes: TrieChanges) -> Node:
+        """
+        Return ``node`` with the sorted ``changes`` applied, where an empty value is a
+        delete. Returns the same object if nothing changed.
+        """
+        if node == BLANK_NODE:
+            return self._build([(path, value) for path, value in changes if value])
+
+        if len(node) == 17:
+            return self._apply_to_branch(node, prefix, changes, {})
+
+        node_path, is_leaf = _decode_path(node[0])
+        if is_leaf:
+            values = {node_path: node[1]}
+            values.update(changes)
+            if values == {node_path: node[1]}:
+                return node
+            return self._build([
+                (path, value) for path, value in sorted(values.items()) if value
+            ])
+
+        inside = [
+            (path[len(node_path):], value)
+            for path, value in changes
+            if path.startswith(node_path)
+        ]
+        # Deleting keys that aren't in the trie changes nothing
+        outside = [
+            (path, value)
+            for path, value in changes
+            if value and not path.startswith(node_path)
+        ]
+        if not outside:
+            if not inside:
+                return node
+            child_prefix = prefix + node_path
+            child = self._resolve(node[1], child_prefix, child_prefix + inside[0][0])
+            new_child = self.apply(child, child_prefix, inside)
+            if new_child is child:
+                return node
+            return self._with_prefix(node_path, new_child)
+
+        # The new keys split the extension, so continue with it as a branch
+        branch: List[Union[bytes, Node]] = [BLANK_NODE] * 17
+        nibble = int(node_path[0], 16)
+        split_children = {}
+        if len(node_path) == 1:
+            branch[nibble] = node[1]
+        else:
+            split_children[nibble] = [_encode_path(node_path[1:], False), node[1]]
+        return self._apply_to_branch(branch, prefix, changes, split_children)
+
+    def _apply_to_branch(self,
+                         node: List[Union[bytes, Node]],
+                         prefix: str,
+                         changes: TrieChanges,
+                         new_children: Dict[int, Node]) -> Node:
+        # ``new_children`` are the decoded children that need a reference yet
+        value = node[16]
+        is_changed = bool(new_children)
+        for nibble, group in itertools.groupby(changes, key=lambda change: change[0][:1]):
+            if not nibble:
+                new_value = next(group)[1]
+                is_changed = is_changed or new_value != value
+                value = new_value
+                continue
+
+            index = int(nibble, 16)
+            child_changes = [(path[1:], child_value) for path, child_value in group]
+            child_prefix = prefix + nibble
+            if index in new_children:
+                child = new_children[index]
+            else:
+                child = self._resolve(
+                    node[index],
+                    child_prefix,
+                    child_prefix + child_changes[0][0],
+                )
+            new_child = self.apply(child, child_prefix, child_changes)
+            if new_child is not child:
+                new_children[index] = new_child
+                is_changed = True
+
+        if not is_changed:
+            return node
+
+        children = [
+            index
+            for index in range(16)
+            if (new_children[index] if index in new_children else node[index]) != BLANK_NODE
+        ]
+        if not children:
+            if value:
+                return [_encode_path("", True), value]
+            else:
+                return BLANK_NODE
+        elif len(children) == 1 and not value:
+            # A branch with a single child collapses into it
+            index = children[0]
+            if index in new_children:
+                child = new_children[index]
+            else:
+                child = self._resolve(node[index], prefix + f"{index:x}", prefix + changes[0][0])
+            return self._with_prefix(f"{index:x}", child)
+
+        new_node = list(node[:16]) + [value]
+        for index, child in new_children.items():
+            new_node[index] = BLANK_NODE if child == BLANK_NODE else self._reference(child)
+        return new_node
+
+
+def update_trie(db: DatabaseAPI, root_hash: Hash32, changes: Mapping[bytes, bytes]) -> Hash32:
+    """
+    Set the keys of the trie at ``root_hash`` in ``db`` to the values in ``changes``,
+    deleting the keys with an empty value, and return the new root hash. This gives
+    the same trie as setting the keys one at a time in a :class:`~trie.HexaryTrie`.
+
+    The new nodes are only written to ``db`` once all changes are applied, so a
+    :class:`~trie.exceptions.MissingTrieNode` leaves it unchanged. Old nodes are not
+    deleted.
+    """
+    if not changes:
+        return root_hash
+
+    update = _TrieUpdate(db, root_hash)
+    sorted_changes = sorted((key.hex(), value) for key, value in changes.items())
+    if root_hash == BLANK_ROOT_HASH:
+        root = BLANK_NODE
+    else:
+        root = update._resolve(root_hash, "", sorted_changes[0][0])
+
+    new_root = update.apply(root, "", sorted_changes)
+    if new_root is root:
+        return root_hash
+    elif new_root == BLANK_NODE:
+        new_root_hash = BLANK_ROOT_HASH
+    else:
+        # The root is stored by its hash, even when it encodes to less than 32 bytes
+        encoded_root = _encode_node(new_root)
+        new_root_hash = keccak(encoded_root)
+        update.new_nodes[new_root_hash] = encoded_root
+
+    for node_hash, encoded in update.new_nodes.items():
+        db[node_hash] = encoded
+    return new_root_hash
+
+
+def _get_ordered_trie_keys(count: int) -> Iterator[Tuple[int, str]]:
+    # The indices with their trie keys, in the order of the keys: 1 to 127 encode to
+    # themselves, then 0 encodes to 0x80, and larger indices to 0x81 and up
+    for index in range(1, min(count, 128)):
+        yield index, f"{index:02x}"
+    if count:
+        yield 0, "80"
+    for index in range(128, count):
+        yield index, _encode_node(index.to_bytes((index.bit_length() + 7) // 8, 'big')).hex()
+
+
+def _make_ordered_trie_root_and_nodes(items: Sequence[bytes]) -> TrieRootAndData:
+    """
+    Build the trie of ``items`` by their RLP encoded index, like the transaction and
+    receipt tries, in one pass over the items in the order of their keys. A branch
+    is encoded as soon as the next key leaves it, so every node is encoded and hashed
+    once. Gives the same root hash and nodes as setting the keys one at a time.
+    """
+    if not items:
+        return BLANK_ROOT_HASH, {}
+
+    nodes: Dict[Hash32, bytes] = {}
+
+    def reference(node: Node) -> Union[Hash32, Node]:
+        encoded = _encode_node(node)
+        if len(encoded) < 32:
+            return node
+        node_hash = keccak(encoded)
+        nodes[node_hash] = encoded
+        return node_hash
+
+    # A finished subtree of ``key``: its leaf value, or the depth and node of its
+    # top branch
+    Subtree = Tuple[int, Union[bytes, Node]]
+
+    def get_child(key: str, subtree: Subtree, parent_depth: int) -> Node:
+        # The node of the subtree, with a path from below ``parent_depth``
+        depth, node = subtree
+        if depth == len(key):
+            return [_encode_path(key[parent_depth + 1:], True), node]
+        elif depth == parent_depth + 1:
+            return node
+        else:
+            return [_encode_path(key[parent_depth + 1:depth], False), reference(node)]
+
+    # The branches that may get more children, as their depth and node. The keys
+    # don't prefix each other, so no branch has a value.
+    branches: List[Tuple[int, List[Union[bytes, Node]]]] = []
+
+    def close_branches(key: str, subtree: Subtree, depth: int) -> Subtree:
+        # Finish the branches below ``depth``, which no later key goes through
+        while branches and branches[-1][0] > depth:
+            branch_depth, branch = branches.pop()
+            branch[int(key[branch_depth], 16)] = reference(get_child(key, subtree, branch_depth))
+            subtree = (branch_depth, branch)
+        return subtree
+
+    previous_key = None
+    for index, key in _get_ordered_trie_keys(len(items)):
+        if previous_key is not None:
+            depth = len(os.path.commonprefix((previous_key, key)))
+            subtree = close_branches(previous_key, subtree, depth)
+            if not branches or branches[-1][0] < depth:
+                branches.append((depth, [BLANK_NODE] * 17))
+            branches[-1][1][int(previous_key[depth], 16)] = reference(
+                get_child(previous_key, subtree, depth)
+            )
+        previous_key, subtree = key, (len(key), items[index])
+
+    subtree = close_branches(previous_key, subtree, -1)
+    # The root is stored by its hash, even when it encodes to less than 32 bytes
+    encoded_root = _encode_node(get_child(previous_key, subtree, -1))
+    root_hash = keccak(encoded_root)
+    nodes[root_hash] = encoded_root
+    return root_hash, nodes
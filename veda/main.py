@@ -6,7 +6,8 @@ import os
 import shutil
 import signal
 import sys
-from typing import Callable, Tuple, Type, Sequence, cast, Dict
+import threading
+from typing import Callable, Optional, Tuple, Type, Sequence, cast, Dict
 
 import argcomplete as argcomplete
 from asyncio_run_in_process import open_in_process
@@ -20,8 +21,10 @@ from veda.boot_info import BootInfo
 from veda.cli_parser import parser, subparser
 from veda.config import VedaAppConfig, BaseAppConfig, VedaConfig
 from veda.db.backends.level import LevelDB
+from veda.db.canonical_index import CanonicalIndexWriter
 from veda.db.chain import ChainDB
-from veda.db.manager import DBManager
+from veda.db.freezer import configure_freezer
+from veda.db.manager import DBManager, SelectorDBManager
 from veda.exceptions import AmbigiousFileSystem, MissingPath
 from veda.extensibility import BaseComponentAPI, BaseIsolatedComponent, ComponentAPI, ComponentManager
 from veda.initialization import is_database_initialized, initialize_database, is_data_dir_initialized, \
@@ -96,6 +99,25 @@ def parse_and_validate_cli() -> argparse.Namespace:
 
     args = parser.parse_args()
 
+    if args.db_workers is not None and args.db_workers < 1:
+        parser.error(f"--db-workers must be at least 1, got {args.db_workers}")
+
+    if args.trie_node_cache_size < 0:
+        parser.error(
+            f"--trie-node-cache-size must not be negative, got {args.trie_node_cache_size}"
+        )
+
+    if args.state_cache_size < 0:
+        parser.error(f"--state-cache-size must not be negative, got {args.state_cache_size}")
+
+    if args.state_pruning_blocks is not None and args.state_pruning_blocks < 1:
+        parser.error(
+            f"--state-pruning-blocks must be at least 1, got {args.state_pruning_blocks}"
+        )
+
+    if args.freezer_depth is not None and args.freezer_depth < 1:
+        parser.error(f"--freezer-depth must be at least 1, got {args.freezer_depth}")
+
     return args
 
 
@@ -186,7 +208,25 @@ async def run_db_manager(
         get_base_db_fn: Callable[[BootInfo], LevelDB]) -> None:
     with child_process_logging(boot_info):
         veda_config = boot_info.veda_config
-        manager = DBManager(get_base_db_fn(boot_info))
+        base_db = get_base_db_fn(boot_info)
+
+        canonical_index: Optional[CanonicalIndexWriter] = None
+        if veda_config.has_app_config(VedaAppConfig):
+            app_config = veda_config.get_app_config(VedaAppConfig)
+            # Headers of frozen blocks are read from the freezer
+            configure_freezer(app_config.freezer_dir)
+            canonical_index = CanonicalIndexWriter(app_config.canonical_index_dir, base_db)
+            threading.Thread(
+                target=canonical_index.catch_up,
+                name='canonical-index-catch-up',
+                daemon=True,
+            ).start()
+
+        manager: DBManager
+        if boot_info.args.db_workers is None:
+            manager = DBManager(base_db, canonical_index)
+        else:
+            manager = SelectorDBManager(base_db, boot_info.args.db_workers, canonical_index)
         with veda_config.process_id_file('database'):
             with manager.run(veda_config.database_ipc_path):
                 loop = asyncio.get_event_loop()
@@ -197,6 +237,8 @@ async def run_db_manager(
                     # thread started by run_in_executor() and that would prevent
                     # open_in_process(run_db_manager, ...) from returning.
                     manager.stop()
+                    if canonical_index is not None:
+                        canonical_index.close()
 
 
 
@@ -56,7 +56,7 @@ class FilterQuery(BaseModel):
     fromBlock: Optional[str] = None
     toBlock: Optional[str] = None
     address: Optional[Union[List[str], str]] = None
-    topics: Optional[List[Union[str, None]]] = None
+    topics: Optional[List[Union[str, List[str], None]]] = None
 
 def validate_filter_params(filter_params: Dict[str, Any]) -> FilterQuery:
     '''
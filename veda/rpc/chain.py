@@ -1,10 +1,12 @@
-from typing import Type
+from typing import Tuple, Type
 
-from veda.abc import ChainDatabaseAPI
+from eth_typing import BlockNumber, Hash32
+
+from veda.abc import BlockHeaderAPI, ChainDatabaseAPI
 from veda.chains import Chain
 
 from veda.rpc._utils.async_dispatch import async_method
-from veda.db.async_chaindb import AsyncChainDB
+from veda.db.async_chaindb import AsyncChainDB, BaseAsyncChainDB
 
 from .base import AsyncChainAPI
 
@@ -14,25 +16,40 @@ from ..chains.veda import VedaChain
 
 class AsyncChainMixin(AsyncChainAPI):
     chaindb_class: Type[ChainDatabaseAPI] = AsyncChainDB
+    chaindb: BaseAsyncChainDB
 
     coro_get_ancestors = async_method(Chain.get_ancestors)
     coro_get_block_by_hash = async_method(Chain.get_block_by_hash)
     coro_get_block_by_header = async_method(Chain.get_block_by_header)
-    coro_get_block_header_by_hash = async_method(Chain.get_block_header_by_hash)
     coro_get_canonical_block_by_number = async_method(Chain.get_canonical_block_by_number)
-    coro_get_canonical_head = async_method(Chain.get_canonical_head)
-    coro_get_canonical_block_header_by_number = async_method(
-        Chain.get_canonical_block_header_by_number
-    )
-    coro_get_canonical_transaction_index = async_method(Chain.get_canonical_transaction_index)
     coro_get_canonical_transaction = async_method(Chain.get_canonical_transaction)
     coro_get_canonical_transaction_by_index = async_method(Chain.get_canonical_transaction_by_index)
-    coro_get_score = async_method(Chain.get_score)
     coro_get_transaction_receipt = async_method(Chain.get_transaction_receipt)
     coro_get_transaction_receipt_by_index = async_method(Chain.get_transaction_receipt_by_index)
     coro_import_block = async_method(Chain.import_block)
     coro_validate_chain = async_method(Chain.validate_chain)
     coro_validate_receipt = async_method(Chain.validate_receipt)
 
+    # Header and index lookups are delegated to the chaindb, which may serve them
+    # natively over an AsyncDBClient instead of on an executor thread.
+    async def coro_get_block_header_by_hash(self, block_hash: Hash32) -> BlockHeaderAPI:
+        return await self.chaindb.coro_get_block_header_by_hash(block_hash)
+
+    async def coro_get_canonical_head(self) -> BlockHeaderAPI:
+        return await self.chaindb.coro_get_canonical_head()
+
+    async def coro_get_canonical_block_header_by_number(
+            self,
+            block_number: BlockNumber) -> BlockHeaderAPI:
+        return await self.chaindb.coro_get_canonical_block_header_by_number(block_number)
+
+    async def coro_get_canonical_transaction_index(
+            self,
+            transaction_hash: Hash32) -> Tuple[BlockNumber, int]:
+        return await self.chaindb.coro_get_transaction_index(transaction_hash)
+
+    async def coro_get_score(self, block_hash: Hash32) -> int:
+        return await self.chaindb.coro_get_score(block_hash)
+
 class VedaAsyncChain(AsyncChainMixin, VedaChain):
     pass
\ No newline at end of file
@@ -59,17 +59,21 @@ def format_bloom(bloom: int) -> str:
     return formatted_bloom
 
 
-def to_log_dict(block: BlockAPI, log: LogAPI, transaction: SignedTransactionAPI, idx: int) -> Dict[str, Any]:
+def to_log_dict(header: BlockHeaderAPI,
+                log: LogAPI,
+                transaction: SignedTransactionAPI,
+                transaction_idx: int,
+                log_idx: int) -> Dict[str, Any]:
     return {
         "address": to_checksum_address(log.address),
-        "blockHash": encode_hex(block.hash),
-        "blockNumber": hex(block.number),
+        "blockHash": encode_hex(header.hash),
+        "blockNumber": hex(header.block_number),
         "data": encode_hex(log.data),
-        "logIndex": hex(idx),
+        "logIndex": hex(log_idx),
         "removed": False,
         "topics": [encode_hex(topic.to_bytes(32, 'big')) for topic in log.topics],
         "transactionHash": encode_hex(transaction.hash),
-        "transactionIndex": hex(idx),
+        "transactionIndex": hex(transaction_idx),
     }
 
 
@@ -1,3 +1,5 @@
+import itertools
+import operator
 import os
 
 import rlp
@@ -8,8 +10,11 @@ from typing import (
     Any,
     cast,
     Dict,
+    Iterable,
     List,
     NoReturn,
+    Optional,
+    Tuple,
     Union,
 )
 
@@ -43,8 +48,19 @@ from veda.abc import (
 from veda.constants import (
     ZERO_ADDRESS,
 )
+from veda.db.bloom_bits import (
+    find_bloom_candidates,
+    get_bloom_bits_tail,
+)
+from veda.db.log_index import (
+    TopicFilter,
+    find_log_positions,
+    get_log_index_tail,
+    log_matches,
+)
 from veda.exceptions import (
     HeaderNotFound,
+    ReceiptNotFound,
     TransactionNotFound,
 )
 from veda.vm.forks.veda import VedaBlock
@@ -88,13 +104,42 @@ from veda.sync.common.events import (
     SyncingRequest,
     SendLocalTransaction,
 )
+from veda.rpc._utils.async_dispatch import run_in_executor
 from veda.rpc._utils.transactions import DefaultTransactionValidator
 from veda.rpc._utils.validation import (
+    FilterQuery,
     validate_transaction_call_dict,
     validate_transaction_gas_estimation_dict, validate_filter_params,
 )
 
 
+def normalize_log_filter(
+        filter_params: FilterQuery) -> Tuple[Optional[Tuple[Address, ...]], TopicFilter]:
+    """
+    Return the addresses of a log filter, or ``None`` for any address, and the
+    options at every topic position, with ``None`` for any topic.
+    """
+    if not filter_params.address:
+        addresses = None
+    elif isinstance(filter_params.address, str):
+        addresses = (Address(decode_hex(filter_params.address)),)
+    else:
+        addresses = tuple(Address(decode_hex(address)) for address in filter_params.address)
+
+    if filter_params.topics and len(filter_params.topics) > 4:
+        raise ValidationError("Topics param length is too long")
+
+    topics = []
+    for options in filter_params.topics or ():
+        if not options:
+            topics.append(None)
+        elif isinstance(options, str):
+            topics.append((Hash32(pad32(decode_hex(options))),))
+        else:
+            topics.append(tuple(Hash32(pad32(decode_hex(topic))) for topic in options))
+    return addresses, tuple(topics)
+
+
 async def state_at_block(
         chain: AsyncChainAPI,
         at_block: Union[str, int],
@@ -171,7 +216,7 @@ class Eth(Eth1ChainRPCModule):
         return []
 
     async def blockNumber(self) -> str:
-        num = self.chain.get_canonical_head().block_number
+        num = (await self.chain.coro_get_canonical_head()).block_number
         return hex(num)
 
     async def chainId(self) -> str:
@@ -186,9 +231,13 @@ class Eth(Eth1ChainRPCModule):
             txn_dict['veda_sender'] = txn_dict.get('from', 20 * b"\x00")
 
         header = await get_header(self.chain, at_block)
-        validate_transaction_call_dict(txn_dict, self.chain.get_vm(header))
-        transaction = dict_to_spoof_transaction(self.chain, header, txn_dict)
-        result = self.chain.get_transaction_result(transaction, header)
+
+        def _call() -> bytes:
+            validate_transaction_call_dict(txn_dict, self.chain.get_vm(header))
+            transaction = dict_to_spoof_transaction(self.chain, header, txn_dict)
+            return self.chain.get_transaction_result(transaction, header)
+
+        result = await run_in_executor(_call)
         return encode_hex(result)
 
     async def coinbase(self) -> str:
@@ -198,9 +247,13 @@ class Eth(Eth1ChainRPCModule):
     @retryable(which_block_arg_name='at_block')
     async def estimateGas(self, txn_dict: Dict[str, Any], at_block: Union[str, int]) -> str:
         header = await get_header(self.chain, at_block)
-        validate_transaction_gas_estimation_dict(txn_dict, self.chain.get_vm(header))
-        transaction = dict_to_spoof_transaction(self.chain, header, txn_dict)
-        gas = self.chain.estimate_gas(transaction, header)
+
+        def _estimate_gas() -> int:
+            validate_transaction_gas_estimation_dict(txn_dict, self.chain.get_vm(header))
+            transaction = dict_to_spoof_transaction(self.chain, header, txn_dict)
+            return self.chain.estimate_gas(transaction, header)
+
+        gas = await run_in_executor(_estimate_gas)
         return hex(gas)
 
     async def gasPrice(self) -> str:
@@ -210,7 +263,7 @@ class Eth(Eth1ChainRPCModule):
     @retryable(which_block_arg_name='at_block')
     async def getBalance(self, address: Address, at_block: Union[str, int]) -> str:
         state = await state_at_block(self.chain, at_block)
-        balance = state.get_balance(address)
+        balance = await run_in_executor(state.get_balance, address)
 
         return hex(balance)
 
@@ -253,7 +306,7 @@ class Eth(Eth1ChainRPCModule):
     @retryable(which_block_arg_name='at_block')
     async def getCode(self, address: Address, at_block: Union[str, int]) -> str:
         state = await state_at_block(self.chain, at_block)
-        code = state.get_code(address)
+        code = await run_in_executor(state.get_code, address)
         return encode_hex(code)
 
     @format_params(decode_hex, to_int_if_hex, to_int_if_hex)
@@ -263,7 +316,7 @@ class Eth(Eth1ChainRPCModule):
             raise TypeError("Position of storage must be a whole number, but was: %r" % position)
 
         state = await state_at_block(self.chain, at_block)
-        stored_val = state.get_storage(address, position)
+        stored_val = await run_in_executor(state.get_storage, address, position)
 
         return encode_hex(pad32(int_to_big_endian(stored_val)))
 
@@ -294,7 +347,7 @@ class Eth(Eth1ChainRPCModule):
     async def getTransactionCount(self, address: Address, at_block: Union[str, int]) -> str:
 
         state = await state_at_block(self.chain, at_block)
-        nonce = state.get_nonce(address)
+        nonce = await run_in_executor(state.get_nonce, address)
         return hex(nonce)
 
     @format_params(decode_hex)
@@ -339,20 +392,17 @@ class Eth(Eth1ChainRPCModule):
             tx_index
         )
 
-        # calculate log_idx_base
+        # calculate log_idx_base from the logs of the previous receipts
         log_idx_base = 0
+        previous_receipt = None
         for i in range(tx_index):
-            receipt = await self.chain.coro_get_transaction_receipt_by_index(
-                tx_block_number,
-                tx_index
-            )
-            log_idx_base += len(receipt.logs)
-
-        if tx_index > 0:
             previous_receipt = await self.chain.coro_get_transaction_receipt_by_index(
                 tx_block_number,
-                tx_index - 1
+                i
             )
+            log_idx_base += len(previous_receipt.logs)
+
+        if previous_receipt is not None:
             # The receipt only tells us the cumulative gas that was used. To find the gas used by
             # the transaction alone we have to get the previous receipt and calculate the
             # difference.
@@ -412,45 +462,124 @@ class Eth(Eth1ChainRPCModule):
             from_block = int(filter_params.fromBlock, 16)
             to_block = int(filter_params.toBlock, 16)
 
-        resp = []
-        for block_number in range(from_block, to_block + 1):
-            block = cast(VedaBlock, await self.chain.coro_get_canonical_block_by_number(block_number))
-
-            receipts = block.get_receipts(self.chain.chaindb)
-
-            receipt_log_counter = 0
-
-            for idx, (transaction, receipt) in enumerate(zip(block.transactions, receipts)):
-                for log_receipt_index, log in enumerate(receipt.logs):
-                    # filter address field
-                    if filter_params.address:
-                        if isinstance(filter_params.address, str):
-                            address_filter = [decode_hex(filter_params.address)]
-                        else:
-                            address_filter = [decode_hex(address) for address in filter_params.address]
-
-                        if log.address not in address_filter:
-                            continue
+        addresses, topics = normalize_log_filter(filter_params)
+
+        # Blocks imported before the tail of an index are only in it after a rebuild,
+        # and a filter without an address or topic matches every block anyway. The
+        # index lookups block on the database, so they run on the executor.
+        db = self.chain.chaindb.db
+        index_tail = bloom_bits_tail = None
+        if addresses is not None or any(options is not None for options in topics):
+            index_tail = await run_in_executor(get_log_index_tail, db)
+            bloom_bits_tail = await run_in_executor(get_bloom_bits_tail, db)
+        if index_tail is None:
+            index_tail = to_block + 1
+        if bloom_bits_tail is None:
+            bloom_bits_tail = to_block + 1
+
+        resp = await self._scan_logs(
+            range(from_block, min(to_block, index_tail - 1, bloom_bits_tail - 1) + 1),
+            addresses,
+            topics,
+        )
 
-                    # filter topics field
-                    if filter_params.topics:
-                        if len(filter_params.topics) >= 4:
-                            raise ValidationError("Topics param length is too long")
+        bloom_from_block = max(from_block, bloom_bits_tail)
+        bloom_to_block = min(to_block, index_tail - 1)
+        if bloom_from_block <= bloom_to_block:
+            candidates = await run_in_executor(
+                find_bloom_candidates,
+                db,
+                BlockNumber(bloom_from_block),
+                BlockNumber(bloom_to_block),
+                addresses,
+                topics,
+            )
+            resp.extend(await self._scan_logs(candidates, addresses, topics))
+
+        if max(from_block, index_tail) <= to_block:
+            resp.extend(await self._find_indexed_logs(
+                BlockNumber(max(from_block, index_tail)),
+                BlockNumber(to_block),
+                addresses,
+                topics,
+            ))
+        return resp
 
-                        topics_filtered = False
-                        for idx in range(min(len(filter_params.topics), len(log.topics))):
-                            if (filter_params.topics[idx] is not None
-                                    and int.from_bytes(decode_hex(filter_params.topics[idx]), 'big') != log.topics[idx]):
-                                topics_filtered = True
-                                break
+    async def _scan_logs(self,
+                         block_numbers: Iterable[int],
+                         addresses: Optional[Tuple[Address, ...]],
+                         topics: TopicFilter) -> List[Dict[str, Any]]:
+        resp = []
+        for block_number in block_numbers:
+            block = cast(VedaBlock, await self.chain.coro_get_canonical_block_by_number(block_number))
 
-                        if topics_filtered:
-                            continue
+            receipts = await run_in_executor(block.get_receipts, self.chain.chaindb)
+
+            block_log_index = 0
+            for transaction_index, (transaction, receipt) in enumerate(
+                    zip(block.transactions, receipts)):
+                for log in receipt.logs:
+                    if log_matches(log, addresses, topics):
+                        resp.append(to_log_dict(
+                            block.header,
+                            log,
+                            transaction,
+                            transaction_index,
+                            block_log_index,
+                        ))
+                    block_log_index += 1
+        return resp
 
-                    data = to_log_dict(block, log, transaction, receipt_log_counter + log_receipt_index)
-                    resp.append(data)
+    async def _find_indexed_logs(self,
+                                 from_block: BlockNumber,
+                                 to_block: BlockNumber,
+                                 addresses: Optional[Tuple[Address, ...]],
+                                 topics: TopicFilter) -> List[Dict[str, Any]]:
+        positions = await run_in_executor(
+            find_log_positions,
+            self.chain.chaindb.db,
+            from_block,
+            to_block,
+            addresses,
+            topics,
+        )
 
-                receipt_log_counter += len(receipt.logs)
+        resp = []
+        for block_number, block_positions in itertools.groupby(
+                positions, key=operator.attrgetter('block_number')):
+            try:
+                header = await self.chain.coro_get_canonical_block_header_by_number(block_number)
+            except HeaderNotFound:
+                continue
+
+            for transaction_index, transaction_positions in itertools.groupby(
+                    block_positions, key=operator.attrgetter('transaction_index')):
+                try:
+                    transaction = await self.chain.coro_get_canonical_transaction_by_index(
+                        block_number,
+                        transaction_index,
+                    )
+                    receipt = await self.chain.coro_get_transaction_receipt_by_index(
+                        block_number,
+                        transaction_index,
+                    )
+                except (TransactionNotFound, ReceiptNotFound):
+                    # Only without a pinned snapshot: the index was read before a
+                    # reorg that happened in the meantime
+                    continue
+
+                for position in transaction_positions:
+                    if position.receipt_log_index >= len(receipt.logs):
+                        continue
+                    log = receipt.logs[position.receipt_log_index]
+                    if log_matches(log, addresses, topics):
+                        resp.append(to_log_dict(
+                            header,
+                            log,
+                            transaction,
+                            transaction_index,
+                            position.block_log_index,
+                        ))
         return resp
 
     @format_params(decode_hex)
@@ -18,6 +18,7 @@ from eth_utils import (
 )
 from eth_utils.toolz import curry
 
+from veda.db.snapshot import SnapshotPinner
 from veda.rpc.base import AsyncChainAPI
 from veda.rpc.exceptions import RpcError
 from veda.rpc.base import (
@@ -72,10 +73,12 @@ class RPCServer:
                  modules: Sequence[BaseRPCModule],
                  chain: AsyncChainAPI,
                  event_bus: EndpointAPI = None,
-                 debug_mode = False) -> None:
+                 debug_mode = False,
+                 snapshots: SnapshotPinner = None) -> None:
         self.event_bus = event_bus
         self.modules: Dict[str, BaseRPCModule] = {}
         self.chain = chain
+        self.snapshots = snapshots
         self.logger: ExtendedDebugLogger = get_logger('veda.rpc.server.RPCServer')
         self.resume_event = asyncio.Event()
         self.blocking_request = False
@@ -196,10 +199,21 @@ class RPCServer:
         Access restriction happens on this level because one instance of the server may allow or
         prevent execution of certain requests based on external conditions (e.g request origin).
         """
-        # If the request is marked as blocking somehow, we need to wait for a resume event
-        if self.blocking_request:
-            await self.resume_event.wait()
-
+        if self.snapshots is None:
+            # Without database snapshots, requests must wait out block imports to avoid
+            # reading a half-written block
+            if self.blocking_request:
+                await self.resume_event.wait()
+            return await self._execute(disallowed_modules, request)
+        else:
+            # Every read made by the request sees the last committed head, however
+            # many blocks get imported while it runs
+            async with self.snapshots.pin():
+                return await self._execute(disallowed_modules, request)
+
+    async def _execute(self,
+                       disallowed_modules: Sequence[Type[BaseRPCModule]],
+                       request: Dict[str, Any]) -> str:
         if isinstance(request, list):
             # batch request
             results = []
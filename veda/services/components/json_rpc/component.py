@@ -4,8 +4,9 @@ from argparse import (
     Namespace,
     _SubParsersAction,
 )
+import asyncio
 import contextlib
-from typing import Iterator, Tuple, Sequence, Type, Any
+from typing import Iterator, Tuple, Sequence, Type, Any, Optional, Union
 
 from async_service import Service
 from eth_utils import ValidationError, to_tuple
@@ -16,13 +17,21 @@ from veda.db.header import (
     HeaderDB,
 )
 
+from veda.boot_info import BootInfo
 from veda.config import (
     VedaAppConfig,
     VedaConfig
 )
 from veda.events import NewBlockImportStarted, NewBlockImportFinished, NewBlockImportCanceled
 from veda.rpc.base import AsyncChainAPI
-from veda.db.manager import DBClient
+from veda.db.async_chaindb import AsyncIPCChainDB
+from veda.db.cache import configure_trie_node_cache
+from veda.db.canonical_index import configure_canonical_index
+from veda.db.freezer import configure_freezer
+from veda.db.manager import AsyncDBClient, DBClient, PooledDBClient
+from veda.db.session import WriteSessionDB
+from veda.db.snapshot import AsyncPinnedSnapshotDB, PinnedSnapshotDB, SnapshotPinner
+from veda.db.state_cache import configure_state_cache
 from veda.extensibility import (
     AsyncioIsolatedComponent,
 )
@@ -40,28 +49,50 @@ from veda.http.handlers.rpc_handler import RPCHandler
 from veda.http.server import (
     HTTPServer,
 )
+from veda._utils.asyncio_utils import create_task
 from veda._utils.services import run_background_asyncio_services
 
 
 @contextlib.contextmanager
 def chain_for_veda_config(veda_config: VedaConfig,
                           veda_app_config: VedaAppConfig,
-                          event_bus: EndpointAPI) -> Iterator[AsyncChainAPI]:
+                          event_bus: EndpointAPI,
+                          db_pool_size: int = 1,
+                          pin_snapshots: bool = False,
+                          write_sessions: bool = False) -> Iterator[AsyncChainAPI]:
     chain_config = veda_app_config.get_chain_config()
 
-    db = DBClient.connect(veda_config.database_ipc_path)
+    db: Union[DBClient, PooledDBClient]
+    if db_pool_size > 1:
+        db = PooledDBClient.connect(veda_config.database_ipc_path, db_pool_size)
+    else:
+        db = DBClient.connect(veda_config.database_ipc_path)
 
     with db:
-        yield chain_config.full_chain_class(db)
+        if pin_snapshots:
+            yield chain_config.full_chain_class(PinnedSnapshotDB(db))
+        elif write_sessions:
+            yield chain_config.full_chain_class(WriteSessionDB(db))
+        else:
+            yield chain_config.full_chain_class(db)
 
 
 @contextlib.contextmanager
 def chain_for_config(veda_config: VedaConfig,
                      event_bus: EndpointAPI,
+                     db_pool_size: int = 1,
+                     pin_snapshots: bool = False,
+                     write_sessions: bool = False,
                      ) -> Iterator[AsyncChainAPI]:
     if veda_config.has_app_config(VedaAppConfig):
         veda_app_config = veda_config.get_app_config(VedaAppConfig)
-        with chain_for_veda_config(veda_config, veda_app_config, event_bus) as veda_chain:
+        with chain_for_veda_config(
+                veda_config,
+                veda_app_config,
+                event_bus,
+                db_pool_size,
+                pin_snapshots,
+                write_sessions) as veda_chain:
             yield veda_chain
     else:
         raise Exception("Unsupported Node Type")
@@ -151,34 +182,93 @@ class JsonRpcServerComponent(AsyncioIsolatedComponent):
             help="JSON-RPC server port",
             default=8545,
         )
+        arg_parser.add_argument(
+            "--rpc-db-pool-size",
+            type=int,
+            help="Number of database connections used to serve JSON-RPC requests in parallel",
+            default=4,
+        )
 
+    @classmethod
+    def validate_cli(cls, boot_info: BootInfo) -> None:
+        if boot_info.args.rpc_db_pool_size < 1:
+            raise ValidationError(
+                f"--rpc-db-pool-size must be at least 1, got {boot_info.args.rpc_db_pool_size}"
+            )
 
     async def do_run(self, event_bus: EndpointAPI) -> None:
         boot_info = self._boot_info
         veda_config = boot_info.veda_config
 
-        with chain_for_config(veda_config, event_bus) as chain:
+        configure_trie_node_cache(boot_info.args.trie_node_cache_size * 1024 * 1024)
+        configure_state_cache(boot_info.args.state_cache_size * 1024 * 1024)
+        if veda_config.has_app_config(VedaAppConfig):
+            app_config = veda_config.get_app_config(VedaAppConfig)
+            configure_freezer(app_config.freezer_dir)
+            configure_canonical_index(app_config.canonical_index_dir)
+
+        async_db = await AsyncDBClient.connect(veda_config.database_ipc_path)
+
+        snapshots: Optional[SnapshotPinner] = SnapshotPinner(async_db)
+        try:
+            await snapshots.refresh()
+        except NotImplementedError:
+            self.logger.warning(
+                "Database does not support snapshots, JSON-RPC requests will be paused "
+                "during block import"
+            )
+            snapshots = None
+
+        with chain_for_config(
+                veda_config,
+                event_bus,
+                boot_info.args.rpc_db_pool_size,
+                pin_snapshots=snapshots is not None) as chain:
+            # Serve header and index lookups natively on the event loop
+            if snapshots is None:
+                chain.chaindb = AsyncIPCChainDB(chain.chaindb.db, async_db)
+            else:
+                chain.chaindb = AsyncIPCChainDB(
+                    chain.chaindb.db,
+                    AsyncPinnedSnapshotDB(async_db),
+                )
+
             if veda_config.has_app_config(VedaAppConfig):
                 modules = initialize_veda_modules(chain, event_bus, veda_config)
             else:
                 raise Exception("Unsupported Node Type")
 
-            rpc = RPCServer(modules, chain, event_bus, debug_mode=boot_info.args.enable_rpc_debug_mode)
-
-            event_bus.subscribe(
-                NewBlockImportStarted,
-                lambda ev: rpc.block_request()
+            rpc = RPCServer(
+                modules,
+                chain,
+                event_bus,
+                debug_mode=boot_info.args.enable_rpc_debug_mode,
+                snapshots=snapshots,
             )
 
-            event_bus.subscribe(
-                NewBlockImportFinished,
-                lambda ev: rpc.resume_request()
-            )
+            if snapshots is None:
+                event_bus.subscribe(
+                    NewBlockImportStarted,
+                    lambda ev: rpc.block_request()
+                )
 
-            event_bus.subscribe(
-                NewBlockImportCanceled,
-                lambda ev: rpc.resume_request()
-            )
+                event_bus.subscribe(
+                    NewBlockImportFinished,
+                    lambda ev: rpc.resume_request()
+                )
+
+                event_bus.subscribe(
+                    NewBlockImportCanceled,
+                    lambda ev: rpc.resume_request()
+                )
+            else:
+                # A canceled import leaves the head where it was, so only finished
+                # imports need a new snapshot
+                refresh_requested = asyncio.Event()
+                event_bus.subscribe(
+                    NewBlockImportFinished,
+                    lambda ev: refresh_requested.set()
+                )
 
             # Run IPC Server
             ipc_server = IPCServer(rpc, boot_info.veda_config.jsonrpc_ipc_path)
@@ -205,4 +295,24 @@ class JsonRpcServerComponent(AsyncioIsolatedComponent):
                 )
                 services_to_exit += (http_server,)
 
-            await run_background_asyncio_services(services_to_exit)
+            async with async_db:
+                if snapshots is None:
+                    await run_background_asyncio_services(services_to_exit)
+                    return
+
+                refresh_task = create_task(
+                    self._refresh_snapshots(snapshots, refresh_requested),
+                    'JsonRpcServerComponent/refresh_snapshots',
+                )
+                try:
+                    await run_background_asyncio_services(services_to_exit)
+                finally:
+                    refresh_task.cancel()
+
+    async def _refresh_snapshots(self,
+                                 snapshots: SnapshotPinner,
+                                 refresh_requested: asyncio.Event) -> None:
+        while True:
+            await refresh_requested.wait()
+            refresh_requested.clear()
+            await snapshots.refresh()
@@ -0,0 +1,83 @@
+from argparse import (
+    ArgumentParser,
+    Namespace,
+    _SubParsersAction,
+)
+import logging
+import sys
+import time
+
+from veda.config import (
+    VedaAppConfig,
+    VedaConfig,
+)
+from veda.db.backends.level import (
+    LevelDB,
+)
+from veda.db.bloom_bits import (
+    rebuild_bloom_bits,
+)
+from veda.db.chain import (
+    ChainDB,
+)
+from veda.db.freezer import (
+    configure_freezer,
+)
+from veda.db.log_index import (
+    rebuild_log_index,
+)
+from veda.extensibility import Application
+from veda.rlp.receipts import (
+    Receipt,
+)
+
+
+class RebuildLogIndexComponent(Application):
+    logger = logging.getLogger('veda.components.rebuild_log_index.RebuildLogIndex')
+
+    @classmethod
+    def configure_parser(cls,
+                         arg_parser: ArgumentParser,
+                         subparser: _SubParsersAction) -> None:
+
+        rebuild_parser = subparser.add_parser(
+            'rebuild-log-index',
+            help='rebuild the eth_getLogs index and bloom bits of all canonical blocks',
+        )
+
+        rebuild_parser.set_defaults(func=cls.rebuild_log_index)
+
+    @classmethod
+    def rebuild_log_index(cls, args: Namespace, veda_config: VedaConfig) -> None:
+        if veda_config.database_ipc_path.exists():
+            cls.logger.error(
+                "Found %s, stop the node before rebuilding the log index",
+                veda_config.database_ipc_path,
+            )
+            sys.exit(1)
+
+        app_config = veda_config.get_app_config(VedaAppConfig)
+        configure_freezer(app_config.freezer_dir)
+        db = LevelDB(app_config.database_dir)
+        chaindb = ChainDB(db)
+
+        cls.logger.info(
+            "Rebuilding the log index up to block #%d...",
+            chaindb.get_canonical_head().block_number,
+        )
+        start = time.monotonic()
+        block_count = rebuild_bloom_bits(chaindb)
+        cls.logger.info(
+            "Wrote the bloom bits of %d blocks in %.1fs",
+            block_count,
+            time.monotonic() - start,
+        )
+
+        start = time.monotonic()
+        block_count, log_count = rebuild_log_index(chaindb, Receipt)
+        cls.logger.info(
+            "Indexed %d logs of %d blocks in %.1fs",
+            log_count,
+            block_count,
+            time.monotonic() - start,
+        )
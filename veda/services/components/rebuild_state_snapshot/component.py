@@ -0,0 +1,65 @@
+from argparse import (
+    ArgumentParser,
+    Namespace,
+    _SubParsersAction,
+)
+import logging
+import sys
+import time
+
+from veda.config import (
+    VedaAppConfig,
+    VedaConfig,
+)
+from veda.db.backends.level import (
+    LevelDB,
+)
+from veda.db.chain import (
+    ChainDB,
+)
+from veda.db.flat_snapshot import (
+    FlatStateSnapshot,
+)
+from veda.extensibility import Application
+
+
+class RebuildStateSnapshotComponent(Application):
+    logger = logging.getLogger('veda.components.rebuild_state_snapshot.RebuildStateSnapshot')
+
+    @classmethod
+    def configure_parser(cls,
+                         arg_parser: ArgumentParser,
+                         subparser: _SubParsersAction) -> None:
+
+        rebuild_parser = subparser.add_parser(
+            'rebuild-state-snapshot',
+            help='rebuild the flat state snapshot from the state at the chain head',
+        )
+
+        rebuild_parser.set_defaults(func=cls.rebuild_state_snapshot)
+
+    @classmethod
+    def rebuild_state_snapshot(cls, args: Namespace, veda_config: VedaConfig) -> None:
+        if veda_config.database_ipc_path.exists():
+            cls.logger.error(
+                "Found %s, stop the node before rebuilding the state snapshot",
+                veda_config.database_ipc_path,
+            )
+            sys.exit(1)
+
+        app_config = veda_config.get_app_config(VedaAppConfig)
+        db = LevelDB(app_config.database_dir)
+        head = ChainDB(db).get_canonical_head()
+
+        cls.logger.info(
+            "Rebuilding the state snapshot at block #%d, state root %s...",
+            head.block_number,
+            head.state_root.hex(),
+        )
+        start = time.monotonic()
+        account_count = FlatStateSnapshot.generate(db, head.state_root)
+        cls.logger.info(
+            "Wrote %d accounts to the state snapshot in %.1fs",
+            account_count,
+            time.monotonic() - start,
+        )
@@ -15,6 +15,10 @@ from veda.boot_info import BootInfo
 from veda.config import (
     VedaAppConfig,
 )
+from veda.db.cache import configure_trie_node_cache
+from veda.db.freezer import configure_freezer
+from veda.db.pruning import StatePruner
+from veda.db.state_cache import configure_state_cache
 from veda.extensibility import AsyncioIsolatedComponent
 from veda.http.handlers.rpc_handler import RPCHandler
 from veda.http.server import HTTPServer
@@ -66,8 +70,33 @@ class SyncerComponent(AsyncioIsolatedComponent):
         boot_info = self._boot_info
         veda_config = boot_info.veda_config
 
+        configure_trie_node_cache(boot_info.args.trie_node_cache_size * 1024 * 1024)
+        configure_state_cache(boot_info.args.state_cache_size * 1024 * 1024)
+        configure_freezer(
+            veda_config.get_app_config(VedaAppConfig).freezer_dir,
+            writable=boot_info.args.freezer_depth is not None,
+        )
+
+        with chain_for_config(veda_config, event_bus, write_sessions=True) as chain:
+            if boot_info.args.state_pruning_blocks is not None:
+                chain.state_pruner = StatePruner(
+                    chain.chaindb.db,
+                    boot_info.args.state_pruning_blocks,
+                )
+                self.logger.info(
+                    "Keeping the state of the last %d blocks",
+                    boot_info.args.state_pruning_blocks,
+                )
+                head = chain.get_canonical_head()
+                chain.state_pruner.adopt_state(head.block_number, head.state_root)
+
+            if boot_info.args.freezer_depth is not None:
+                chain.freezer_depth = boot_info.args.freezer_depth
+                self.logger.info(
+                    "Moving blocks older than %d blocks to the freezer",
+                    boot_info.args.freezer_depth,
+                )
 
-        with chain_for_config(veda_config, event_bus) as chain:
             rpc = InternalRPCServer(chain, event_bus, debug_mode=boot_info.args.enable_internal_rpc_debug_mode)
 
             # Run IPC Server
@@ -16,6 +16,8 @@ import pydantic
 
 from veda.abc import VedaBlockHeaderAPI
 from veda.constants import FIRE_AND_FORGET_BROADCASTING
+from veda.db.cache import get_trie_node_cache
+from veda.db.state_cache import get_state_cache
 from eth_utils import (
     get_logger,
     ValidationError,
@@ -180,15 +182,17 @@ class InternalRPCServer:
 
             applying_transactions_tuple = tuple(applying_transactions)
 
-            new_block, _receipts, _computations = chain.apply_transactions(applying_transactions_tuple)
+            # The whole block is written to the database at once, when the session ends
+            with chain.write_session():
+                new_block, _receipts, _computations = chain.apply_transactions(applying_transactions_tuple)
 
-            mined_block = chain.mine_block(
-                mix_hash=mix_hash,
-                timestamp=block_params.timestamp,
-                veda_block_hash=block_hash,
-                veda_block_number=block_params.blockNumber,
-                veda_timestamp=block_params.timestamp,
-            )
+                mined_block = chain.mine_block(
+                    mix_hash=mix_hash,
+                    timestamp=block_params.timestamp,
+                    veda_block_hash=block_hash,
+                    veda_block_number=block_params.blockNumber,
+                    veda_timestamp=block_params.timestamp,
+                )
 
             self.logger.debug(
                 "%s contains %d transactions, %d succeeded, veda blockHash: %s",  # noqa: E501
@@ -197,6 +201,15 @@ class InternalRPCServer:
                 len(_receipts),
                 block_params.blockHash
             )
+            self.logger.debug(
+                "Trie node cache: %d hits, %d misses, %d nodes, %d bytes",
+                *get_trie_node_cache().stats(),
+            )
+            self.logger.debug(
+                "State cache: %d/%d account hits/misses, %d/%d slot hits/misses, "
+                "%d entries, %d bytes",
+                *get_state_cache().stats(),
+            )
 
             # 导入完成以后，广播新块已成功导入事件、数据库解锁事件
             self.event_bus.broadcast_nowait(
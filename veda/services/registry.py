@@ -16,6 +16,13 @@ from veda.services.components.fix_unclean_shutdown.component import (
     FixUncleanShutdownComponent
 )
 
+from veda.services.components.rebuild_log_index.component import (
+    RebuildLogIndexComponent,
+)
+from veda.services.components.rebuild_state_snapshot.component import (
+    RebuildStateSnapshotComponent,
+)
+
 from veda.services.components.syncer.component import (
     SyncerComponent,
 )
@@ -30,6 +37,8 @@ BASE_COMPONENTS: Tuple[Type[BaseComponentAPI], ...] = (
 
     SyncerComponent,
     FixUncleanShutdownComponent,
+    RebuildStateSnapshotComponent,
+    RebuildLogIndexComponent,
     JsonRpcServerComponent,
 )
 
@@ -0,0 +1,60 @@
+import collections
+from typing import (
+    Counter,
+    List,
+    Tuple,
+    Type,
+)
+import weakref
+
+from veda.abc import (
+    ComputationAPI,
+    OpcodeAPI,
+)
+from veda.vm.opcode import (
+    as_opcode,
+)
+
+
+class OpcodePairProfiler:
+    """
+    Count the pairs of consecutive opcodes that computations run, to find the
+    sequences worth fusing into superinstructions.
+
+    Computations of the class returned by :meth:`configure` run in the interpreter
+    loop, with every opcode counted after the previous opcode of the same
+    computation.
+    """
+
+    def __init__(self) -> None:
+        self.pairs: Counter[Tuple[int, int]] = collections.Counter()
+        self.mnemonics = {}
+        self._previous_opcodes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def configure(self, computation_class: Type[ComputationAPI]) -> Type[ComputationAPI]:
+        opcodes = {
+            value: self._profile_opcode(value, opcode_fn)
+            for value, opcode_fn in computation_class.opcodes.items()
+        }
+        return computation_class.configure(opcodes=opcodes, use_basic_blocks=False)
+
+    def _profile_opcode(self, value: int, opcode_fn: OpcodeAPI) -> OpcodeAPI:
+        pairs = self.pairs
+        previous_opcodes = self._previous_opcodes
+        self.mnemonics[value] = opcode_fn.mnemonic
+
+        def profiled(computation: ComputationAPI) -> None:
+            previous_opcode = previous_opcodes.get(computation)
+            if previous_opcode is not None:
+                pairs[previous_opcode, value] += 1
+            previous_opcodes[computation] = value
+            opcode_fn(computation=computation)
+
+        # The gas is charged by the wrapped opcode
+        return as_opcode(logic_fn=profiled, mnemonic=opcode_fn.mnemonic, gas_cost=0)
+
+    def most_common(self, count: int) -> List[Tuple[Tuple[str, str], int]]:
+        return [
+            ((self.mnemonics[first], self.mnemonics[second]), pair_count)
+            for (first, second), pair_count in self.pairs.most_common(count)
+        ]
@@ -356,11 +356,18 @@ class VM(Configurable, VirtualMachineAPI):
 
     def set_block_transactions(self, base_block: BlockAPI, new_header: BlockHeaderAPI,
                                transactions: Sequence[SignedTransactionAPI], receipts: Sequence[ReceiptAPI]) -> BlockAPI:
-        tx_root_hash, tx_kv_nodes = make_trie_root_and_nodes(transactions)
-        self.chaindb.persist_trie_data_dict(tx_kv_nodes)
+        # The tries are only built for their roots, the items are stored flat
+        tx_root_hash, _ = make_trie_root_and_nodes(transactions)
+        self.chaindb.persist_block_data(
+            tx_root_hash,
+            tuple(transaction.encode() for transaction in transactions),
+        )
 
-        receipt_root_hash, receipt_kv_nodes = make_trie_root_and_nodes(receipts)
-        self.chaindb.persist_trie_data_dict(receipt_kv_nodes)
+        receipt_root_hash, _ = make_trie_root_and_nodes(receipts)
+        self.chaindb.persist_block_data(
+            receipt_root_hash,
+            tuple(receipt.encode() for receipt in receipts),
+        )
 
         block_fields: "Block" = {"transactions": transactions}
         block_header_fields = {
@@ -0,0 +1,407 @@
+"""
+Execution of contract code as basic blocks.
+
+The code is cut into blocks of opcodes that can't fail once the stack and the gas
+are known to be sufficient, each ended by at most one other opcode: a jump, a halt,
+a call, an opcode with a dynamic gas cost... A block charges the static gas of its
+opcodes in one call, after checking the stack, and runs their logic functions
+without the per opcode lookup and gas charge of the interpreter loop.
+
+When the gas or the stack is not sufficient for the whole block, its opcodes run
+one at a time like in the interpreter loop, so the error, and the gas left when it
+happens, are the same. That check is also what lets the common sequences of opcodes
+of a block run as the superinstructions of :mod:`veda.vm.superinstructions`.
+"""
+from typing import (
+    Dict,
+    List,
+    Sequence,
+    Tuple,
+)
+
+from eth_typing import (
+    Hash32,
+)
+from lru import (
+    LRU,
+)
+
+from veda.abc import (
+    CodeStreamAPI,
+    ComputationAPI,
+    OpcodeAPI,
+)
+from veda.constants import (
+    STACK_DEPTH_LIMIT,
+)
+from veda.exceptions import (
+    Halt,
+)
+from veda.vm import (
+    opcode_values,
+)
+from veda.vm.logic.invalid import (
+    InvalidOpcode,
+)
+from veda.vm.superinstructions import (
+    Instruction,
+    SequenceItem,
+    SuperinstructionFactory,
+)
+
+# Number of contracts to keep the blocks of, by code hash
+BASIC_BLOCK_CACHE_SIZE = 1024
+
+_basic_block_cache = LRU(BASIC_BLOCK_CACHE_SIZE)
+
+
+def _stack_effects() -> Dict[int, Tuple[int, int]]:
+    # Number of stack items read, and change of the stack height, of the opcodes
+    # that can only fail on the stack or on their static gas cost
+    effects = {
+        opcode_values.JUMPDEST: (0, 0),
+        opcode_values.POP: (1, -1),
+        opcode_values.ISZERO: (1, 0),
+        opcode_values.NOT: (1, 0),
+        opcode_values.CALLDATALOAD: (1, 0),
+        opcode_values.ADDMOD: (3, -2),
+        opcode_values.MULMOD: (3, -2),
+    }
+    for opcode in (
+        opcode_values.ADD,
+        opcode_values.MUL,
+        opcode_values.SUB,
+        opcode_values.DIV,
+        opcode_values.SDIV,
+        opcode_values.MOD,
+        opcode_values.SMOD,
+        opcode_values.SIGNEXTEND,
+        opcode_values.SHL,
+        opcode_values.SHR,
+        opcode_values.SAR,
+        opcode_values.LT,
+        opcode_values.GT,
+        opcode_values.SLT,
+        opcode_values.SGT,
+        opcode_values.EQ,
+        opcode_values.AND,
+        opcode_values.OR,
+        opcode_values.XOR,
+        opcode_values.BYTE,
+    ):
+        effects[opcode] = (2, -1)
+    for opcode in (
+        opcode_values.ADDRESS,
+        opcode_values.ORIGIN,
+        opcode_values.CALLER,
+        opcode_values.CALLVALUE,
+        opcode_values.CALLDATASIZE,
+        opcode_values.CODESIZE,
+        opcode_values.GASPRICE,
+        opcode_values.RETURNDATASIZE,
+        opcode_values.TIMESTAMP,
+        opcode_values.NUMBER,
+        opcode_values.GASLIMIT,
+        opcode_values.CHAINID,
+        opcode_values.MSIZE,
+        opcode_values.PC,
+    ):
+        effects[opcode] = (0, 1)
+    for opcode in range(opcode_values.PUSH0, opcode_values.PUSH32 + 1):
+        effects[opcode] = (0, 1)
+    for position in range(1, 17):
+        effects[opcode_values.DUP1 + position - 1] = (position, 1)
+        effects[opcode_values.SWAP1 + position - 1] = (position + 1, 0)
+    return effects
+
+
+STACK_EFFECTS = _stack_effects()
+
+
+def _push_constant(value: bytes) -> Instruction:
+    def push(computation: ComputationAPI) -> None:
+        computation.stack_push_bytes(value)
+
+    return push
+
+
+def _push_program_counter(position: int) -> Instruction:
+    def program_counter(computation: ComputationAPI) -> None:
+        computation.stack_push_int(position)
+
+    return program_counter
+
+
+class BasicBlock:
+    __slots__ = [
+        "instructions",
+        "gas_cost",
+        "stack_required",
+        "stack_growth",
+        "opcodes",
+        "terminator",
+        "fused_terminator",
+        "next_position",
+    ]
+
+    def __init__(
+        self,
+        instructions: Sequence[Instruction],
+        gas_cost: int,
+        stack_required: int,
+        stack_growth: int,
+        opcodes: Sequence[Tuple[int, OpcodeAPI]],
+        terminator: OpcodeAPI,
+        fused_terminator: Instruction,
+        next_position: int,
+    ) -> None:
+        # Logic functions of the opcodes, with the code they read bound in, and
+        # superinstructions in place of the sequences they run
+        self.instructions = tuple(instructions)
+        self.gas_cost = gas_cost
+        # Stack height needed to run the block, and highest height reached above it
+        self.stack_required = stack_required
+        self.stack_growth = stack_growth
+        # Position and opcode of the instructions, to run them one at a time
+        self.opcodes = tuple(opcodes)
+        # Opcode ending the block, if not a JUMPDEST starting the next one, and the
+        # superinstruction running it with the last instructions, if any
+        self.terminator = terminator
+        self.fused_terminator = fused_terminator
+        # Position after the block, or after its terminator
+        self.next_position = next_position
+
+
+def _pattern_opcode(opcode: int) -> int:
+    # Superinstructions are registered with PUSH1, DUP1 and SWAP1 for all sizes
+    if opcode_values.PUSH0 <= opcode <= opcode_values.PUSH32:
+        return opcode_values.PUSH1
+    elif opcode_values.DUP1 <= opcode <= opcode_values.DUP16:
+        return opcode_values.DUP1
+    elif opcode_values.SWAP1 <= opcode <= opcode_values.SWAP16:
+        return opcode_values.SWAP1
+    else:
+        return opcode
+
+
+def _fuse_instructions(
+    code_stream: CodeStreamAPI,
+    sequence: Sequence[SequenceItem],
+    instructions: Sequence[Instruction],
+    superinstructions: Dict[Tuple[int, ...], SuperinstructionFactory],
+) -> List[Instruction]:
+    patterns = [_pattern_opcode(opcode) for opcode, _, _ in sequence]
+    fused = []
+    index = 0
+    while index < len(sequence):
+        for length in (3, 2):
+            end = index + length
+            factory = superinstructions.get(tuple(patterns[index:end]))
+            if factory is None or end > len(sequence):
+                continue
+            # Chains take every following opcode the factory takes after the last one
+            while (
+                end < len(sequence)
+                and superinstructions.get((patterns[end - 1], patterns[end])) is factory
+            ):
+                end += 1
+            superinstruction = factory(code_stream, sequence[index:end])
+            if superinstruction is not None:
+                fused.append(superinstruction)
+                index = end
+                break
+        else:
+            if instructions[index] is not None:
+                fused.append(instructions[index])
+            index += 1
+    return fused
+
+
+def translate_basic_block(
+    code_stream: CodeStreamAPI,
+    code: bytes,
+    position: int,
+    opcode_lookup: Dict[int, OpcodeAPI],
+    superinstructions: Dict[Tuple[int, ...], SuperinstructionFactory],
+) -> BasicBlock:
+    """
+    Translate the basic block of ``code`` starting at ``position``.
+    """
+    instructions: List[Instruction] = []
+    sequence: List[SequenceItem] = []
+    opcodes: List[Tuple[int, OpcodeAPI]] = []
+    gas_cost = 0
+    stack_height = 0
+    stack_required = 0
+    stack_growth = 0
+    terminator = None
+    code_length = len(code)
+
+    while position < code_length:
+        opcode = code[position]
+        if opcode == opcode_values.JUMPDEST and sequence:
+            break
+
+        try:
+            opcode_fn = opcode_lookup[opcode]
+        except KeyError:
+            opcode_fn = InvalidOpcode(opcode)
+
+        logic_fn = getattr(opcode_fn, "logic_fn", None)
+        if opcode not in STACK_EFFECTS or logic_fn is None:
+            terminator = opcode_fn
+            terminator_opcode = opcode
+            position += 1
+            break
+
+        stack_read, stack_change = STACK_EFFECTS[opcode]
+        stack_required = max(stack_required, stack_read - stack_height)
+        stack_height += stack_change
+        stack_growth = max(stack_growth, stack_height)
+
+        opcodes.append((position, opcode_fn))
+        gas_cost += opcode_fn.gas_cost
+        argument = None
+        if opcode_values.PUSH0 <= opcode <= opcode_values.PUSH32:
+            size = opcode - opcode_values.PUSH0
+            argument = code[position + 1:position + 1 + size].ljust(size, b"\x00")
+            instructions.append(_push_constant(argument))
+            position += size
+        elif opcode_values.DUP1 <= opcode <= opcode_values.DUP16:
+            argument = opcode - opcode_values.DUP1 + 1
+            instructions.append(logic_fn)
+        elif opcode_values.SWAP1 <= opcode <= opcode_values.SWAP16:
+            argument = opcode - opcode_values.SWAP1 + 1
+            instructions.append(logic_fn)
+        elif opcode == opcode_values.PC:
+            instructions.append(_push_program_counter(position))
+        elif opcode == opcode_values.JUMPDEST:
+            # Nothing to run, its gas is charged with the block
+            instructions.append(None)
+        else:
+            instructions.append(logic_fn)
+        sequence.append((opcode, opcode_fn, argument))
+        position += 1
+    else:
+        # Running past the end of the code is a STOP
+        terminator = opcode_lookup[opcode_values.STOP]
+        terminator_opcode = opcode_values.STOP
+
+    fused_terminator = terminator
+    if terminator is not None and superinstructions:
+        for length in (2, 1):
+            if length > len(sequence):
+                continue
+            pattern = tuple(
+                _pattern_opcode(opcode) for opcode, _, _ in sequence[-length:]
+            ) + (_pattern_opcode(terminator_opcode),)
+            factory = superinstructions.get(pattern)
+            if factory is None:
+                continue
+            superinstruction = factory(
+                code_stream,
+                tuple(sequence[-length:]) + ((terminator_opcode, terminator, None),),
+            )
+            if superinstruction is not None:
+                fused_terminator = superinstruction
+                sequence = sequence[:-length]
+                instructions = instructions[:-length]
+                break
+
+    if superinstructions:
+        instructions = _fuse_instructions(code_stream, sequence, instructions, superinstructions)
+    else:
+        instructions = [instruction for instruction in instructions if instruction is not None]
+
+    return BasicBlock(
+        instructions,
+        gas_cost,
+        stack_required,
+        stack_growth,
+        opcodes,
+        terminator,
+        fused_terminator,
+        position,
+    )
+
+
+def get_basic_blocks(
+    code_hash: Hash32,
+    opcode_lookup: Dict[int, OpcodeAPI],
+    superinstructions: Dict[Tuple[int, ...], SuperinstructionFactory],
+) -> Dict[int, BasicBlock]:
+    """
+    Return the basic blocks, by starting position, of the code with ``code_hash``.
+    The blocks are translated as execution reaches them, and kept for the whole
+    process so that contracts that are called many times are translated once.
+    Code without a code hash, like the init code of contract creations, is not
+    cached.
+    """
+    if code_hash is None:
+        return {}
+    try:
+        cached_opcode_lookup, cached_superinstructions, blocks = _basic_block_cache[code_hash]
+    except KeyError:
+        pass
+    else:
+        if (
+            cached_opcode_lookup is opcode_lookup
+            and cached_superinstructions is superinstructions
+        ):
+            return blocks
+
+    blocks = {}
+    _basic_block_cache[code_hash] = (opcode_lookup, superinstructions, blocks)
+    return blocks
+
+
+def execute_basic_blocks(computation: ComputationAPI) -> None:
+    """
+    Run the code of ``computation`` from its program counter until it halts, or
+    until an opcode raises an error.
+    """
+    code_stream = computation.code
+    code = computation.msg.code
+    opcode_lookup = computation.opcodes
+    superinstructions = computation.superinstructions
+    blocks = get_basic_blocks(computation.msg.code_hash, opcode_lookup, superinstructions)
+    stack = computation._stack
+    gas_meter = computation._gas_meter
+
+    position = code_stream.program_counter
+    while True:
+        try:
+            block = blocks[position]
+        except KeyError:
+            block = blocks[position] = translate_basic_block(
+                code_stream,
+                code,
+                position,
+                opcode_lookup,
+                superinstructions,
+            )
+
+        stack_height = len(stack)
+        if (
+            gas_meter.gas_remaining >= block.gas_cost
+            and stack_height >= block.stack_required
+            and stack_height + block.stack_growth <= STACK_DEPTH_LIMIT
+        ):
+            if block.gas_cost:
+                gas_meter.consume_gas(block.gas_cost, "basic block")
+            for instruction in block.instructions:
+                instruction(computation)
+            terminator = block.fused_terminator
+        else:
+            for opcode_position, opcode_fn in block.opcodes:
+                code_stream.program_counter = opcode_position + 1
+                opcode_fn(computation=computation)
+            terminator = block.terminator
+
+        code_stream.program_counter = block.next_position
+        if terminator is not None:
+            try:
+                terminator(computation)
+            except Halt:
+                break
+        position = code_stream.program_counter
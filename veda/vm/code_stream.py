@@ -1,8 +1,15 @@
 import contextlib
 import logging
+import re
 from typing import (
     Iterator,
-    Set,
+)
+
+from eth_typing import (
+    Hash32,
+)
+from lru import (
+    LRU,
 )
 
 from veda.abc import (
@@ -18,18 +25,59 @@ from veda.vm.opcode_values import (
 )
 
 
+# Number of contracts to keep the analysis of, by code hash. The analysis takes a
+# byte per byte of code, so at most 24MB with contracts of the maximum size.
+PUSH_DATA_CACHE_SIZE = 1024
+
+_push_data_cache = LRU(PUSH_DATA_CACHE_SIZE)
+
+_PUSH_OPCODE = re.compile(rb"[\x60-\x7f]")
+_PUSH_DATA = b"\x01" * (PUSH32 - PUSH1 + 1)
+
+
+def _find_push_data(code: bytes) -> bytes:
+    # Flag every position that is data of a PUSH, skipping from one PUSH to the next
+    push_data = bytearray(len(code))
+    code_length = len(code)
+    find_push = _PUSH_OPCODE.search
+    match = find_push(code)
+    while match is not None:
+        data_start = match.end()
+        data_end = min(data_start + code[data_start - 1] - PUSH1 + 1, code_length)
+        push_data[data_start:data_end] = _PUSH_DATA[:data_end - data_start]
+        match = find_push(code, data_end)
+    return bytes(push_data)
+
+
+def get_push_data(code: bytes, code_hash: Hash32 = None) -> bytes:
+    """
+    Return a byte for every position in ``code``, set if the position is data of a
+    PUSH, and so can't be jumped to. The analysis of account code, given its
+    ``code_hash``, is cached for the whole process so that contracts that are called
+    many times are analysed once.
+    """
+    if code_hash is None:
+        return _find_push_data(code)
+    try:
+        return _push_data_cache[code_hash]
+    except KeyError:
+        push_data = _find_push_data(code)
+        _push_data_cache[code_hash] = push_data
+        return push_data
+
+
 class CodeStream(CodeStreamAPI):
     __slots__ = [
         "_length_cache",
         "_raw_code_bytes",
-        "invalid_positions",
-        "valid_positions",
+        "_code_hash",
+        "_push_data",
         "program_counter",
     ]
 
     logger = logging.getLogger("veda.vm.CodeStream")
 
-    def __init__(self, code_bytes: bytes) -> None:
+    def __init__(self, code_bytes: bytes, code_hash: Hash32 = None) -> None:
         validate_is_bytes(code_bytes, title="CodeStream bytes")
         # in order to avoid method overhead when setting/accessing program_counter,
         # we no longer fence it into 0 <= program_counter <= len(code_bytes).
@@ -38,8 +86,10 @@ class CodeStream(CodeStreamAPI):
         self.program_counter = 0
         self._raw_code_bytes = code_bytes
         self._length_cache = len(code_bytes)
-        self.invalid_positions: Set[int] = set()
-        self.valid_positions: Set[int] = set()
+        self._code_hash = code_hash
+        # Looked up on the first jump, most calls to precompiles and plain transfers
+        # don't need it
+        self._push_data: bytes = None
 
     def read(self, size: int) -> bytes:
         old_program_counter = self.program_counter
@@ -81,45 +131,12 @@ class CodeStream(CodeStreamAPI):
         finally:
             self.program_counter = anchor_pc
 
-    def _potentially_disqualifying_opcode_positions(
-        self, position: int
-    ) -> Iterator[int]:
-        # Look at the last 32 positions (from 1 byte back to 32 bytes back).
-        # Don't attempt to look at negative positions.
-        deepest_lookback = min(32, position)
-        # iterate in reverse, because PUSH32 is more common than others
-        for bytes_back in range(deepest_lookback, 0, -1):
-            earlier_position = position - bytes_back
-            opcode = self._raw_code_bytes[earlier_position]
-            if PUSH1 + (bytes_back - 1) <= opcode <= PUSH32:
-                # that PUSH1, if two bytes back, isn't disqualifying
-                # PUSH32 in any of the bytes back is disqualifying
-                yield earlier_position
-
     def is_valid_opcode(self, position: int) -> bool:
         if position >= self._length_cache:
             return False
-        elif position in self.invalid_positions:
-            return False
-        elif position in self.valid_positions:
-            return True
-        else:
-            # An opcode is not valid, iff it is the "data" following a PUSH_
-            # So we look at the previous 32 bytes (PUSH32 being the largest) to see if
-            # there is a PUSH_ before the opcode in this position.
-            for disqualifier in self._potentially_disqualifying_opcode_positions(
-                position
-            ):
-                # Now that we found a PUSH_ before this position,
-                # we check if *that* PUSH is valid
-                if self.is_valid_opcode(disqualifier):
-                    # If the PUSH_ valid, then the current position is invalid
-                    self.invalid_positions.add(position)
-                    return False
-                # Otherwise, keep looking for other potentially
-                # disqualifying PUSH_ codes
-
-            # We didn't find any valid PUSH_ opcodes in the 32 bytes
-            # before position; it's valid
-            self.valid_positions.add(position)
-            return True
+
+        # An opcode is not valid, iff it is the "data" following a PUSH_
+        push_data = self._push_data
+        if push_data is None:
+            push_data = self._push_data = get_push_data(self._raw_code_bytes, self._code_hash)
+        return not push_data[position]
@@ -58,6 +58,9 @@ from veda.validation import (
     validate_is_bytes,
     validate_uint256,
 )
+from veda.vm.basic_blocks import (
+    execute_basic_blocks,
+)
 from veda.vm.code_stream import (
     CodeStream,
 )
@@ -76,6 +79,9 @@ from veda.vm.message import (
 from veda.vm.stack import (
     Stack,
 )
+from veda.vm.superinstructions import (
+    SuperinstructionFactory,
+)
 
 
 def NO_RESULT(computation: ComputationAPI) -> None:
@@ -130,6 +136,12 @@ class BaseComputation(ComputationAPI, Configurable):
     # VM configuration
     opcodes: Dict[int, OpcodeAPI] = None
     _precompiles: Dict[Address, Callable[[ComputationAPI], ComputationAPI]] = None
+    # Run the code as basic blocks, with superinstructions if any, see
+    # veda.vm.basic_blocks and veda.vm.superinstructions
+    use_basic_blocks: bool = False
+    superinstructions: Dict[Tuple[int, ...], SuperinstructionFactory] = None
+    # The validating Stack, or the faster IntStack, see veda.vm.stack
+    stack_class: Type[StackAPI] = Stack
 
     def __init__(
         self,
@@ -140,13 +152,13 @@ class BaseComputation(ComputationAPI, Configurable):
         self.state = state
         self.msg = message
         self.transaction_context = transaction_context
-        self.code = CodeStream(message.code)
+        self.code = CodeStream(message.code, message.code_hash)
 
         self._gas_meter = self._configure_gas_meter()
 
         self.children = []
         self.accounts_to_delete = {}
-        self._stack = Stack()
+        self._stack = self.stack_class()
         self._memory = Memory()
         self._log_entries = []
 
@@ -340,6 +352,10 @@ class BaseComputation(ComputationAPI, Configurable):
 
             show_debug2 = computation.logger.show_debug2
 
+            if cls.use_basic_blocks and not show_debug2:
+                execute_basic_blocks(computation)
+                return computation
+
             opcode_lookup = computation.opcodes
             for opcode in computation.code:
                 try:
@@ -407,39 +423,36 @@ class BaseComputation(ComputationAPI, Configurable):
         validate_uint256(start_position, title="Memory start position")
         validate_uint256(size, title="Memory size")
 
-        before_size = ceil32(len(self._memory))
+        before_size = len(self._memory)
         after_size = ceil32(start_position + size)
 
-        before_cost = memory_gas_cost(before_size)
-        after_cost = memory_gas_cost(after_size)
-
         if self.logger.show_debug2:
             self.logger.debug2(
                 "MEMORY: size (%s -> %s) | cost (%s -> %s)",
                 before_size,
                 after_size,
-                before_cost,
-                after_cost,
+                memory_gas_cost(before_size),
+                memory_gas_cost(after_size),
             )
 
-        if size:
-            if before_cost < after_cost:
-                gas_fee = after_cost - before_cost
-                self._gas_meter.consume_gas(
-                    gas_fee,
-                    reason=" ".join(
-                        (
-                            "Expanding memory",
-                            str(before_size),
-                            "->",
-                            str(after_size),
-                        )
-                    ),
-                )
+        # The memory size is always a multiple of 32, and its cost grows with it
+        if size and after_size > before_size:
+            gas_fee = memory_gas_cost(after_size) - memory_gas_cost(before_size)
+            self._gas_meter.consume_gas(
+                gas_fee,
+                reason=" ".join(
+                    (
+                        "Expanding memory",
+                        str(before_size),
+                        "->",
+                        str(after_size),
+                    )
+                ),
+            )
 
             self._memory.extend(start_position, size)
 
-    def memory_write(self, start_position: int, size: int, value: bytes) -> None:
+    def memory_write(self, start_position: int, size: int, value: BytesOrView) -> None:
         return self._memory.write(start_position, size, value)
 
     def memory_read(self, start_position: int, size: int) -> memoryview:
@@ -66,6 +66,11 @@ class VedaVM(VM):
     compute_difficulty = staticmethod(compute_veda_difficulty)  # type: ignore
     validate_transaction_against_header = validate_veda_transaction_against_header
 
+    # Veda receipts carry no intermediate state root, so by default the state is only
+    # merkleized once per block, when it is persisted. Set this to merkleize after
+    # every transaction instead, so the header passed between them has the state root.
+    intermediate_state_roots: bool = False
+
 
     def add_receipt_to_header(
         self, old_header: BlockHeaderAPI, receipt: ReceiptAPI
@@ -73,9 +78,14 @@ class VedaVM(VM):
         # Skip merkelizing the account data and persisting it to disk on every
         # transaction. Starting in Byzantium, this is no longer necessary,
         # because the state root isn't in the receipt anymore.
+        if self.intermediate_state_roots:
+            state_root = self.state.make_state_root()
+        else:
+            state_root = old_header.state_root
+
         return old_header.copy(
             bloom=int(BloomFilter(old_header.bloom) | receipt.bloom),
-            state_root=self.state.make_state_root(),
+            state_root=state_root,
         )
 
     # TODO: VEDA/ delete this
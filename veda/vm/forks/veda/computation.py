@@ -13,7 +13,7 @@ from veda.exceptions import OutOfGas, ReservedBytesInCode, VMError, StackDepthLi
 from veda.precompiles import modexp
 from veda.precompiles.modexp import extract_lengths
 from veda.vm.forks.veda.constants import MAX_INITCODE_SIZE, INITCODE_WORD_COST
-from veda.vm.forks.veda.opcodes import VEDA_OPCODES
+from veda.vm.forks.veda.opcodes import VEDA_OPCODES, VEDA_SUPERINSTRUCTIONS
 from .constants import GAS_MOD_EXP_QUADRATIC_DENOMINATOR_EIP_2565
 from ...computation import BaseComputation
 from ...gas_meter import GasMeter, allow_negative_refund_strategy
@@ -89,6 +89,7 @@ class VedaComputation(BaseComputation):
     """
 
     opcodes = VEDA_OPCODES
+    superinstructions = VEDA_SUPERINSTRUCTIONS
     _precompiles = PRECOMPILES
 
     def __init__(
@@ -3,6 +3,7 @@ from typing import (
     Any,
     Callable,
     Dict,
+    Tuple,
 )
 
 from veda import (
@@ -33,9 +34,15 @@ from veda.vm.logic import (
     system,
 )
 
+from veda.vm import (
+    superinstructions,
+)
 from veda.vm.opcode import (
     as_opcode,
 )
+from veda.vm.superinstructions import (
+    SuperinstructionFactory,
+)
 from .constants import (
     GAS_EXPBYTE_EIP160,
     GAS_EXP_EIP160,
@@ -823,3 +830,52 @@ VEDA_OPCODES: Dict[int, OpcodeAPI] = {
     ),
 
 }
+
+
+def _veda_superinstructions() -> Dict[Tuple[int, ...], SuperinstructionFactory]:
+    # The pairs that the opcode pair profiler finds most in Solidity contracts, see
+    # veda.tools.opcode_profiler
+    fused = {
+        (opcode_values.PUSH1, opcode_values.JUMP): superinstructions.push_jump,
+        (opcode_values.PUSH1, opcode_values.JUMPI): superinstructions.push_jumpi,
+        (opcode_values.PUSH1, opcode_values.MLOAD): superinstructions.push_mload,
+        (
+            opcode_values.CALLDATALOAD,
+            opcode_values.PUSH1,
+            opcode_values.SHR,
+        ): superinstructions.calldataload_shr,
+    }
+    for operation in (
+        opcode_values.ADD,
+        opcode_values.MUL,
+        opcode_values.AND,
+        opcode_values.OR,
+        opcode_values.XOR,
+        opcode_values.EQ,
+    ):
+        fused[opcode_values.PUSH1, operation] = superinstructions.push_operation
+    for operation in (
+        opcode_values.ADD,
+        opcode_values.MUL,
+        opcode_values.SUB,
+        opcode_values.DIV,
+        opcode_values.AND,
+        opcode_values.OR,
+        opcode_values.XOR,
+        opcode_values.SHL,
+        opcode_values.SHR,
+        opcode_values.EQ,
+        opcode_values.LT,
+        opcode_values.GT,
+    ):
+        fused[opcode_values.PUSH1, opcode_values.PUSH1, operation] = (
+            superinstructions.push_push_operation
+        )
+    stack_opcodes = (opcode_values.DUP1, opcode_values.SWAP1, opcode_values.POP)
+    for first in stack_opcodes:
+        for second in stack_opcodes:
+            fused[first, second] = superinstructions.stack_shuffle
+    return fused
+
+
+VEDA_SUPERINSTRUCTIONS = _veda_superinstructions()
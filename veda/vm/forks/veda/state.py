@@ -86,10 +86,12 @@ class VedaTransactionExecutor(BaseTransactionExecutor):
             )
             data = b""
             code = transaction.data
+            code_hash = None
         else:
             contract_address = None
             data = transaction.data
             code = self.vm_state.get_code(transaction.to)
+            code_hash = self.vm_state.get_code_hash(transaction.to)
 
         self.vm_state.logger.debug2(
             (
@@ -108,6 +110,7 @@ class VedaTransactionExecutor(BaseTransactionExecutor):
             sender=transaction.sender,
             data=data,
             code=code,
+            code_hash=code_hash,
             create_address=contract_address,
         )
         return message
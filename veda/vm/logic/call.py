@@ -142,8 +142,10 @@ class BaseCall(Opcode, ABC):
         else:
             if code_address:
                 code = computation.state.get_code(code_address)
+                code_hash = computation.state.get_code_hash(code_address)
             else:
                 code = computation.state.get_code(to)
+                code_hash = computation.state.get_code_hash(to)
 
             child_msg_kwargs = {
                 "gas": child_msg_gas,
@@ -151,6 +153,7 @@ class BaseCall(Opcode, ABC):
                 "to": to,
                 "data": call_data,
                 "code": code,
+                "code_hash": code_hash,
                 "code_address": code_address,
                 "should_transfer_value": should_transfer_value,
                 "is_static": is_static,
@@ -177,7 +180,7 @@ class BaseCall(Opcode, ABC):
                 computation.memory_write(
                     memory_output_start_position,
                     actual_output_size,
-                    child_computation.output[:actual_output_size],
+                    memoryview(child_computation.output)[:actual_output_size],
                 )
 
             if child_computation.should_return_gas:
@@ -21,6 +21,32 @@ from veda.abc import (
 from veda.exceptions import (
     OutOfBoundsRead,
 )
+from veda.typing import (
+    BytesOrView,
+)
+
+
+def copy_to_memory(
+    computation: ComputationAPI,
+    mem_start_position: int,
+    data: BytesOrView,
+    data_start_position: int,
+    size: int,
+) -> None:
+    """
+    Write ``size`` bytes of ``data`` from ``data_start_position`` to memory, without
+    copying them first, padded with zeros past the end of ``data``.
+    """
+    value = memoryview(data)[data_start_position : data_start_position + size]
+    computation.memory_write(mem_start_position, len(value), value)
+
+    padding_size = size - len(value)
+    if padding_size:
+        computation.memory_write(
+            mem_start_position + len(value),
+            padding_size,
+            bytes(padding_size),
+        )
 
 
 def balance(computation: ComputationAPI) -> None:
@@ -60,7 +86,7 @@ def calldataload(computation: ComputationAPI) -> None:
     """
     start_position = computation.stack_pop1_int()
 
-    value = computation.msg.data_as_bytes[start_position : start_position + 32]
+    value = bytes(computation.msg.data[start_position : start_position + 32])
     padded_value = value.ljust(32, b"\x00")
     normalized_value = padded_value.lstrip(b"\x00")
 
@@ -86,12 +112,13 @@ def calldatacopy(computation: ComputationAPI) -> None:
 
     computation.consume_gas(copy_gas_cost, reason="CALLDATACOPY fee")
 
-    value = computation.msg.data_as_bytes[
-        calldata_start_position : calldata_start_position + size
-    ]
-    padded_value = value.ljust(size, b"\x00")
-
-    computation.memory_write(mem_start_position, size, padded_value)
+    copy_to_memory(
+        computation,
+        mem_start_position,
+        computation.msg.data,
+        calldata_start_position,
+        size,
+    )
 
 
 def chain_id(computation: ComputationAPI) -> None:
@@ -120,12 +147,14 @@ def codecopy(computation: ComputationAPI) -> None:
         reason="CODECOPY: word gas cost",
     )
 
-    with computation.code.seek(code_start_position):
-        code_bytes = computation.code.read(size)
-
-    padded_code_bytes = code_bytes.ljust(size, b"\x00")
-
-    computation.memory_write(mem_start_position, size, padded_code_bytes)
+    # The code stream reads the code of the message
+    copy_to_memory(
+        computation,
+        mem_start_position,
+        computation.msg.code,
+        code_start_position,
+        size,
+    )
 
 
 def gasprice(computation: ComputationAPI) -> None:
@@ -157,10 +186,7 @@ def extcodecopy_execute(computation: ComputationAPI) -> Tuple[Address, int]:
 
     code = computation.state.get_code(account)
 
-    code_bytes = code[code_start_position : code_start_position + size]
-    padded_code_bytes = code_bytes.ljust(size, b"\x00")
-
-    computation.memory_write(mem_start_position, size, padded_code_bytes)
+    copy_to_memory(computation, mem_start_position, code, code_start_position, size)
 
     return account, size
 
@@ -220,8 +246,10 @@ def returndatacopy(computation: ComputationAPI) -> None:
 
     computation.consume_gas(copy_gas_cost, reason="RETURNDATACOPY fee")
 
-    value = computation.return_data[
-        returndata_start_position : returndata_start_position + size
-    ]
-
-    computation.memory_write(mem_start_position, size, value)
+    copy_to_memory(
+        computation,
+        mem_start_position,
+        computation.return_data,
+        returndata_start_position,
+        size,
+    )
@@ -1,60 +1,72 @@
-import itertools
 import logging
 
+from eth_utils import (
+    ValidationError,
+)
+
 from veda._utils.numeric import (
     ceil32,
 )
 from veda.abc import (
     MemoryAPI,
 )
-from veda.validation import (
-    validate_is_bytes,
-    validate_length,
-    validate_lte,
-    validate_uint256,
+from veda.typing import (
+    BytesOrView,
 )
 
 
 class Memory(MemoryAPI):
-    __slots__ = ["_bytes"]
+    """
+    The memory of a computation, in a buffer that grows ahead of the memory size so
+    that extending the memory doesn't reallocate and zero it every time. The buffer
+    is zero past the memory size, which is never written.
+    """
+
+    __slots__ = ["_bytes", "_size"]
     logger = logging.getLogger("veda.vm.memory.Memory")
 
     def __init__(self) -> None:
         self._bytes = bytearray()
+        self._size = 0
 
     def extend(self, start_position: int, size: int) -> None:
         if size == 0:
             return
 
         new_size = ceil32(start_position + size)
-        if new_size <= len(self):
+        if new_size <= self._size:
             return
 
-        size_to_extend = new_size - len(self)
-        try:
-            self._bytes.extend(itertools.repeat(0, size_to_extend))
-        except BufferError:
-            # we can't extend the buffer (which might involve relocating it) if a
-            # memoryview (which stores a pointer into the buffer) has been created by
-            # read() and not released. Callers of read() will never try to write to the
-            # buffer so we're not missing anything by making a new buffer and forgetting
-            # about the old one. We're keeping too much memory around but this is still
-            # a net savings over having read() return a new bytes() object every time.
-            self._bytes = self._bytes + bytearray(size_to_extend)
+        capacity = len(self._bytes)
+        if new_size > capacity:
+            size_to_extend = max(new_size, capacity * 2) - capacity
+            try:
+                self._bytes.extend(bytes(size_to_extend))
+            except BufferError:
+                # we can't extend the buffer (which might involve relocating it) if a
+                # memoryview (which stores a pointer into the buffer) has been created
+                # by read() and not released. Callers of read() will never try to write
+                # to the buffer so we're not missing anything by making a new buffer and
+                # forgetting about the old one.
+                self._bytes = self._bytes + bytearray(size_to_extend)
+        self._size = new_size
 
     def __len__(self) -> int:
-        return len(self._bytes)
+        return self._size
 
-    def write(self, start_position: int, size: int, value: bytes) -> None:
+    def write(self, start_position: int, size: int, value: BytesOrView) -> None:
         if size:
-            validate_uint256(start_position)
-            validate_uint256(size)
-            validate_is_bytes(value)
-            validate_length(value, length=size)
-            validate_lte(start_position + size, maximum=len(self))
-
-            for idx, v in enumerate(value):
-                self._bytes[start_position + idx] = v
+            if len(value) != size:
+                raise ValidationError(
+                    f"Value must be of length {size}.  Got {len(value)} bytes"
+                )
+            if start_position < 0 or start_position + size > self._size:
+                raise ValidationError(
+                    f"Cannot write {size} bytes at {start_position} to a memory of "
+                    f"{self._size} bytes"
+                )
+
+            self._bytes[start_position : start_position + size] = value
 
     def read(self, start_position: int, size: int) -> memoryview:
         return memoryview(self._bytes)[start_position : start_position + size]
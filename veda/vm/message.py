@@ -2,6 +2,7 @@ import logging
 
 from eth_typing import (
     Address,
+    Hash32,
 )
 
 from veda.abc import (
@@ -33,6 +34,7 @@ class Message(MessageAPI):
         "depth",
         "gas",
         "code",
+        "code_hash",
         "_code_address",
         "create_address",
         "should_transfer_value",
@@ -55,6 +57,7 @@ class Message(MessageAPI):
         code_address: Address = None,
         should_transfer_value: bool = True,
         is_static: bool = False,
+        code_hash: Hash32 = None,
     ) -> None:
         validate_uint256(gas, title="Message.gas")
         self.gas: int = gas
@@ -79,6 +82,12 @@ class Message(MessageAPI):
         validate_is_bytes(code, title="Message.code")
         self.code = code
 
+        # The hash of the code, when it is the code of an account, used to look up
+        # the jump destination analysis of the code
+        if code_hash is not None:
+            validate_is_bytes(code_hash, title="Message.code_hash")
+        self.code_hash = code_hash
+
         if create_address is not None:
             validate_canonical_address(create_address, title="Message.storage_address")
         self.storage_address = create_address
@@ -59,6 +59,9 @@ class Opcode(Configurable, OpcodeAPI):
 
         props = {
             "__call__": staticmethod(wrapped_logic_fn),
+            # The logic without the gas charge, for execution engines that charge the
+            # gas of many opcodes at once
+            "logic_fn": staticmethod(logic_fn),
             "mnemonic": mnemonic,
             "gas_cost": gas_cost,
         }
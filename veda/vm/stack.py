@@ -225,3 +225,100 @@ class Stack(StackAPI):
 
     def __str__(self) -> str:
         return str(list(self._stack_items_str()))
+
+
+class IntStack(StackAPI):
+    """
+    VM Stack of ints only, for production execution
+
+    Bytes are converted to ints when they are pushed, so that pushes and pops don't
+    allocate and unpack ``(type, value)`` pairs like :class:`Stack` does. Pushed
+    values aren't validated: every opcode pushes a value in the 256 bit range, and at
+    most 32 bytes. :class:`Stack` keeps validating them.
+
+    ``values`` holds the items of the stack, top last, like it does for
+    :class:`Stack`, so that code rearranging them works with either stack.
+    """
+
+    __slots__ = ["values", "_append", "_pop", "__len__"]
+    logger = logging.getLogger("veda.vm.stack.IntStack")
+
+    def __init__(self) -> None:
+        values: List[int] = []
+        self.values = values
+        # caching optimizations to avoid an attribute lookup on self.values
+        self._append = values.append
+        self._pop = values.pop
+        self.__len__ = values.__len__
+
+    def push_int(self, value: int) -> None:
+        if len(self.values) > 1023:
+            raise FullStack("Stack limit reached")
+
+        self._append(value)
+
+    def push_bytes(self, value: bytes) -> None:
+        if len(self.values) > 1023:
+            raise FullStack("Stack limit reached")
+
+        self._append(int.from_bytes(value, "big"))
+
+    def pop1_bytes(self) -> bytes:
+        try:
+            return int_to_big_endian(self._pop())
+        except IndexError:
+            raise InsufficientStack("Wanted 1 stack item as bytes, had none")
+
+    def pop1_int(self) -> int:
+        try:
+            return self._pop()
+        except IndexError:
+            raise InsufficientStack("Wanted 1 stack item as int, had none")
+
+    def pop1_any(self) -> Union[int, bytes]:
+        try:
+            return self._pop()
+        except IndexError:
+            raise InsufficientStack("Wanted 1 stack item, had none")
+
+    def pop_any(self, num_items: int) -> Tuple[Union[int, bytes], ...]:
+        return self.pop_ints(num_items)
+
+    def pop_ints(self, num_items: int) -> Tuple[int, ...]:
+        values = self.values
+        if num_items > len(values):
+            raise InsufficientStack(
+                "Wanted %d stack items, only had %d",
+                num_items,
+                len(values),
+            )
+        else:
+            neg_num_items = -1 * num_items
+
+            popped = values[:neg_num_items - 1:-1]
+            del values[neg_num_items:]
+            return tuple(popped)
+
+    def pop_bytes(self, num_items: int) -> Tuple[bytes, ...]:
+        return tuple(int_to_big_endian(value) for value in self.pop_ints(num_items))
+
+    def swap(self, position: int) -> None:
+        values = self.values
+        idx = -1 * position - 1
+        try:
+            values[-1], values[idx] = values[idx], values[-1]
+        except IndexError:
+            raise InsufficientStack(f"Insufficient stack items for SWAP{position}")
+
+    def dup(self, position: int) -> None:
+        values = self.values
+        if len(values) > 1023:
+            raise FullStack("Stack limit reached")
+
+        try:
+            self._append(values[-1 * position])
+        except IndexError:
+            raise InsufficientStack(f"Insufficient stack items for DUP{position}")
+
+    def __str__(self) -> str:
+        return str([hex(value) for value in self.values])
@@ -0,0 +1,289 @@
+"""
+Superinstructions run a sequence of opcodes that compiled contracts use often in one
+handler, in the basic blocks of :mod:`veda.vm.basic_blocks`.
+
+A computation class registers them in ``superinstructions``, by the sequence of
+opcodes they replace, where PUSH1, DUP1 and SWAP1 stand for any PUSH, DUP and SWAP.
+A factory gets the code, and the opcode, opcode function and PUSH value or DUP and
+SWAP position of each opcode of the sequence, and returns the handler, or None to
+leave the sequence as it is.
+
+Handlers only run in blocks whose stack and static gas were checked beforehand, and
+the static gas of the opcodes of the sequence is already charged, except for the
+opcode that ends the block, which charges its own gas and fails the way the opcode
+would.
+"""
+import operator
+from typing import (
+    Any,
+    Callable,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from eth_utils import (
+    big_endian_to_int,
+)
+
+from veda import (
+    constants,
+)
+from veda.abc import (
+    CodeStreamAPI,
+    ComputationAPI,
+    OpcodeAPI,
+)
+from veda.exceptions import (
+    InsufficientStack,
+    OutOfGas,
+)
+from veda.vm import (
+    opcode_values,
+)
+from veda.vm.stack import (
+    Stack,
+)
+
+Instruction = Callable[[ComputationAPI], None]
+
+SequenceItem = Tuple[int, OpcodeAPI, Any]
+
+SuperinstructionFactory = Callable[
+    [CodeStreamAPI, Sequence[SequenceItem]],
+    Optional[Instruction],
+]
+
+
+def _is_jump_destination(code_stream: CodeStreamAPI, position: int) -> bool:
+    return (
+        position < len(code_stream)
+        and code_stream[position] == opcode_values.JUMPDEST
+        and code_stream.is_valid_opcode(position)
+    )
+
+
+def push_jump(
+    code_stream: CodeStreamAPI,
+    sequence: Sequence[SequenceItem],
+) -> Optional[Instruction]:
+    """
+    PUSH a valid jump destination and JUMP to it.
+    """
+    (_, _, destination_bytes), (_, jump_fn, _) = sequence
+    destination = big_endian_to_int(destination_bytes)
+    if not _is_jump_destination(code_stream, destination):
+        return None
+    gas_cost = jump_fn.gas_cost
+    mnemonic = jump_fn.mnemonic
+
+    def jump(computation: ComputationAPI) -> None:
+        try:
+            computation.consume_gas(gas_cost, mnemonic)
+        except OutOfGas:
+            # Leave the stack as the opcode would
+            computation.stack_push_bytes(destination_bytes)
+            raise
+        computation.code.program_counter = destination
+
+    return jump
+
+
+def push_jumpi(
+    code_stream: CodeStreamAPI,
+    sequence: Sequence[SequenceItem],
+) -> Optional[Instruction]:
+    """
+    PUSH a valid jump destination and JUMPI to it.
+    """
+    (_, _, destination_bytes), (_, jumpi_fn, _) = sequence
+    destination = big_endian_to_int(destination_bytes)
+    if not _is_jump_destination(code_stream, destination):
+        return None
+    gas_cost = jumpi_fn.gas_cost
+    mnemonic = jumpi_fn.mnemonic
+    jumpi_logic = jumpi_fn.logic_fn
+
+    def jumpi(computation: ComputationAPI) -> None:
+        try:
+            computation.consume_gas(gas_cost, mnemonic)
+        except OutOfGas:
+            # Leave the stack as the opcode would
+            computation.stack_push_bytes(destination_bytes)
+            raise
+        try:
+            condition = computation.stack_pop1_int()
+        except InsufficientStack:
+            # Fail with the error of JUMPI
+            computation.stack_push_bytes(destination_bytes)
+            jumpi_logic(computation)
+        else:
+            if condition:
+                computation.code.program_counter = destination
+
+    return jumpi
+
+
+def push_mload(
+    code_stream: CodeStreamAPI,
+    sequence: Sequence[SequenceItem],
+) -> Optional[Instruction]:
+    """
+    MLOAD from a PUSHed memory position.
+    """
+    (_, _, position_bytes), (_, mload_fn, _) = sequence
+    start_position = big_endian_to_int(position_bytes)
+    gas_cost = mload_fn.gas_cost
+    mnemonic = mload_fn.mnemonic
+
+    def mload(computation: ComputationAPI) -> None:
+        try:
+            computation.consume_gas(gas_cost, mnemonic)
+        except OutOfGas:
+            # Leave the stack as the opcode would
+            computation.stack_push_bytes(position_bytes)
+            raise
+        computation.extend_memory(start_position, 32)
+        computation.stack_push_bytes(computation.memory_read_bytes(start_position, 32))
+
+    return mload
+
+
+_COMMUTATIVE_OPERATIONS = {
+    opcode_values.ADD: lambda left, right: (left + right) & constants.UINT_256_MAX,
+    opcode_values.MUL: lambda left, right: (left * right) & constants.UINT_256_MAX,
+    opcode_values.AND: operator.and_,
+    opcode_values.OR: operator.or_,
+    opcode_values.XOR: operator.xor,
+    opcode_values.EQ: lambda left, right: 1 if left == right else 0,
+}
+
+
+def push_operation(
+    code_stream: CodeStreamAPI,
+    sequence: Sequence[SequenceItem],
+) -> Optional[Instruction]:
+    """
+    ADD, MUL, AND, OR, XOR or EQ the top of the stack with a PUSHed value.
+    """
+    (_, _, value_bytes), (opcode, _, _) = sequence
+    value = big_endian_to_int(value_bytes)
+    operation = _COMMUTATIVE_OPERATIONS[opcode]
+
+    def push_operation(computation: ComputationAPI) -> None:
+        computation.stack_push_int(operation(value, computation.stack_pop1_int()))
+
+    return push_operation
+
+
+class _StackComputation:
+    # Just enough of a computation to run the logic of an opcode on constants
+    def __init__(self, stack: Stack) -> None:
+        self.stack_pop_ints = stack.pop_ints
+        self.stack_pop_bytes = stack.pop_bytes
+        self.stack_pop_any = stack.pop_any
+        self.stack_pop1_int = stack.pop1_int
+        self.stack_pop1_bytes = stack.pop1_bytes
+        self.stack_pop1_any = stack.pop1_any
+        self.stack_push_int = stack.push_int
+        self.stack_push_bytes = stack.push_bytes
+
+
+def push_push_operation(
+    code_stream: CodeStreamAPI,
+    sequence: Sequence[SequenceItem],
+) -> Optional[Instruction]:
+    """
+    Run an arithmetic, comparison or bitwise opcode on two PUSHed values, once, and
+    push the result.
+    """
+    (_, _, first_bytes), (_, _, second_bytes), (_, operation_fn, _) = sequence
+    stack = Stack()
+    stack.push_bytes(first_bytes)
+    stack.push_bytes(second_bytes)
+    operation_fn.logic_fn(_StackComputation(stack))
+    ((value_type, value),) = stack.values
+
+    if value_type is int:
+        def push_result(computation: ComputationAPI) -> None:
+            computation.stack_push_int(value)
+    else:
+        def push_result(computation: ComputationAPI) -> None:
+            computation.stack_push_bytes(value)
+
+    return push_result
+
+
+def calldataload_shr(
+    code_stream: CodeStreamAPI,
+    sequence: Sequence[SequenceItem],
+) -> Optional[Instruction]:
+    """
+    CALLDATALOAD and SHR the word by a PUSHed shift, like a function selector.
+    """
+    _, (_, _, shift_bytes), _ = sequence
+    shift = big_endian_to_int(shift_bytes)
+
+    def calldataload_shr(computation: ComputationAPI) -> None:
+        start_position = computation.stack_pop1_int()
+        if shift >= 256:
+            result = 0
+        else:
+            word = bytes(computation.msg.data[start_position:start_position + 32])
+            result = big_endian_to_int(word.ljust(32, b"\x00")) >> shift
+        computation.stack_push_int(result)
+
+    return calldataload_shr
+
+
+def stack_shuffle(
+    code_stream: CodeStreamAPI,
+    sequence: Sequence[SequenceItem],
+) -> Optional[Instruction]:
+    """
+    Run a chain of DUP, SWAP and POP as a single rearrangement of the top of the
+    stack.
+    """
+    # Follow where the items of the top of the stack end up, by their index from
+    # the top before the chain, -1 being the top
+    depth = 0
+    items = []
+    for opcode, _, position in sequence:
+        if opcode == opcode_values.POP:
+            needed = 1
+        elif opcode_values.SWAP1 <= opcode <= opcode_values.SWAP16:
+            needed = position + 1
+        else:
+            needed = position
+        if needed > len(items):
+            missing = needed - len(items)
+            items = [-depth - missing + index for index in range(missing)] + items
+            depth += missing
+
+        if opcode == opcode_values.POP:
+            items.pop()
+        elif opcode_values.SWAP1 <= opcode <= opcode_values.SWAP16:
+            items[-1], items[-position - 1] = items[-position - 1], items[-1]
+        else:
+            items.append(items[-position])
+
+    # Indexes into the ``depth`` items taken from the top of the stack
+    indexes = tuple(index + depth for index in items)
+
+    if not indexes:
+        def shuffle(computation: ComputationAPI) -> None:
+            del computation._stack.values[-depth:]
+    elif len(indexes) == 1:
+        (index,) = indexes
+
+        def shuffle(computation: ComputationAPI) -> None:
+            values = computation._stack.values
+            values[-depth:] = (values[index - depth],)
+    else:
+        rearrange = operator.itemgetter(*indexes)
+
+        def shuffle(computation: ComputationAPI) -> None:
+            values = computation._stack.values
+            values[-depth:] = rearrange(values[-depth:])
+
+    return shuffle